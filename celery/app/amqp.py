@@ -190,7 +190,7 @@ class TaskPublisher(messaging.Publisher):
             expires=None, exchange=None, exchange_type=None,
             event_dispatcher=None, retry=None, retry_policy=None,
             queue=None, now=None, retries=0, chord=None, callbacks=None,
-            errbacks=None, **kwargs):
+            errbacks=None, reply_to=None, **kwargs):
         """Send task message."""
 
         connection = self.connection
@@ -203,6 +203,88 @@ class TaskPublisher(messaging.Publisher):
             self._declare_queue(queue, retry, _retry_policy)
         self._declare_exchange(exchange, exchange_type, retry, _retry_policy)
 
+        body = self._task_body(task_name, task_args, task_kwargs,
+                               task_id=task_id, taskset_id=taskset_id,
+                               countdown=countdown, eta=eta,
+                               expires=expires, now=now, retries=retries,
+                               chord=chord, callbacks=callbacks,
+                               errbacks=errbacks, reply_to=reply_to)
+
+        do_retry = retry if retry is not None else self.retry
+        send = self.send
+        if do_retry:
+            send = connection.ensure(self, self.send, **_retry_policy)
+        send(body, exchange=exchange, **extract_msg_options(kwargs))
+        signals.task_sent.send(sender=task_name, **body)
+        if event_dispatcher:
+            event_dispatcher.send("task-sent", uuid=body["id"],
+                                               name=task_name,
+                                               args=repr(body["args"]),
+                                               kwargs=repr(body["kwargs"]),
+                                               retries=retries,
+                                               eta=body["eta"],
+                                               expires=body["expires"])
+        return body["id"]
+
+    def delay_tasks(self, task_name, requests, event_dispatcher=None,
+            retry=None, retry_policy=None, now=None):
+        """Send many task messages for the same task type.
+
+        :param requests: Iterable of ``(args, kwargs, options)`` tuples,
+                         where `options` are the (already routed)
+                         keyword arguments accepted by :meth:`delay_task`.
+
+        Entities are only declared once for every distinct destination,
+        and the messages are sent back-to-back on the publisher channel.
+        The :signal:`tasks_sent` signal and the ``tasks-sent`` event
+        is sent once for the whole batch.
+
+        Returns the list of task ids sent.
+
+        """
+        _retry_policy = self.retry_policy
+        if retry_policy:  # merge default and custom policy
+            _retry_policy = dict(_retry_policy, **retry_policy)
+        do_retry = retry if retry is not None else self.retry
+        send = self.send
+        if do_retry:
+            send = self.connection.ensure(self, self.send, **_retry_policy)
+        now = now or self.app.now()
+
+        declared = set()
+        bodies = []
+        for task_args, task_kwargs, options in requests:
+            queue = options.get("queue")
+            exchange = options.get("exchange")
+            if (queue, exchange) not in declared:
+                if queue:
+                    self._declare_queue(queue, do_retry, _retry_policy)
+                self._declare_exchange(exchange, options.get("exchange_type"),
+                                       do_retry, _retry_policy)
+                declared.add((queue, exchange))
+
+            body = self._task_body(task_name, task_args, task_kwargs,
+                                   now=now, **options)
+            send(body, exchange=exchange, **extract_msg_options(options))
+            bodies.append(body)
+
+        if bodies:
+            signals.tasks_sent.send(sender=task_name, tasks=bodies)
+            if event_dispatcher:
+                event_dispatcher.send("tasks-sent", tasks=[
+                    {"uuid": body["id"],
+                     "name": task_name,
+                     "args": repr(body["args"]),
+                     "kwargs": repr(body["kwargs"]),
+                     "retries": body["retries"],
+                     "eta": body["eta"],
+                     "expires": body["expires"]} for body in bodies])
+        return [body["id"] for body in bodies]
+
+    def _task_body(self, task_name, task_args=None, task_kwargs=None,
+            task_id=None, taskset_id=None, countdown=None, eta=None,
+            expires=None, now=None, retries=0, chord=None, callbacks=None,
+            errbacks=None, reply_to=None, **kwargs):
         task_id = task_id or uuid()
         task_args = task_args or []
         task_kwargs = task_kwargs or {}
@@ -221,8 +303,8 @@ class TaskPublisher(messaging.Publisher):
 
         body = {"task": task_name,
                 "id": task_id,
-                "args": task_args or [],
-                "kwargs": task_kwargs or {},
+                "args": task_args,
+                "kwargs": task_kwargs,
                 "retries": retries or 0,
                 "eta": eta,
                 "expires": expires,
@@ -233,22 +315,9 @@ class TaskPublisher(messaging.Publisher):
             body["taskset"] = taskset_id
         if chord:
             body["chord"] = chord
-
-        do_retry = retry if retry is not None else self.retry
-        send = self.send
-        if do_retry:
-            send = connection.ensure(self, self.send, **_retry_policy)
-        send(body, exchange=exchange, **extract_msg_options(kwargs))
-        signals.task_sent.send(sender=task_name, **body)
-        if event_dispatcher:
-            event_dispatcher.send("task-sent", uuid=task_id,
-                                               name=task_name,
-                                               args=repr(task_args),
-                                               kwargs=repr(task_kwargs),
-                                               retries=retries,
-                                               eta=eta,
-                                               expires=expires)
-        return task_id
+        if reply_to:
+            body["reply_to"] = reply_to
+        return body
 
     def __exit__(self, *exc_info):
         try:
@@ -280,11 +349,29 @@ class AMQP(object):
     #: Cached and prepared routing table.
     _rtable = None
 
+    #: Routes expanded by routers not given custom queues,
+    #: and the configuration they were expanded for.
+    _rcache = None
+    _rcache_for = None
+
+    #: The value of :setting:`CELERY_ROUTES` the table was prepared from.
+    _rtable_for = None
+
     def __init__(self, app):
         self.app = app
 
     def flush_routes(self):
-        self._rtable = _routes.prepare(self.app.conf.CELERY_ROUTES)
+        """Prepare the routes again, and forget about any
+        routes already expanded by the task router.
+
+        This is done automatically when the :setting:`CELERY_ROUTES`
+        or :setting:`CELERY_QUEUES` settings are replaced, but must
+        be called if they are modified in-place.
+
+        """
+        self._rcache = self._rcache_for = None
+        self._rtable_for = self.app.conf.CELERY_ROUTES
+        self._rtable = _routes.prepare(self._rtable_for)
 
     def Queues(self, queues):
         """Create new :class:`Queues` instance, using queue defaults
@@ -299,10 +386,28 @@ class AMQP(object):
                                             conf.CELERY_DEFAULT_EXCHANGE_TYPE)
 
     def Router(self, queues=None, create_missing=None):
-        """Returns the current task router."""
-        return _routes.Router(self.routes, queues or self.queues,
-                              self.app.either("CELERY_CREATE_MISSING_QUEUES",
-                                              create_missing), app=self.app)
+        """Returns the current task router.
+
+        Routes expanded by the router are remembered for later
+        routers, as long as no custom `queues` or `create_missing`
+        arguments are given, and the configuration stays the same.
+
+        """
+        if queues or create_missing is not None:
+            return _routes.Router(self.routes, queues or self.queues,
+                            self.app.either("CELERY_CREATE_MISSING_QUEUES",
+                                            create_missing), app=self.app)
+        conf = self.app.conf
+        if conf.CELERY_ROUTES is not self._rtable_for:
+            self.flush_routes()
+        config = (conf.CELERY_QUEUES, self.queues,
+                  conf.CELERY_CREATE_MISSING_QUEUES)
+        cache_for = self._rcache_for
+        if cache_for is None or any(a is not b
+                                    for a, b in zip(config, cache_for)):
+            self._rcache, self._rcache_for = {}, config
+        return _routes.Router(self.routes, self.queues, config[2],
+                              app=self.app, table=self._rcache)
 
     def TaskConsumer(self, *args, **kwargs):
         """Returns consumer for a single task queue."""
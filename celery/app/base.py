@@ -170,6 +170,8 @@ class Celery(object):
         options.setdefault("compression",
                            self.conf.CELERY_MESSAGE_COMPRESSION)
         options = router.route(options, name, args, kwargs)
+        if self.backend.reply_to:
+            options.setdefault("reply_to", self.backend.reply_to)
         exchange = options.get("exchange")
         exchange_type = options.get("exchange_type")
 
@@ -53,29 +53,59 @@ def add_unlock_chord_task(app):
 
     It creates a task chain polling the header for completion.
 
+    The time between polls starts at `interval` seconds and is doubled
+    for every retry, up to `max_interval` seconds.  The number of
+    header tasks found to be ready is passed on to the next retry
+    (`ready`), so that these are not polled again.
+
     """
     from celery.canvas import subtask
     from celery import result as _res
 
     @app.task(name="celery.chord_unlock", max_retries=None)
     def unlock_chord(setid, callback, interval=1, propagate=False,
-            max_retries=None, result=None):
-        result = _res.TaskSetResult(setid, map(_res.AsyncResult, result))
+            max_retries=None, result=None, max_interval=30, ready=0):
+        results = map(_res.AsyncResult, result)
+        while ready < len(results) and results[ready].ready():
+            ready += 1
+        if ready < len(results):
+            retries = unlock_chord.request.retries
+            countdown = min(interval * 2 ** min(retries, 16),
+                            max(interval, max_interval))
+            return unlock_chord.retry((setid, callback), {
+                        "interval": interval,
+                        "propagate": propagate,
+                        "max_retries": max_retries,
+                        "result": result,
+                        "max_interval": max_interval,
+                        "ready": ready},
+                    countdown=countdown, max_retries=max_retries)
+        result = _res.TaskSetResult(setid, results)
         j = result.join_native if result.supports_native_join else result.join
-        if result.ready():
-            subtask(callback).delay(j(propagate=propagate))
-        else:
-            unlock_chord.retry(countdown=interval, max_retries=max_retries)
+        subtask(callback).delay(j(propagate=propagate))
 
     return unlock_chord
 
 
 @builtin_task
 def add_group_task(app):
+    from itertools import groupby
+    from kombu.utils import kwdict
     from celery.canvas import subtask
     from celery.app.state import get_current_task
     from celery.result import from_serializable
 
+    def task_type(task):
+        # nested groups, chains and chords must be applied separately.
+        if not task.get("subtask_type"):
+            return task["task"]
+
+    def requests(tasks, taskset_id):
+        for task in tasks:
+            options = kwdict(task["options"])
+            options["taskset_id"] = taskset_id
+            yield task["args"], task["kwargs"], options
+
     class Group(app.Task):
         name = "celery.group"
         accept_magic_kwargs = False
@@ -83,30 +113,38 @@ def add_group_task(app):
         def run(self, tasks, result):
             app = self.app
             result = from_serializable(result)
+            taskset_id = self.request.taskset
             if self.request.is_eager or app.conf.CELERY_ALWAYS_EAGER:
                 return app.TaskSetResult(result.id,
-                        [subtask(task).apply(taskset_id=self.request.taskset)
+                        [subtask(task).apply(taskset_id=taskset_id)
                             for task in tasks])
             with app.pool.acquire(block=True) as conn:
                 with app.amqp.TaskPublisher(conn) as publisher:
-                    [subtask(task).apply_async(
-                                    taskset_id=self.request.taskset,
-                                    publisher=publisher)
-                            for task in tasks]
+                    # consecutive tasks of the same type are sent
+                    # using apply_many, so they are only routed once.
+                    for name, members in groupby(tasks, task_type):
+                        if name is None:
+                            [subtask(task).apply_async(taskset_id=taskset_id,
+                                                       publisher=publisher)
+                                for task in members]
+                        else:
+                            app.tasks[name].apply_many(
+                                    requests(members, taskset_id),
+                                    publisher=publisher, results=False)
             parent = get_current_task()
             if parent:
                 parent.request.children.append(result)
             return result
 
         def prepare(self, options, tasks, **kwargs):
-            r = []
+            nodes = []
             options["taskset_id"] = group_id = \
                     options.setdefault("task_id", uuid())
             for task in tasks:
                 tid = task.options.setdefault("task_id", uuid())
                 task.options["taskset_id"] = group_id
-                r.append(self.AsyncResult(tid))
-            return tasks, self.app.TaskSetResult(group_id, r)
+                nodes.append((tid, None))
+            return tasks, self.app.TaskSetResult(group_id, nodes=nodes)
 
         def apply_async(self, args=(), kwargs={}, **options):
             if self.app.conf.CELERY_ALWAYS_EAGER:
@@ -55,8 +55,9 @@ class Inspect(object):
     def active(self, safe=False):
         return self._request("dump_active", safe=safe)
 
-    def scheduled(self, safe=False):
-        return self._request("dump_schedule", safe=safe)
+    def scheduled(self, safe=False, start=0, limit=None):
+        return self._request("dump_schedule", safe=safe,
+                             start=start, limit=limit)
 
     def reserved(self, safe=False):
         return self._request("dump_reserved", safe=safe)
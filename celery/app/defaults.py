@@ -115,6 +115,8 @@ NAMESPACES = {
         "DEFAULT_DELIVERY_MODE": Option(2, type="string"),
         "EAGER_PROPAGATES_EXCEPTIONS": Option(False, type="bool"),
         "ENABLE_UTC": Option(False, type="bool"),
+        "EVENT_BATCH_SIZE": Option(0, type="int"),
+        "EVENT_BATCH_INTERVAL": Option(0.1, type="float"),
         "EVENT_SERIALIZER": Option("json"),
         "IMPORTS": Option((), type="tuple"),
         "IGNORE_RESULT": Option(False, type="bool"),
@@ -126,8 +128,12 @@ NAMESPACES = {
         "REDIS_DB": Option(None, type="int"),
         "REDIS_PASSWORD": Option(None, type="string"),
         "REDIS_MAX_CONNECTIONS": Option(None, type="int"),
+        "REDIS_WRITE_BEHIND": Option(False, type="bool"),
+        "REDIS_WRITE_BEHIND_BATCH": Option(100, type="int"),
+        "REDIS_WRITE_BEHIND_INTERVAL": Option(0.5, type="float"),
         "RESULT_BACKEND": Option(None, type="string"),
         "RESULT_DB_SHORT_LIVED_SESSIONS": Option(False, type="bool"),
+        "RESULT_DB_POOLED_SESSIONS": Option(False, type="bool"),
         "RESULT_DBURI": Option(),
         "RESULT_ENGINE_OPTIONS": Option(None, type="dict"),
         "RESULT_EXCHANGE": Option("celeryresults"),
@@ -157,12 +163,17 @@ NAMESPACES = {
         "SECURITY_KEY": Option(None, type="string"),
         "SECURITY_CERTIFICATE": Option(None, type="string"),
         "SECURITY_CERT_STORE": Option(None, type="string"),
+        "SECURITY_SESSION_KEY": Option(None, type="string"),
+        "SECURITY_LEGACY_FORMAT": Option(False, type="bool"),
     },
     "CELERYD": {
         "AUTOSCALER": Option("celery.worker.autoscale.Autoscaler"),
+        "AUTOSCALER_POLICY": Option("celery.worker.autoscale.PredictivePolicy"),
         "AUTORELOADER": Option("celery.worker.autoreload.Autoreloader"),
         "BOOT_STEPS": Option((), type="tuple"),
         "CONCURRENCY": Option(0, type="int"),
+        "ETA_HORIZON": Option(None, type="float"),
+        "ETA_PARKING_DB": Option(None, type="string"),
         "ETA_SCHEDULER": Option(None, type="string"),
         "ETA_SCHEDULER_PRECISION": Option(1.0, type="float"),
         "FORCE_EXECV": Option(False, type="bool"),
@@ -174,10 +185,17 @@ NAMESPACES = {
                             alt="--loglevel argument"),
         "LOG_FILE": Option(deprecate_by="2.4", remove_by="3.0"),
         "MEDIATOR": Option("celery.worker.mediator.Mediator"),
+        "PERSISTENCE": Option("celery.worker.state.Persistent"),
         "MAX_TASKS_PER_CHILD": Option(type="int"),
         "POOL": Option(DEFAULT_POOL),
         "POOL_PUTLOCKS": Option(True, type="bool"),
+        "POOL_BATCH_SIZE": Option(1, type="int"),
+        "POOL_PROCESS_TITLES": Option(True, type="bool"),
+        "POOL_SHM_THRESHOLD": Option(None, type="int"),
         "PREFETCH_MULTIPLIER": Option(4, type="int"),
+        "PREFETCH_WINDOW": Option(None, type="float"),
+        "REVOKES_MAX": Option(10000, type="int"),
+        "REVOKE_EXPIRES": Option(3600, type="float"),
         "STATE_DB": Option(),
         "TASK_LOG_FORMAT": Option(DEFAULT_TASK_LOG_FMT),
         "TASK_SOFT_TIME_LIMIT": Option(type="float"),
@@ -188,6 +206,7 @@ NAMESPACES = {
         "SCHEDULE": Option({}, type="dict"),
         "SCHEDULER": Option("celery.beat.PersistentScheduler"),
         "SCHEDULE_FILENAME": Option("celerybeat-schedule"),
+        "SCHEDULE_STORE": Option("celery.beat.ShelveStore"),
         "MAX_LOOP_INTERVAL": Option(0, type="float"),
         "LOG_LEVEL": Option("INFO", deprecate_by="2.4", remove_by="3.0"),
         "LOG_FILE": Option(deprecate_by="2.4", remove_by="3.0"),
@@ -6,6 +6,12 @@
     Contains utilities for working with task routes
     (:setting:`CELERY_ROUTES`).
 
+    Routers that only depend on the name of the task can set the
+    :attr:`cacheable` attribute, and the expanded route for a task
+    name will then be remembered by the :class:`Router`.
+    :class:`MapRoute` is always cacheable, other routers
+    are consulted for every message.
+
     :copyright: (c) 2009 - 2012 by Ask Solem.
     :license: BSD, see LICENSE for more details.
 
@@ -14,7 +20,7 @@ from __future__ import absolute_import
 
 from celery.exceptions import QueueNotFound
 from celery.utils import lpmerge
-from celery.utils.functional import firstmethod, mpromise
+from celery.utils.functional import firstmethod, maybe_promise, mpromise
 from celery.utils.imports import instantiate
 
 _first_route = firstmethod("route_for_task")
@@ -23,6 +29,9 @@ _first_route = firstmethod("route_for_task")
 class MapRoute(object):
     """Creates a router out of a :class:`dict`."""
 
+    #: The route only depends on the task name.
+    cacheable = True
+
     def __init__(self, map):
         self.map = map
 
@@ -33,26 +42,77 @@ class MapRoute(object):
 
 
 class Router(object):
+    """Routes tasks to queues.
+
+    Routes returned by cacheable routers (see :attr:`MapRoute.cacheable`)
+    are expanded once per task name and stored in :attr:`table`,
+    which can be shared by routers using the same routes and queues.
+    The table must be discarded when the routes or queues change
+    (:meth:`@amqp.flush_routes` takes care of this for the
+    table of the app).
+
+    """
 
     def __init__(self, routes=None, queues=None, create_missing=False,
-            app=None):
+            app=None, table=None):
         from . import app_or_default
         self.app = app_or_default(app)
         self.queues = {} if queues is None else queues
         self.routes = [] if routes is None else routes
         self.create_missing = create_missing
+        self.table = {} if table is None else table
 
     def route(self, options, task, args=(), kwargs={}):
         options = self.expand_destination(options)  # expands 'queue'
         if self.routes:
-            route = self.lookup_route(task, args, kwargs)
-            if route:  # expands 'queue' in route.
-                return lpmerge(self.expand_destination(route), options)
+            route = self.expand_route(task, args, kwargs)
+            if route:
+                return lpmerge(route, options)
         if "queue" not in options:
-            options = lpmerge(self.expand_destination(
-                              self.app.conf.CELERY_DEFAULT_QUEUE), options)
+            # the default destination is stored using the None key.
+            try:
+                default = self.table[None]
+            except KeyError:
+                default = self.table[None] = self.expand_destination(
+                                    self.app.conf.CELERY_DEFAULT_QUEUE)
+            options = lpmerge(default, options)
         return options
 
+    def expand_route(self, task, args=None, kwargs=None):
+        """Returns the expanded route for `task`, or :const:`None`
+        if none of the routers had a route for it.
+
+        The returned mapping is shared and must not be modified.
+
+        """
+        try:
+            return self.table[task]
+        except KeyError:
+            pass
+        route, cacheable = self._lookup(task, args, kwargs)
+        if route:  # expands 'queue' in route.
+            route = self.expand_destination(route)
+        if cacheable:
+            self.table[task] = route
+        return route
+
+    def _lookup(self, task, args, kwargs):
+        # like lookup_route, but also tells if the answer only
+        # depended on the task name, i.e. it was given by (or after)
+        # cacheable routers only.
+        cacheable = True
+        for router in self.routes:
+            router = maybe_promise(router)
+            cacheable = cacheable and getattr(router, "cacheable", False)
+            try:
+                answer = router.route_for_task(task, args, kwargs)
+            except AttributeError:
+                pass
+            else:
+                if answer is not None:
+                    return answer, cacheable
+        return None, cacheable
+
     def expand_destination(self, route):
         # Route can be a queue name: convenient for direct exchanges.
         if isinstance(route, basestring):
@@ -22,7 +22,7 @@ from celery import current_app
 from celery import states
 from celery.datastructures import ExceptionInfo
 from celery.exceptions import MaxRetriesExceededError, RetryTaskError
-from celery.result import EagerResult
+from celery.result import EagerResult, ResultSet
 from celery.utils import fun_takes_kwargs, uuid, maybe_reraise
 from celery.utils.functional import mattrgetter, maybe_list
 from celery.utils.imports import instantiate
@@ -30,6 +30,7 @@ from celery.utils.log import get_logger
 from celery.utils.mail import ErrorMail
 
 from .annotations import resolve_all as resolve_all_annotations
+from .routes import MapRoute
 from .state import get_current_task
 from .registry import _unpickle_task
 
@@ -40,6 +41,11 @@ extract_exec_options = mattrgetter("queue", "routing_key",
                                    "serializer", "delivery_mode",
                                    "compression", "expires")
 
+#: Options that decide where a message is sent.
+ROUTING_OPTIONS = ("queue", "routing_key", "exchange", "exchange_type",
+                   "immediate", "mandatory", "priority", "serializer",
+                   "delivery_mode", "compression")
+
 
 class Context(threading.local):
     # Default context
@@ -57,6 +63,7 @@ class Context(threading.local):
     called_directly = True
     callbacks = None
     errbacks = None
+    reply_to = None
     _children = None   # see property
 
     def update(self, d, **kwargs):
@@ -529,12 +536,15 @@ class BaseTask(object):
             return self.apply(args, kwargs, task_id=task_id, **options)
         options = dict(extract_exec_options(self), **options)
         options = router.route(options, self.name, args, kwargs)
+        if not self.ignore_result and self.backend.reply_to:
+            options.setdefault("reply_to", self.backend.reply_to)
 
         publish = publisher or app.amqp.publisher_pool.acquire(block=True)
         evd = None
         if conf.CELERY_SEND_TASK_SENT_EVENT:
             evd = app.events.Dispatcher(channel=publish.channel,
-                                        buffer_while_offline=False)
+                                        buffer_while_offline=False,
+                                        batch_size=0)
 
         try:
             task_id = publish.delay_task(self.name, args, kwargs,
@@ -553,6 +563,99 @@ class BaseTask(object):
             parent.request.children.append(result)
         return result
 
+    def apply_many(self, requests, publisher=None, router=None,
+            queues=None, results=True, **options):
+        """Apply many invocations of this task asynchronously,
+        using a single publisher.
+
+        :param requests: Iterable of ``(args, kwargs, options)`` tuples,
+                         where `options` are the keyword arguments
+                         supported by :meth:`apply_async` (or
+                         :const:`None`).
+        :keyword results: Set to :const:`False` if the results are not
+                          needed, so that they are not created.
+        :keyword \*\*options: Default options for all of the messages.
+
+        The messages are routed once for every distinct set of routing
+        options (unless custom routers are configured, in which case
+        every message is routed separately), and published
+        back-to-back using :meth:`TaskPublisher.delay_tasks`.
+
+        Note that the :signal:`task_sent` signal is not sent for
+        every task, instead :signal:`tasks_sent` is sent once for
+        the whole batch.
+
+        Returns a :class:`~celery.result.ResultSet`, or :const:`None`
+        if `results` is disabled.
+
+        """
+        app = self._get_app()
+        conf = app.conf
+
+        if conf.CELERY_ALWAYS_EAGER:
+            applied = [self.apply(args, kwargs, **dict(options, **opts or {}))
+                            for args, kwargs, opts in requests]
+            if results:
+                return ResultSet(applied, app=app)
+            return
+
+        router = router or app.amqp.Router(queues)
+        retry = options.pop("retry", None)
+        retry_policy = options.pop("retry_policy", None)
+        defaults = dict(extract_exec_options(self), **options)
+        if not self.ignore_result and self.backend.reply_to:
+            defaults.setdefault("reply_to", self.backend.reply_to)
+        # routes for a dict is only decided by the task name and options.
+        cache = None
+        if all(isinstance(route, MapRoute) for route in router.routes):
+            cache = {}
+        collected = [] if results else None
+
+        def messages():
+            for args, kwargs, opts in requests:
+                opts = dict(defaults, **opts or {})
+                opts["task_id"] = opts.get("task_id") or uuid()
+                opts["callbacks"] = maybe_list(opts.pop("link", None))
+                opts["errbacks"] = maybe_list(opts.pop("link_error", None))
+                dest = dict((key, opts.pop(key)) for key in ROUTING_OPTIONS
+                                if key in opts)
+                routed = key = None
+                if cache is not None:
+                    try:
+                        key = tuple(sorted(dest.items()))
+                        routed = cache.get(key)
+                    except TypeError:  # unhashable option values.
+                        key = None
+                if routed is None:
+                    routed = router.route(dest, self.name, args, kwargs)
+                    if key is not None:
+                        cache[key] = routed
+                opts.update(routed)
+                if collected is not None:
+                    collected.append(self.AsyncResult(opts["task_id"]))
+                yield args, kwargs, opts
+
+        publish = publisher or app.amqp.publisher_pool.acquire(block=True)
+        evd = None
+        if conf.CELERY_SEND_TASK_SENT_EVENT:
+            evd = app.events.Dispatcher(channel=publish.channel,
+                                        buffer_while_offline=False,
+                                        batch_size=0)
+
+        try:
+            publish.delay_tasks(self.name, messages(),
+                                event_dispatcher=evd,
+                                retry=retry, retry_policy=retry_policy)
+        finally:
+            if not publisher:
+                publish.release()
+
+        if collected is not None:
+            parent = get_current_task()
+            if parent:
+                parent.request.children.extend(collected)
+            return ResultSet(collected, app=app)
+
     def retry(self, args=None, kwargs=None, exc=None, throw=True,
             eta=None, countdown=None, max_retries=None, **options):
         """Retry the task.
@@ -723,9 +826,10 @@ class BaseTask(object):
         :param meta: State metadata (:class:`dict`).
 
         """
-        if task_id is None:
-            task_id = self.request.id
-        self.backend.store_result(task_id, meta, state)
+        request = None
+        if task_id is None or task_id == self.request.id:
+            task_id, request = self.request.id, self.request
+        self.backend.store_result(task_id, meta, state, request=request)
 
     def on_retry(self, exc, task_id, args, kwargs, einfo):
         """Retry handler.
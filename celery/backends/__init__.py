@@ -16,6 +16,7 @@ Unknown result backend: %r.  Did you spell that correctly? (%r)\
 
 BACKEND_ALIASES = {
     "amqp": "celery.backends.amqp:AMQPBackend",
+    "rpc": "celery.backends.rpc:RPCBackend",
     "cache": "celery.backends.cache:CacheBackend",
     "redis": "celery.backends.redis:RedisBackend",
     "mongodb": "celery.backends.mongodb:MongoBackend",
@@ -39,6 +39,9 @@ class AMQPBackend(BaseDictBackend):
 
     supports_native_join = True
 
+    # polling removes the result message from the queue.
+    supports_peek = False
+
     def __init__(self, connection=None, exchange=None, exchange_type=None,
             persistent=None, serializer=None, auto_delete=True,
             **kwargs):
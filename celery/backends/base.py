@@ -16,6 +16,7 @@ from celery.datastructures import LRUCache
 from celery.exceptions import TimeoutError, TaskRevokedError
 from celery.result import from_serializable
 from celery.utils import timeutils
+from celery.utils.log import get_logger
 from celery.utils.serialization import (
         get_pickled_exception,
         get_pickleable_exception,
@@ -25,6 +26,8 @@ from celery.utils.serialization import (
 EXCEPTION_ABLE_CODECS = frozenset(["pickle", "yaml"])
 is_py3k = sys.version_info >= (3, 0)
 
+logger = get_logger(__name__)
+
 
 def unpickle_backend(cls, args, kwargs):
     """Returns an unpickled backend."""
@@ -47,6 +50,14 @@ class BaseBackend(object):
     #: If true the backend must implement :meth:`get_many`.
     supports_native_join = False
 
+    #: If true the state of a task can be read without removing it
+    #: from the backend (see :meth:`get_task_meta`).
+    supports_peek = False
+
+    #: Name of the queue the worker should send results to,
+    #: for backends sending the results directly to the client.
+    reply_to = None
+
     def __init__(self, *args, **kwargs):
         from celery.app import app_or_default
         self.app = app_or_default(kwargs.get("app"))
@@ -81,33 +92,42 @@ class BaseBackend(object):
         else:
             return self.prepare_value(result)
 
-    def store_result(self, task_id, result, status, traceback=None):
-        """Store the result and status of a task."""
+    def store_result(self, task_id, result, status, traceback=None,
+            request=None):
+        """Store the result and status of a task.
+
+        `request` is the request of the task (if available),
+        which some backends use to find where to send the result.
+
+        """
         raise NotImplementedError(
                 "store_result is not supported by this backend.")
 
-    def mark_as_started(self, task_id, **meta):
+    def mark_as_started(self, task_id, request=None, **meta):
         """Mark a task as started"""
-        return self.store_result(task_id, meta, status=states.STARTED)
+        return self.store_result(task_id, meta, status=states.STARTED,
+                                 request=request)
 
-    def mark_as_done(self, task_id, result):
+    def mark_as_done(self, task_id, result, request=None):
         """Mark task as successfully executed."""
-        return self.store_result(task_id, result, status=states.SUCCESS)
+        return self.store_result(task_id, result, status=states.SUCCESS,
+                                 request=request)
 
-    def mark_as_failure(self, task_id, exc, traceback=None):
+    def mark_as_failure(self, task_id, exc, traceback=None, request=None):
         """Mark task as executed with failure. Stores the execption."""
         return self.store_result(task_id, exc, status=states.FAILURE,
-                                 traceback=traceback)
+                                 traceback=traceback, request=request)
 
-    def mark_as_retry(self, task_id, exc, traceback=None):
+    def mark_as_retry(self, task_id, exc, traceback=None, request=None):
         """Mark task as being retries. Stores the current
         exception (if any)."""
         return self.store_result(task_id, exc, status=states.RETRY,
-                                 traceback=traceback)
+                                 traceback=traceback, request=request)
 
-    def mark_as_revoked(self, task_id):
+    def mark_as_revoked(self, task_id, request=None):
         return self.store_result(task_id, TaskRevokedError(),
-                                 status=states.REVOKED, traceback=None)
+                                 status=states.REVOKED, traceback=None,
+                                 request=request)
 
     def prepare_exception(self, exc):
         """Prepare exception for serialization."""
@@ -231,12 +251,19 @@ class BaseBackend(object):
 
 class BaseDictBackend(BaseBackend):
 
+    #: Maximum time in seconds to wait between polling the backend
+    #: in :meth:`get_many`.
+    max_poll_interval = 5.0
+
+    supports_peek = True
+
     def __init__(self, *args, **kwargs):
         super(BaseDictBackend, self).__init__(*args, **kwargs)
         self._cache = LRUCache(limit=kwargs.get("max_cached_results") or
                                  self.app.conf.CELERY_MAX_CACHED_RESULTS)
 
-    def store_result(self, task_id, result, status, traceback=None, **kwargs):
+    def store_result(self, task_id, result, status, traceback=None,
+            request=None, **kwargs):
         """Store task result and status."""
         result = self.encode_result(result, status)
         return self._store_result(task_id, result, status, traceback, **kwargs)
@@ -287,6 +314,65 @@ class BaseDictBackend(BaseBackend):
     def reload_task_result(self, task_id):
         self._cache[task_id] = self.get_task_meta(task_id, cache=False)
 
+    def get_many(self, task_ids, timeout=None, interval=0.5,
+            max_interval=None):
+        """Get results for many tasks, yielding ``(task_id, meta)``
+        tuples in the order the tasks complete.
+
+        The backend is polled using :meth:`_get_many_meta`, waiting
+        `interval` seconds between rounds.  The interval is doubled every
+        time a round did not return any new results, up to `max_interval`
+        (:attr:`max_poll_interval` by default), and reset as soon
+        as new results are available.
+
+        :raises celery.exceptions.TimeoutError: if `timeout` is not
+            :const:`None` and not all of the results are ready
+            within `timeout` seconds.
+
+        """
+        interval = 0.5 if interval is None else interval
+        if max_interval is None:
+            max_interval = self.max_poll_interval
+        max_interval = max(interval, max_interval)
+        ids = set(task_ids)
+        cached_ids = set()
+        for task_id in ids:
+            try:
+                cached = self._cache[task_id]
+            except KeyError:
+                pass
+            else:
+                if cached["status"] in states.READY_STATES:
+                    yield bytes_to_str(task_id), cached
+                    cached_ids.add(task_id)
+
+        ids.difference_update(cached_ids)
+        time_start = time.time()
+        wait = interval
+        while ids:
+            r = self._get_many_meta(list(ids))
+            ready = dict((key, meta) for key, meta in r.iteritems()
+                            if meta["status"] in states.READY_STATES)
+            self._cache.update(ready)
+            ids.difference_update(map(bytes_to_str, ready))
+            for key, value in ready.iteritems():
+                yield bytes_to_str(key), value
+            if not ids:
+                break
+            if timeout is not None:
+                remaining = timeout - (time.time() - time_start)
+                if remaining <= 0:
+                    raise TimeoutError(
+                            "Operation timed out (%s)" % (timeout, ))
+            # back off while there are no new results.
+            wait = interval if ready else min(wait * 2, max_interval)
+            time.sleep(wait if timeout is None else min(wait, remaining))
+
+    def _get_many_meta(self, task_ids):
+        """Returns a mapping of task id to task metadata for the
+        tasks in `task_ids` that the backend has any information about."""
+        raise NotImplementedError("Does not support get_many")
+
     def reload_taskset_result(self, taskset_id):
         self._cache[taskset_id] = self.get_taskset_meta(taskset_id,
                                                         cache=False)
@@ -322,6 +408,7 @@ class KeyValueStoreBackend(BaseDictBackend):
     task_keyprefix = ensure_bytes("celery-task-meta-")
     taskset_keyprefix = ensure_bytes("celery-taskset-meta-")
     chord_keyprefix = ensure_bytes("chord-unlock-")
+    chord_size_keyprefix = ensure_bytes("chord-size-")
     implements_incr = False
 
     def get(self, key):
@@ -354,6 +441,11 @@ class KeyValueStoreBackend(BaseDictBackend):
         """Get the cache key for the chord waiting on taskset with given id."""
         return self.chord_keyprefix + ensure_bytes(taskset_id)
 
+    def get_key_for_chord_size(self, taskset_id):
+        """Get the cache key for the number of tasks in the chord waiting
+        on taskset with given id."""
+        return self.chord_size_keyprefix + ensure_bytes(taskset_id)
+
     def _strip_prefix(self, key):
         """Takes bytes, emits string."""
         for prefix in self.task_keyprefix, self.taskset_keyprefix:
@@ -373,33 +465,10 @@ class KeyValueStoreBackend(BaseDictBackend):
                             for i, value in enumerate(values)
                                 if value is not None)
 
-    def get_many(self, task_ids, timeout=None, interval=0.5):
-        ids = set(task_ids)
-        cached_ids = set()
-        for task_id in ids:
-            try:
-                cached = self._cache[task_id]
-            except KeyError:
-                pass
-            else:
-                if cached["status"] in states.READY_STATES:
-                    yield bytes_to_str(task_id), cached
-                    cached_ids.add(task_id)
-
-        ids ^= cached_ids
-        iterations = 0
-        while ids:
-            keys = list(ids)
-            r = self._mget_to_results(self.mget([self.get_key_for_task(k)
-                                                    for k in keys]), keys)
-            self._cache.update(r)
-            ids ^= set(map(bytes_to_str, r))
-            for key, value in r.iteritems():
-                yield bytes_to_str(key), value
-            if timeout and iterations * interval >= timeout:
-                raise TimeoutError("Operation timed out (%s)" % (timeout, ))
-            time.sleep(interval)  # don't busy loop.
-            iterations += 0
+    def _get_many_meta(self, task_ids):
+        return self._mget_to_results(self.mget([self.get_key_for_task(k)
+                                                    for k in task_ids]),
+                                     task_ids)
 
     def _forget(self, task_id):
         self.delete(self.get_key_for_task(task_id))
@@ -427,7 +496,10 @@ class KeyValueStoreBackend(BaseDictBackend):
 
     def _restore_taskset(self, taskset_id):
         """Get task metadata for a task by id."""
-        meta = self.get(self.get_key_for_taskset(taskset_id))
+        return self._decode_taskset(
+                self.get(self.get_key_for_taskset(taskset_id)))
+
+    def _decode_taskset(self, meta):
         # previously this was always pickled, but later this
         # was extended to support other serializers, so the
         # structure is kind of weird.
@@ -440,27 +512,78 @@ class KeyValueStoreBackend(BaseDictBackend):
 
     def on_chord_apply(self, setid, body, result=None, **kwargs):
         if self.implements_incr:
-            self.app.TaskSetResult(setid, result).save()
+            self.app.TaskSetResult(setid, result).save(backend=self)
+            # the size is stored separately, so that the parts only have
+            # to read a number to know if the chord is complete.
+            self.set(self.get_key_for_chord_size(setid), str(len(result)))
+            self.set(self.get_key_for_chord(setid), "0")
         else:
             self.fallback_chord_unlock(setid, body, result, **kwargs)
 
     def on_chord_part_return(self, task, propagate=False):
         if not self.implements_incr:
             return
-        from celery import subtask
-        from celery.result import TaskSetResult
         setid = task.request.taskset
         if not setid:
             return
         key = self.get_key_for_chord(setid)
-        deps = TaskSetResult.restore(setid, backend=task.backend)
-        if self.incr(key) >= deps.total:
-            subtask(task.request.chord).delay(deps.join(propagate=propagate))
-            deps.delete()
-            self.client.delete(key)
+        count = self.incr(key)
+        if self._chord_complete(setid, count,
+                                self.get(self.get_key_for_chord_size(setid))):
+            self.unlock_chord(setid, task.request.chord, propagate)
         else:
             self.expire(key, 86400)
 
+    def _chord_complete(self, setid, count, size):
+        if size is None:  # chord applied by an earlier version.
+            deps = self.restore_taskset(setid, cache=False)
+            if deps is None:
+                logger.error("Chord %r: taskset not found, "
+                             "can't tell if the chord is complete", setid)
+                return False
+            size = deps.total
+        return int(count) >= int(size)
+
+    def unlock_chord(self, setid, callback, propagate=False):
+        """Apply the `callback` of a chord with the results of its parts.
+
+        The results are fetched using a single :meth:`mget`, or by
+        joining the taskset if some of them are not available yet.
+
+        """
+        deps = self.restore_taskset(setid, cache=False)
+        if deps is None:
+            logger.error("Chord %r: taskset not found, "
+                         "can't apply the callback", setid)
+        else:
+            self._unlock_chord(setid, deps, callback, propagate)
+        self.delete(self.get_key_for_chord(setid))
+        self.delete(self.get_key_for_chord_size(setid))
+
+    def _unlock_chord(self, setid, deps, callback, propagate=False):
+        from celery import subtask
+        ids = [id for id, _ in deps.serializable()[1]]
+        values = self._chord_values(ids, propagate)
+        if values is None:
+            values = deps.join(propagate=propagate)
+        subtask(callback).delay(values)
+        deps.delete(backend=self)
+
+    def _chord_values(self, ids, propagate=False):
+        metas = self._get_many_meta(ids)
+        values = []
+        for id in ids:
+            meta = metas.get(id)
+            if meta is None or meta["status"] not in states.READY_STATES:
+                return
+            result = meta["result"]
+            if meta["status"] in states.EXCEPTION_STATES:
+                result = self.exception_to_python(result)
+                if propagate and meta["status"] in states.PROPAGATE_STATES:
+                    raise result
+            values.append(result)
+        return values
+
 
 class DisabledBackend(BaseBackend):
     _cache = {}   # need this attribute to reset cache in tests.
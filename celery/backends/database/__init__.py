@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 
+from sqlalchemy.exc import IntegrityError
+
 from celery import states
 from celery.exceptions import ImproperlyConfigured
+from celery.utils.functional import chunks
 from celery.utils.timeutils import maybe_timedelta
 
 from celery.backends.base import BaseDictBackend
@@ -28,6 +31,12 @@ class DatabaseBackend(BaseDictBackend):
     # to not bombard the database with queries.
     subpolling_interval = 0.5
 
+    supports_native_join = True
+
+    #: Max number of task ids to look up in a single query
+    #: in :meth:`get_many` (SQLite allows at most 999 parameters).
+    max_ids_per_query = 900
+
     def __init__(self, dburi=None, expires=None,
             engine_options=None, **kwargs):
         super(DatabaseBackend, self).__init__(**kwargs)
@@ -38,6 +47,8 @@ class DatabaseBackend(BaseDictBackend):
                         **conf.CELERY_RESULT_ENGINE_OPTIONS or {})
         self.short_lived_sessions = kwargs.get("short_lived_sessions",
                                     conf.CELERY_RESULT_DB_SHORT_LIVED_SESSIONS)
+        self.pooled_sessions = kwargs.get("pooled_sessions",
+                                    conf.CELERY_RESULT_DB_POOLED_SESSIONS)
         if not self.dburi:
             raise ImproperlyConfigured(
                     "Missing connection string! Do you have "
@@ -47,25 +58,51 @@ class DatabaseBackend(BaseDictBackend):
         return ResultSession(
                     dburi=self.dburi,
                     short_lived_sessions=self.short_lived_sessions,
+                    pooled_sessions=self.pooled_sessions,
                     **self.engine_options)
 
     def _store_result(self, task_id, result, status, traceback=None):
         """Store return value and status of an executed task."""
         session = self.ResultSession()
         try:
-            task = session.query(Task).filter(Task.task_id == task_id).first()
-            if not task:
-                task = Task(task_id)
-                session.add(task)
-                session.flush()
-            task.result = result
-            task.status = status
-            task.traceback = traceback
+            self._upsert_task(session, task_id, {"result": result,
+                                                 "status": status,
+                                                 "traceback": traceback})
             session.commit()
         finally:
             session.close()
         return result
 
+    def _upsert_task(self, session, task_id, values):
+        table = Task.__table__
+        if session.bind.dialect.name == "sqlite":
+            session.execute(table.insert().prefix_with("OR REPLACE"),
+                            dict(values, task_id=task_id))
+            return
+        update = table.update().where(table.c.task_id == task_id)
+        if not session.execute(update, values).rowcount:
+            try:
+                session.execute(table.insert(),
+                                dict(values, task_id=task_id))
+            except IntegrityError:
+                # the task was stored by someone else since the update.
+                session.rollback()
+                session.execute(update, values)
+
+    def _get_many_meta(self, task_ids):
+        """Get task metadata for many tasks, using one query
+        for every :attr:`max_ids_per_query` task ids."""
+        session = self.ResultSession()
+        try:
+            metas = {}
+            for ids in chunks(iter(task_ids), self.max_ids_per_query):
+                for task in session.query(Task).filter(
+                        Task.task_id.in_(ids)):
+                    metas[task.task_id] = task.to_dict()
+            return metas
+        finally:
+            session.close()
+
     def _get_task_meta_for(self, task_id):
         """Get task metadata for a task by id."""
         session = self.ResultSession()
@@ -140,5 +177,6 @@ class DatabaseBackend(BaseDictBackend):
         kwargs.update(
             dict(dburi=self.dburi,
                  expires=self.expires,
-                 engine_options=self.engine_options))
+                 engine_options=self.engine_options,
+                 pooled_sessions=self.pooled_sessions))
         return super(DatabaseBackend, self).__reduce__(args, kwargs)
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 
+import os
+
 from collections import defaultdict
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 ResultModelBase = declarative_base()
@@ -12,6 +14,7 @@ ResultModelBase = declarative_base()
 _SETUP = defaultdict(lambda: False)
 _ENGINES = {}
 _SESSIONS = {}
+_POOLED_SESSIONS = {}
 
 
 def get_engine(dburi, **kwargs):
@@ -27,13 +30,28 @@ def create_session(dburi, short_lived_sessions=False, **kwargs):
     return engine, _SESSIONS[dburi]
 
 
+def create_pooled_session(dburi, **kwargs):
+    # engines and connection pools must not be shared with
+    # a parent process, so these are kept for every process.
+    key = (os.getpid(), dburi)
+    if key not in _POOLED_SESSIONS:
+        engine = create_engine(dburi, **kwargs)
+        _POOLED_SESSIONS[key] = engine, scoped_session(
+                                    sessionmaker(bind=engine))
+    return _POOLED_SESSIONS[key]
+
+
 def setup_results(engine):
     if not _SETUP["results"]:
         ResultModelBase.metadata.create_all(engine)
         _SETUP["results"] = True
 
 
-def ResultSession(dburi, **kwargs):
-    engine, session = create_session(dburi, **kwargs)
+def ResultSession(dburi, pooled_sessions=False, **kwargs):
+    if pooled_sessions:
+        kwargs.pop("short_lived_sessions", None)
+        engine, session = create_pooled_session(dburi, **kwargs)
+    else:
+        engine, session = create_session(dburi, **kwargs)
     setup_results(engine)
     return session()
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
+from __future__ import with_statement
 
+import threading
+
+from billiard.util import Finalize, register_after_fork
 from kombu.utils.url import _parse_url
 
 from celery.exceptions import ImproperlyConfigured
@@ -37,11 +41,23 @@ class RedisBackend(KeyValueStoreBackend):
     #: Maximium number of connections in the pool.
     max_connections = None
 
+    #: If enabled task results are buffered and written
+    #: in batches, see :meth:`flush`.
+    write_behind = False
+
+    #: Max number of buffered results before the buffer is flushed.
+    write_behind_batch = 100
+
+    #: Max time in seconds a result is buffered before it is written.
+    write_behind_interval = 0.5
+
     supports_native_join = True
     implements_incr = True
 
     def __init__(self, host=None, port=None, db=None, password=None,
-            expires=None, max_connections=None, url=None, **kwargs):
+            expires=None, max_connections=None, url=None,
+            write_behind=None, write_behind_batch=None,
+            write_behind_interval=None, **kwargs):
         super(RedisBackend, self).__init__(**kwargs)
         conf = self.app.conf
         if self.redis is None:
@@ -70,20 +86,105 @@ class RedisBackend(KeyValueStoreBackend):
         self.max_connections = (max_connections
                                 or _get("MAX_CONNECTIONS")
                                 or self.max_connections)
+        self.write_behind = (write_behind if write_behind is not None
+                             else _get("WRITE_BEHIND") or self.write_behind)
+        self.write_behind_batch = (write_behind_batch
+                                   or _get("WRITE_BEHIND_BATCH")
+                                   or self.write_behind_batch)
+        self.write_behind_interval = (write_behind_interval
+                                      or _get("WRITE_BEHIND_INTERVAL")
+                                      or self.write_behind_interval)
+        self._reset_pending()
+        if self.write_behind:
+            self._flush_at_exit()
+            # pool processes exit through os._exit, and only run the
+            # finalizers registered after they were forked.
+            register_after_fork(self, RedisBackend._after_fork)
+
+    def _reset_pending(self):
+        self._pending = []
+        self._pending_keys = set()
+        self._pending_mutex = threading.Lock()
+        self._flush_timer = None
+
+    def _after_fork(self):
+        # the results buffered by the parent are written by the parent,
+        # and its flush timer thread and mutex are not usable in the child.
+        self._reset_pending()
+        self._flush_at_exit()
+
+    def _flush_at_exit(self):
+        Finalize(None, self.flush, exitpriority=10)
 
     def get(self, key):
+        if key in self._pending_keys:
+            self.flush()
         return self.client.get(key)
 
     def mget(self, keys):
+        if self._pending_keys:
+            self.flush()
         return self.client.mget(keys)
 
     def set(self, key, value):
-        client = self.client
-        if self.expires is not None:
-            client.setex(key, value, self.expires)
-        else:
-            client.set(key, value)
-        client.publish(key, value)
+        if self.write_behind and key.startswith(self.task_keyprefix):
+            return self._buffer(key, value)
+        self._write(self.client.pipeline(transaction=False),
+                    [(key, value)]).execute()
+
+    def _write(self, pipe, items):
+        expires = self.expires
+        for key, value in items:
+            if expires is not None:
+                pipe.setex(key, value, expires)
+            else:
+                pipe.set(key, value)
+            pipe.publish(key, value)
+        return pipe
+
+    def _buffer(self, key, value):
+        with self._pending_mutex:
+            self._pending.append((key, value))
+            self._pending_keys.add(key)
+            size = len(self._pending)
+            if size < self.write_behind_batch and self._flush_timer is None:
+                # make sure the results are written even if no more
+                # results arrive within the interval.
+                timer = self._flush_timer = threading.Timer(
+                        self.write_behind_interval, self.flush)
+                timer.setDaemon(True)
+                timer.start()
+        if size >= self.write_behind_batch:
+            self.flush()
+
+    def flush(self):
+        """Write any buffered results to the server, using a single
+        pipeline.
+
+        This is called automatically when the buffer is full, or when
+        :attr:`write_behind_interval` has passed since a result was
+        buffered, but tasks that need the results to be readable
+        right away can call it directly.
+
+        If the results can't be written they are kept in the buffer,
+        to be written by the next flush.
+
+        """
+        with self._pending_mutex:
+            pending, self._pending = self._pending, []
+            self._pending_keys.clear()
+            timer, self._flush_timer = self._flush_timer, None
+        if timer is not None:
+            timer.cancel()
+        if pending:
+            try:
+                self._write(self.client.pipeline(transaction=False),
+                            pending).execute()
+            except Exception:
+                with self._pending_mutex:
+                    self._pending[:0] = pending
+                    self._pending_keys.update(key for key, _ in pending)
+                raise
 
     def delete(self, key):
         self.client.delete(key)
@@ -94,6 +195,22 @@ class RedisBackend(KeyValueStoreBackend):
     def expire(self, key, value):
         return self.client.expire(key, value)
 
+    def on_chord_part_return(self, task, propagate=False):
+        setid = task.request.taskset
+        if not setid:
+            return
+        # the other parts must be able to see our result
+        # when the counter is complete.
+        self.flush()
+        key = self.get_key_for_chord(setid)
+        count, _, size = self.client.pipeline() \
+                                    .incr(key) \
+                                    .expire(key, 86400) \
+                                    .get(self.get_key_for_chord_size(setid)) \
+                                    .execute()
+        if self._chord_complete(setid, count, size):
+            self.unlock_chord(setid, task.request.chord, propagate)
+
     @cached_property
     def client(self):
         pool = self.redis.ConnectionPool(host=self.host, port=self.port,
@@ -108,5 +225,8 @@ class RedisBackend(KeyValueStoreBackend):
                  db=self.db,
                  password=self.password,
                  expires=self.expires,
-                 max_connections=self.max_connections))
+                 max_connections=self.max_connections,
+                 write_behind=self.write_behind,
+                 write_behind_batch=self.write_behind_batch,
+                 write_behind_interval=self.write_behind_interval))
         return super(RedisBackend, self).__reduce__(args, kwargs)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+    celery.backends.rpc
+    ~~~~~~~~~~~~~~~~~~~
+
+    AMQP result backend sending all results for a client
+    to a single reply queue.
+
+    The :class:`~celery.backends.amqp.AMQPBackend` creates a queue
+    for every task, so waiting for many results means declaring and
+    consuming from as many queues.  With this backend every client
+    process has a single reply queue, that is sent with the task
+    message in the ``reply_to`` field.  The worker sends the result
+    to this queue, and the ``task_id`` of the result is used to find
+    the task it belongs to (the correlation id).
+
+    Results received while waiting for other tasks are kept
+    in a local dictionary until they are asked for (or forgotten),
+    as the messages have already been acknowledged.  Only the results
+    that have been asked for are moved to the result cache, which keeps
+    at most :setting:`CELERY_MAX_CACHED_RESULTS` results.
+
+    :copyright: (c) 2009 - 2012 by Ask Solem.
+    :license: BSD, see LICENSE for more details.
+
+"""
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import os
+import socket
+import time
+
+from kombu.common import maybe_declare
+
+from celery import states
+from celery.utils import uuid
+from celery.utils.log import get_logger
+
+from .amqp import AMQPBackend
+
+logger = get_logger(__name__)
+
+
+class RPCBackend(AMQPBackend):
+    """Sends results to a reply queue owned by the client."""
+
+    #: Max time in seconds to block waiting for a result, before
+    #: checking for results received by other threads.
+    drain_interval = 1.0
+
+    _oid = None
+    _oid_pid = None
+
+    def __init__(self, *args, **kwargs):
+        super(RPCBackend, self).__init__(*args, **kwargs)
+        #: Results received, by task id, that has not been
+        #: asked for yet.
+        self._replies = {}
+
+    @property
+    def oid(self):
+        """Unique id of this process, used as the name of its
+        reply queue (a new id is created after fork)."""
+        pid = os.getpid()
+        if self._oid is None or self._oid_pid != pid:
+            self._oid, self._oid_pid = uuid(), pid
+            self._replies.clear()
+        return self._oid
+
+    @property
+    def reply_to(self):
+        return self.oid
+
+    def _reply_binding(self, name):
+        return self.Queue(name=name,
+                          exchange=self.exchange,
+                          routing_key=name,
+                          durable=False,
+                          auto_delete=False,
+                          queue_arguments=self.queue_arguments)
+
+    def _publish_result(self, connection, task_id, meta, reply_to=None):
+        if reply_to is None:
+            return super(RPCBackend, self)._publish_result(connection,
+                                                           task_id, meta)
+        # the queue is declared by the worker as well, so that the result
+        # is kept even if the client hasn't started consuming yet.
+        channel = connection.default_channel
+        maybe_declare(self._reply_binding(reply_to), channel)
+        self.Producer(channel, exchange=self.exchange,
+                      routing_key=reply_to,
+                      serializer=self.serializer).publish(meta)
+
+    def store_result(self, task_id, result, status, traceback=None,
+            request=None, **kwargs):
+        reply_to = getattr(request, "reply_to", None)
+        if reply_to:
+            kwargs["reply_to"] = reply_to
+        return super(RPCBackend, self).store_result(task_id, result, status,
+                                                    traceback, **kwargs)
+
+    def _store_result(self, task_id, result, status, traceback=None,
+            reply_to=None, max_retries=20, interval_start=0,
+            interval_step=1, interval_max=1):
+        """Send task return value and status."""
+        with self.mutex:
+            with self.app.pool.acquire(block=True) as conn:
+
+                def errback(error, delay):
+                    logger.warn("Couldn't send result for %r: %r. "
+                                "Retry in %rs.", task_id, error, delay)
+
+                send = conn.ensure(self, self._publish_result,
+                            max_retries=max_retries,
+                            errback=errback,
+                            interval_start=interval_start,
+                            interval_step=interval_step,
+                            interval_max=interval_max)
+                send(conn, task_id, {"task_id": task_id, "status": status,
+                                "result": self.encode_result(result, status),
+                                "traceback": traceback}, reply_to)
+        return result
+
+    def on_reply(self, meta):
+        """Store a result received in the reply queue."""
+        self._replies[meta["task_id"]] = meta
+
+    def _get_reply(self, task_id, ready=True):
+        # Returns the latest state received for task_id, or
+        # :const:`None`.  Ready results are removed from the replies,
+        # as they are kept in the result cache from then on.
+        meta = self._replies.get(task_id)
+        if meta is None:
+            meta = self._cache.get(task_id)
+        elif meta["status"] in states.READY_STATES:
+            self._replies.pop(task_id, None)
+            self._cache[task_id] = meta
+        if meta is not None and ready and \
+                meta["status"] not in states.READY_STATES:
+            return None
+        return meta
+
+    def _forget(self, task_id):
+        self._replies.pop(task_id, None)
+
+    def poll(self, task_id, backlog_limit=None):
+        self.oid  # reset replies after fork.
+        with self.app.pool.acquire_channel(block=True) as (_, channel):
+            binding = self._reply_binding(self.oid)(channel)
+            maybe_declare(binding, channel)
+            while 1:  # fetch everything available.
+                message = binding.get(no_ack=True)
+                if not message:
+                    break
+                self.on_reply(message.payload)
+        meta = self._get_reply(task_id, ready=False)
+        if meta is None:
+            return {"status": states.PENDING, "result": None}
+        return meta
+
+    def drain_events(self, connection, consumer, timeout=None,
+            now=time.time):
+        """Wait for results and add them to the replies.
+
+        Returns after the first result was received, or after
+        :attr:`drain_interval` seconds, which ever comes first.
+
+        """
+        wait = connection.drain_events
+        received = []
+
+        def callback(meta, message):
+            self.on_reply(meta)
+            received.append(meta["task_id"])
+
+        consumer.callbacks[:] = [callback]
+        interval = self.drain_interval
+        if timeout is not None:
+            interval = min(interval, timeout)
+        try:
+            wait(timeout=interval)
+        except socket.timeout:
+            pass
+        return received
+
+    def _wait_for_replies(self, task_ids, timeout=None, now=time.time):
+        self.oid  # reset replies after fork.
+        pending = set(task_ids)
+        time_start = now()
+        check = list(pending)
+        with self.app.pool.acquire_channel(block=True) as (conn, channel):
+            binding = self._reply_binding(self.oid)
+            maybe_declare(binding(channel), channel)
+            with self._create_consumer(binding, channel) as consumer:
+                while 1:
+                    for task_id in check:
+                        if task_id in pending:
+                            meta = self._get_reply(task_id)
+                            if meta is not None:
+                                pending.discard(task_id)
+                                yield task_id, meta
+                    if not pending:
+                        break
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (now() - time_start)
+                        if remaining <= 0:
+                            raise socket.timeout()
+                    # only check the results received, unless nothing was
+                    # received, as another thread may have received them.
+                    check = (self.drain_events(conn, consumer, remaining)
+                                or list(pending))
+
+    def consume(self, task_id, timeout=None):
+        for _, meta in self._wait_for_replies([task_id], timeout):
+            return meta
+
+    def get_many(self, task_ids, timeout=None, **kwargs):
+        return self._wait_for_replies(task_ids, timeout)
@@ -12,13 +12,17 @@
 from __future__ import absolute_import
 
 import errno
+import heapq
 import os
 import time
 import shelve
+import sqlite3
 import sys
 import threading
 import traceback
 
+from itertools import count
+
 from billiard import Process
 from kombu.utils import reprcall
 from kombu.utils.functional import maybe_promise
@@ -30,7 +34,8 @@ from . import current_app
 from .app import app_or_default
 from .schedules import maybe_schedule, crontab
 from .utils import cached_property
-from .utils.imports import instantiate
+from .utils.imports import instantiate, symbol_by_name
+from .utils.serialization import pickle
 from .utils.timeutils import humanize_seconds
 from .utils.log import get_logger
 
@@ -129,6 +134,13 @@ class ScheduleEntry(object):
 class Scheduler(object):
     """Scheduler for periodic tasks.
 
+    The entries are kept in a heap ordered by the time they
+    should be checked next, so a tick only checks the entries
+    that may be due.  Entries must be added using :meth:`add` or
+    :meth:`update_from_dict` for the heap to be updated, but the heap
+    is rebuilt if the schedule is replaced, or if the number of entries
+    in the schedule changes.
+
     :keyword schedule: see :attr:`schedule`.
     :keyword max_interval: see :attr:`max_interval`.
 
@@ -147,6 +159,10 @@ class Scheduler(object):
 
     _last_sync = None
 
+    #: Heap of ``(check_at, n, name, entry)`` tuples, or :const:`None`
+    #: if the heap must be rebuilt.
+    _heap = None
+
     logger = logger  # compat
 
     def __init__(self, schedule=None, max_interval=None,
@@ -187,19 +203,55 @@ class Scheduler(object):
     def tick(self):
         """Run a tick, that is one iteration of the scheduler.
 
-        Executes all due tasks.
+        Executes all due tasks, and returns the number of seconds
+        until the next entry should be checked.
 
         """
-        remaining_times = []
-        try:
-            for entry in self.schedule.itervalues():
-                next_time_to_run = self.maybe_due(entry, self.publisher)
-                if next_time_to_run:
-                    remaining_times.append(next_time_to_run)
-        except RuntimeError:
-            pass
+        schedule = self.schedule
+        if self._heap is None or schedule is not self._heap_schedule or \
+                len(schedule) != len(self._check_at):
+            self.populate_heap()
+        heap, check_at = self._heap, self._check_at
+        pop, max_interval = heapq.heappop, self.max_interval
+        now = time.time()
+
+        while heap:
+            when, _, name, entry = heap[0]
+            current = schedule.get(name)
+            if current is None or check_at.get(name) != when:
+                pop(heap)   # removed or rescheduled.
+                continue
+            if current is not entry:
+                # replaced in the schedule, so check the new entry now.
+                pop(heap)
+                self._schedule_check(name, current, now)
+                continue
+            if when > now:
+                return min(when - now, max_interval)
+            pop(heap)
+            next_time_to_run = self.maybe_due(entry, self.publisher)
+            self._schedule_check(name, schedule[name],
+                                 now + (next_time_to_run or max_interval))
+        return max_interval
+
+    def populate_heap(self):
+        """Rebuild the heap from the current schedule.
+
+        All entries will be checked at the next tick.
 
-        return min(remaining_times + [self.max_interval])
+        """
+        schedule = self._heap_schedule = self.schedule
+        self._heap_count = count()
+        # all entries are checked at once, so the list is already a heap.
+        self._heap = [(0, self._heap_count.next(), name, entry)
+                            for name, entry in schedule.items()]
+        self._check_at = dict.fromkeys(schedule.keys(), 0)
+
+    def _schedule_check(self, name, entry, when):
+        if self._heap is not None:
+            self._check_at[name] = when
+            heapq.heappush(self._heap,
+                           (when, self._heap_count.next(), name, entry))
 
     def should_sync(self):
         return (not self._last_sync or
@@ -207,6 +259,7 @@ class Scheduler(object):
 
     def reserve(self, entry):
         new_entry = self.schedule[entry.name] = entry.next()
+        self._schedule_check(entry.name, new_entry, 0)
         return new_entry
 
     def apply_async(self, entry, publisher=None, **kwargs):
@@ -256,6 +309,7 @@ class Scheduler(object):
     def add(self, **kwargs):
         entry = self.Entry(**kwargs)
         self.schedule[entry.name] = entry
+        self._schedule_check(entry.name, entry, 0)
         return entry
 
     def _maybe_entry(self, name, entry):
@@ -264,8 +318,11 @@ class Scheduler(object):
         return self.Entry(**dict(entry, name=name))
 
     def update_from_dict(self, dict_):
-        self.schedule.update(dict((name, self._maybe_entry(name, entry))
-                                for name, entry in dict_.items()))
+        entries = dict((name, self._maybe_entry(name, entry))
+                            for name, entry in dict_.items())
+        self.schedule.update(entries)
+        for name, entry in entries.iteritems():
+            self._schedule_check(name, entry, 0)
 
     def merge_inplace(self, b):
         schedule = self.schedule
@@ -283,11 +340,15 @@ class Scheduler(object):
             else:
                 schedule[key] = entry
 
+        # entries may have a new schedule, so check all of them.
+        self._heap = None
+
     def get_schedule(self):
         return self.data
 
     def set_schedule(self, schedule):
         self.data = schedule
+        self._heap = None
 
     def _ensure_connected(self):
         # callback called for each retry while the connection
@@ -316,51 +377,244 @@ class Scheduler(object):
         return ""
 
 
+class ScheduleStore(object):
+    """Base class for the stores :class:`PersistentScheduler` keeps the
+    schedule in.
+
+    :param filename: Path to the file the schedule is stored in.
+
+    """
+
+    #: Suffixes of the files used by the store.
+    suffixes = ("", )
+
+    #: Number of times the store has been synced.
+    sync_count = 0
+
+    #: Total time spent syncing the store, in seconds.
+    sync_time = 0.0
+
+    #: Time the last sync took, in seconds.
+    last_sync_time = None
+
+    #: Number of entries written by the last sync.
+    last_sync_written = 0
+
+    def __init__(self, filename, **kwargs):
+        self.filename = filename
+
+    def open(self):
+        """Open the store, returning the mapping of entries in it."""
+        raise NotImplementedError("Stores must implement open")
+
+    def write(self, entries):
+        """Write the entries to the store, returning the number
+        of entries written."""
+        raise NotImplementedError("Stores must implement write")
+
+    def close(self):
+        pass
+
+    def sync(self, entries):
+        time_start = time.time()
+        written = self.write(entries)
+        self.last_sync_time = time.time() - time_start
+        self.last_sync_written = written
+        self.sync_count += 1
+        self.sync_time += self.last_sync_time
+        debug("Celerybeat: Wrote %s schedule entries in %.4fs",
+              written, self.last_sync_time)
+        return written
+
+    def recover(self):
+        """Move the files of a store that can't be opened out of the way,
+        so that a new store can be created."""
+        for suffix in self.suffixes:
+            path = self.filename + suffix
+            try:
+                os.rename(path, path + ".corrupt")
+            except OSError, exc:
+                if exc.errno != errno.ENOENT:
+                    raise
+
+    @property
+    def stats(self):
+        return {"sync_count": self.sync_count,
+                "sync_time": self.sync_time,
+                "last_sync_time": self.last_sync_time,
+                "last_sync_written": self.last_sync_written}
+
+
+class ShelveStore(ScheduleStore):
+    """Keeps the schedule in a :mod:`shelve`.
+
+    All of the entries are written every time the store is synced.
+
+    """
+    persistence = shelve
+    suffixes = ("", ".db", ".dat", ".bak", ".dir")
+
+    db = None
+
+    def __init__(self, filename, persistence=None, **kwargs):
+        super(ShelveStore, self).__init__(filename, **kwargs)
+        self.persistence = persistence or self.persistence
+
+    def open(self):
+        db = self.db = self.persistence.open(self.filename, writeback=True)
+        if "__version__" not in db:
+            db.clear()   # remove schedule at 2.2.2 upgrade.
+        db["__version__"] = __version__
+        return db.setdefault("entries", {})
+
+    def write(self, entries):
+        self.db.sync()
+        return len(entries)
+
+    def close(self):
+        self.db.close()
+
+
+class ChangedEntries(dict):
+    """Mapping of schedule entries that remembers the names of the
+    entries changed or removed since :meth:`reset` was called."""
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.reset()
+
+    def reset(self):
+        self.changed, self.removed = set(), set()
+
+    def __setitem__(self, name, entry):
+        dict.__setitem__(self, name, entry)
+        self.changed.add(name)
+        self.removed.discard(name)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self.changed.discard(name)
+        self.removed.add(name)
+
+    def pop(self, name, *default):
+        if name in self:
+            self.changed.discard(name)
+            self.removed.add(name)
+        return dict.pop(self, name, *default)
+
+    def update(self, *args, **kwargs):
+        for name, entry in dict(*args, **kwargs).iteritems():
+            self[name] = entry
+
+    def clear(self):
+        self.removed.update(self)
+        self.changed.clear()
+        dict.clear(self)
+
+
+class SQLiteStore(ScheduleStore):
+    """Keeps the schedule in a SQLite database using a write-ahead log.
+
+    Every entry is stored in its own row, so syncing the store
+    only writes the entries that changed since the last sync, in a single
+    transaction.  The first sync after opening the store writes all
+    entries, as entries may have been updated in place by
+    :meth:`~Scheduler.merge_inplace`.
+
+    Entries that can't be loaded are logged and skipped, instead of
+    discarding the whole schedule.
+
+    """
+    suffixes = ("", "-wal", "-shm")
+    protocol = pickle.HIGHEST_PROTOCOL
+
+    conn = None
+    _synced = False
+
+    def open(self):
+        conn = self.conn = sqlite3.connect(self.filename,
+                                           isolation_level=None,
+                                           check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS celerybeat_schedule "
+                     "(name TEXT PRIMARY KEY, entry BLOB NOT NULL)")
+        entries = ChangedEntries()
+        for name, data in conn.execute(
+                "SELECT name, entry FROM celerybeat_schedule"):
+            try:
+                dict.__setitem__(entries, name, pickle.loads(str(data)))
+            except Exception, exc:
+                error("Celerybeat: Skipping schedule entry %r "
+                      "that can't be loaded: %r", name, exc, exc_info=True)
+        return entries
+
+    def write(self, entries):
+        changed = entries.changed if self._synced else entries.keys()
+        rows = [(name, sqlite3.Binary(pickle.dumps(entries[name],
+                                                   self.protocol)))
+                    for name in changed if name in entries]
+        removed = [(name, ) for name in entries.removed]
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO celerybeat_schedule "
+                             "(name, entry) VALUES (?, ?)", rows)
+            conn.executemany("DELETE FROM celerybeat_schedule "
+                             "WHERE name = ?", removed)
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        entries.reset()
+        self._synced = True
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
+
+
 class PersistentScheduler(Scheduler):
     persistence = shelve
 
+    #: The :class:`ScheduleStore` class to use, by default
+    #: the :setting:`CELERYBEAT_SCHEDULE_STORE` setting.
+    store_cls = None
+
     _store = None
 
     def __init__(self, *args, **kwargs):
         self.schedule_filename = kwargs.get("schedule_filename")
+        self.store_cls = kwargs.get("store_cls") or self.store_cls
         Scheduler.__init__(self, *args, **kwargs)
 
-    def _remove_db(self):
-        for suffix in "", ".db", ".dat", ".bak", ".dir":
-            try:
-                os.remove(self.schedule_filename + suffix)
-            except OSError, exc:
-                if exc.errno != errno.ENOENT:
-                    raise
+    def create_store(self):
+        store_cls = symbol_by_name(self.store_cls or
+                                   self.app.conf.CELERYBEAT_SCHEDULE_STORE)
+        return store_cls(self.schedule_filename,
+                         persistence=self.persistence)
 
     def setup_schedule(self):
+        store = self._store = self.create_store()
         try:
-            self._store = self.persistence.open(self.schedule_filename,
-                                                writeback=True)
-            entries = self._store.setdefault("entries", {})
+            self._entries = store.open()
         except Exception, exc:
-            error("Removing corrupted schedule file %r: %r",
+            error("Moving corrupted schedule file %r out of the way: %r",
                   self.schedule_filename, exc, exc_info=True)
-            self._remove_db()
-            self._store = self.persistence.open(self.schedule_filename,
-                                                writeback=True)
-        else:
-            if "__version__" not in self._store:
-                self._store.clear()   # remove schedule at 2.2.2 upgrade.
-        entries = self._store.setdefault("entries", {})
+            store.recover()
+            self._entries = store.open()
         self.merge_inplace(self.app.conf.CELERYBEAT_SCHEDULE)
         self.install_default_entries(self.schedule)
-        self._store["__version__"] = __version__
         self.sync()
         debug("Current schedule:\n" + "\n".join(repr(entry)
-                                    for entry in entries.itervalues()))
+                                    for entry in self._entries.itervalues()))
 
     def get_schedule(self):
-        return self._store["entries"]
+        return self._entries
 
     def sync(self):
         if self._store is not None:
-            self._store.sync()
+            self._store.sync(self._entries)
 
     def close(self):
         self.sync()
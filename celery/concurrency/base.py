@@ -43,12 +43,17 @@ class BasePool(object):
     #: set to true if pool uses greenlets.
     is_green = False
 
+    #: Max number of tasks sent to the pool as a single job,
+    #: see :class:`celery.worker.job.RequestBatch`.
+    batch_size = 1
+
     _state = None
     _pool = None
 
-    def __init__(self, limit=None, putlocks=True, **options):
+    def __init__(self, limit=None, putlocks=True, batch_size=1, **options):
         self.limit = limit
         self.putlocks = putlocks
+        self.batch_size = batch_size or 1
         self.options = options
         self._does_debug = logger.isEnabledFor(logging.DEBUG)
 
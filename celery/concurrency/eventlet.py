@@ -66,6 +66,9 @@ class Schedule(timer2.Schedule):
     def queue(self):
         return [(g.eta, g.priority, g.entry) for g in self._queue]
 
+    def _events(self):
+        return self.queue
+
 
 class Timer(timer2.Timer):
     Schedule = Schedule
@@ -10,8 +10,11 @@ from celery import platforms
 from celery import signals
 from celery.app import app_or_default
 from celery.concurrency.base import BasePool
+from celery.worker.job import install_context
 from billiard.pool import Pool, RUN
 
+from .arena import Arena, apply_shared
+
 if platform.system() == "Windows":  # pragma: no cover
     # On Windows os.kill calls TerminateProcess which cannot be
     # handled by # any process, so this is needed to terminate the task
@@ -31,8 +34,13 @@ WORKER_SIGRESET = frozenset(["SIGTERM",
 WORKER_SIGIGNORE = frozenset(["SIGINT"])
 
 
-def process_initializer(app, hostname):
-    """Initializes the process so it can be used to process tasks."""
+def process_initializer(app, hostname, context=None):
+    """Initializes the process so it can be used to process tasks.
+
+    :keyword context: Arguments to
+        :func:`celery.worker.job.install_context`.
+
+    """
     app = app_or_default(app)
     app.set_current()
     platforms.signals.reset(*WORKER_SIGRESET)
@@ -47,15 +55,26 @@ def process_initializer(app, hostname):
                   str(os.environ.get("CELERY_LOG_REDIRECT_LEVEL")))
     app.loader.init_worker()
     app.loader.init_worker_process()
+    if context is not None:
+        install_context(**context)
     signals.worker_process_init.send(sender=None)
 
 
 class TaskPool(BasePool):
     """Multiprocessing Pool implementation."""
     Pool = Pool
+    Arena = Arena
 
     requires_mediator = True
 
+    #: The :class:`~celery.concurrency.processes.arena.Arena` used to
+    #: pass large arguments, or :const:`None` if disabled.
+    arena = None
+
+    def __init__(self, *args, **kwargs):
+        self.shm_threshold = kwargs.pop("shm_threshold", None)
+        super(TaskPool, self).__init__(*args, **kwargs)
+
     def on_start(self):
         """Run the task pool.
 
@@ -66,6 +85,39 @@ class TaskPool(BasePool):
                                initializer=process_initializer,
                                **self.options)
         self.on_apply = self._pool.apply_async
+        if self.shm_threshold:
+            self.arena = self.Arena(self.shm_threshold)
+            self.on_apply = self.apply_shared
+
+    def apply_shared(self, target, args=(), kwargs={}, callback=None,
+            error_callback=None, **options):
+        """Apply job, passing large arguments using shared memory."""
+        arena = self.arena
+        if not arena.should_share(args, kwargs):
+            return self._pool.apply_async(target, args, kwargs,
+                                          callback=callback,
+                                          error_callback=error_callback,
+                                          **options)
+        path = arena.put((target, args, kwargs))
+
+        def on_success(ret_value):
+            arena.free(path)
+            if callback:
+                callback(ret_value)
+
+        def on_failure(exc_info):
+            arena.free(path)
+            if error_callback:
+                error_callback(exc_info)
+
+        try:
+            return self._pool.apply_async(apply_shared, (path, ),
+                                          callback=on_success,
+                                          error_callback=on_failure,
+                                          **options)
+        except BaseException:
+            arena.free(path)
+            raise
 
     def on_stop(self):
         """Gracefully stop the pool."""
@@ -73,12 +125,19 @@ class TaskPool(BasePool):
             self._pool.close()
             self._pool.join()
             self._pool = None
+        self._close_arena()
 
     def on_terminate(self):
         """Force terminate the pool."""
         if self._pool is not None:
             self._pool.terminate()
             self._pool = None
+        self._close_arena()
+
+    def _close_arena(self):
+        if self.arena is not None:
+            self.arena.close()
+            self.arena = None
 
     def terminate_job(self, pid, signal=None):
         _kill(pid, signal or _signal.SIGTERM)
@@ -97,6 +156,9 @@ class TaskPool(BasePool):
                 "processes": [p.pid for p in self._pool._pool],
                 "max-tasks-per-child": self._pool._maxtasksperchild,
                 "put-guarded-by-semaphore": self.putlocks,
+                "batch-size": self.batch_size,
+                "shm-threshold": self.shm_threshold,
+                "shm-segments": len(self.arena) if self.arena is not None else 0,
                 "timeouts": (self._pool.soft_timeout, self._pool.timeout)}
 
     @property
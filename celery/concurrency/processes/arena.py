@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+    celery.concurrency.processes.arena
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Passes large task arguments to pool processes using
+    shared memory.
+
+    Jobs with arguments larger than a threshold are pickled directly
+    into a file in a shared memory file system (:file:`/dev/shm`
+    if available), and only the path is sent over the pool pipe.
+    The pool process maps the file using :mod:`mmap` and loads
+    the job from it.
+
+    The worker owns the files, and removes them when the job
+    is completed, or failed (which includes pool processes killed by
+    a time limit).  Any remaining files are removed when the
+    pool is stopped.
+
+    :copyright: (c) 2009 - 2012 by Ask Solem.
+    :license: BSD, see LICENSE for more details.
+
+"""
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import cPickle as pickle
+import errno
+import mmap
+import os
+import shutil
+import tempfile
+
+try:
+    BUFFER_TYPES = (basestring, buffer, bytearray)
+except NameError:  # pragma: no cover
+    BUFFER_TYPES = (basestring, buffer)  # Py2.5
+
+#: Directory arenas are created in by default,
+#: :file:`/dev/shm` is memory backed on Linux.
+DEFAULT_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+#: Max number of objects inspected when estimating the size
+#: of the arguments.
+ESTIMATE_MAX_ITEMS = 1000
+
+
+def estimate_size(obj, limit=None, max_items=ESTIMATE_MAX_ITEMS):
+    """Returns a rough estimate of the size of `obj` in bytes,
+    only counting strings, buffers and objects with a ``nbytes``
+    attribute (like :mod:`numpy` arrays), found in nested lists,
+    tuples and dicts.
+
+    Stops early when the size exceeds `limit`, or
+    after `max_items` objects have been inspected.
+
+    """
+    size, stack = 0, [obj]
+    while stack and max_items > 0:
+        obj = stack.pop()
+        max_items -= 1
+        if isinstance(obj, BUFFER_TYPES):
+            size += len(obj)
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.itervalues())
+        else:
+            nbytes = getattr(obj, "nbytes", None)
+            if isinstance(nbytes, (int, long)):
+                size += nbytes
+        if limit is not None and size >= limit:
+            break
+    return size
+
+
+def load(path):
+    """Load the object stored at `path` by :meth:`Arena.put`."""
+    with open(path, "rb") as fh:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return pickle.load(mm)
+        finally:
+            mm.close()
+
+
+def apply_shared(path):
+    """Pool target executing a job stored by :meth:`Arena.put`."""
+    target, args, kwargs = load(path)
+    return target(*args, **kwargs)
+
+
+class Arena(object):
+    """Shared memory segments for the arguments of pool jobs.
+
+    :param threshold: Arguments estimated to be larger than this
+        many bytes are passed using shared memory.
+    :keyword dirname: Directory to create the arena in.
+        Default is :data:`DEFAULT_DIR`, or the systems temporary
+        directory.
+
+    """
+
+    def __init__(self, threshold, dirname=None):
+        self.threshold = threshold
+        self.path = tempfile.mkdtemp(prefix="celery-arena-",
+                                     dir=dirname or DEFAULT_DIR)
+        self.segments = set()
+
+    def should_share(self, args, kwargs):
+        """Returns true if the arguments are large enough
+        to be passed using shared memory."""
+        threshold = self.threshold
+        return estimate_size((args, kwargs), limit=threshold) >= threshold
+
+    def put(self, obj):
+        """Pickle `obj` into a new segment, and return its path."""
+        fd, path = tempfile.mkstemp(prefix="job-", dir=self.path)
+        self.segments.add(path)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.free(path)
+            raise
+        return path
+
+    def free(self, path):
+        """Remove the segment at `path`."""
+        self.segments.discard(path)
+        try:
+            os.unlink(path)
+        except OSError, exc:
+            if exc.errno != errno.ENOENT:
+                raise
+
+    def close(self):
+        """Remove the arena and all of its segments."""
+        self.segments.clear()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __len__(self):
+        return len(self.segments)
@@ -16,6 +16,7 @@ import sys
 import time
 
 from collections import defaultdict
+from heapq import heapify, heappop, heappush
 from itertools import chain
 
 from billiard.einfo import ExceptionInfo  # noqa
@@ -370,26 +371,47 @@ class LimitedSet(object):
     but the list might become to big, so you want to limit it so it doesn't
     consume too much resources.
 
+    Members are kept in a dict mapping each value to the time it was
+    added, and a min-heap of ``(time, value)`` pairs is used to find
+    the oldest member, so adding, expiring and testing for membership
+    never needs to sort the set.
+
     :keyword maxlen: Maximum number of members before we start
                      evicting expired members.
     :keyword expires: Time in seconds, before a membership expires.
 
     """
-    __slots__ = ("maxlen", "expires", "_data")
+    __slots__ = ("maxlen", "expires", "_data", "_heap")
 
-    def __init__(self, maxlen=None, expires=None):
+    def __init__(self, maxlen=None, expires=None, data=None):
         self.maxlen = maxlen
         self.expires = expires
         self._data = {}
+        self._heap = []
+        if data:
+            self.update(data)
 
-    def add(self, value):
+    def add(self, value, now=None):
         """Add a new member."""
         self._expire_item()
-        self._data[value] = time.time()
+        self._add(value, now or time.time())
+
+    def _add(self, value, when):
+        # any previous heap entry for this value is now stale,
+        # and will be skipped when it reaches the top of the heap.
+        self._data[value] = when
+        heappush(self._heap, (when, value))
+        if len(self._heap) > 2 * len(self._data) + 100:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(when, value) for value, when in self._data.iteritems()]
+        heapify(self._heap)
 
     def clear(self):
         """Remove all members"""
         self._data.clear()
+        self._heap[:] = []
 
     def pop_value(self, value):
         """Remove membership by finding value."""
@@ -397,22 +419,38 @@ class LimitedSet(object):
 
     def _expire_item(self):
         """Hunt down and remove an expired item."""
-        while 1:
-            if self.maxlen and len(self) >= self.maxlen:
-                value, when = self.first
+        if self.maxlen and len(self._data) >= self.maxlen:
+            oldest = self.first
+            if oldest is not None:
+                value, when = oldest
                 if not self.expires or time.time() > when + self.expires:
-                    try:
-                        self.pop_value(value)
-                    except TypeError:  # pragma: no cover
-                        continue
-            break
+                    heappop(self._heap)
+                    self.pop_value(value)
+
+    def _purge(self):
+        """Remove expired items until the set is within its limit."""
+        while self.maxlen and len(self._data) > self.maxlen:
+            value, when = self.first
+            if self.expires and time.time() <= when + self.expires:
+                break
+            heappop(self._heap)
+            self.pop_value(value)
 
     def __contains__(self, value):
         return value in self._data
 
     def update(self, other):
+        """Add members from another :class:`LimitedSet`, a mapping
+        of members to the time they were added, or any other iterable."""
         if isinstance(other, self.__class__):
-            self._data.update(other._data)
+            other = other._data
+        if hasattr(other, "iteritems"):
+            data = self._data
+            for value, when in other.iteritems():
+                if value not in data or when > data[value]:
+                    data[value] = when
+            self._rebuild_heap()
+            self._purge()
         else:
             for obj in other:
                 self.add(obj)
@@ -421,19 +459,32 @@ class LimitedSet(object):
         return self._data
 
     def __iter__(self):
-        return iter(self._data.keys())
+        return iter(self._data)
 
     def __len__(self):
-        return len(self._data.keys())
+        return len(self._data)
 
     def __repr__(self):
         return "LimitedSet(%r)" % (self._data.keys(), )
 
+    def __getstate__(self):
+        # the heap is rebuilt from the members when unpickled.
+        return self.maxlen, self.expires, self._data
+
+    def __setstate__(self, state):
+        self.maxlen, self.expires, self._data = state
+        self._rebuild_heap()
+
     @property
     def chronologically(self):
         return sorted(self._data.items(), key=lambda (value, when): when)
 
     @property
     def first(self):
-        """Get the oldest member."""
-        return self.chronologically[0]
+        """Get the oldest member, or :const:`None` if the set is empty."""
+        heap, data = self._heap, self._data
+        while heap:
+            when, value = heap[0]
+            if data.get(value) == when:
+                return value, when
+            heappop(heap)  # stale entry
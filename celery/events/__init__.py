@@ -61,14 +61,31 @@ class EventDispatcher(object):
        while the connection is down. :meth:`flush` must be called
        as soon as the connection is re-established.
 
+    :keyword batch_size: If set events are grouped into a single
+       ``event-batch`` message for every `batch_size` events.
+       Default is :setting:`CELERY_EVENT_BATCH_SIZE`.
+
+    :keyword batch_interval: Max time in seconds an event can be kept
+       in a batch before it is sent.
+       Default is :setting:`CELERY_EVENT_BATCH_INTERVAL`.
+
+    :keyword timer: Timer used to send incomplete batches after
+       `batch_interval`.  If not set the batch is only sent
+       by the next event sent after the interval, or when the dispatcher
+       is closed.
+
     You need to :meth:`close` this after use.
 
     """
+    #: Type of the message used to send a batch of events.
+    BATCH_TYPE = "event-batch"
 
     def __init__(self, connection=None, hostname=None, enabled=True,
             channel=None, buffer_while_offline=True, app=None,
-            serializer=None):
+            serializer=None, batch_size=None, batch_interval=None,
+            timer=None):
         self.app = app_or_default(app)
+        conf = self.app.conf
         self.connection = connection
         self.channel = channel
         self.hostname = hostname or socket.gethostname()
@@ -76,9 +93,18 @@ class EventDispatcher(object):
         self.mutex = threading.Lock()
         self.publisher = None
         self._outbound_buffer = deque()
-        self.serializer = serializer or self.app.conf.CELERY_EVENT_SERIALIZER
+        self.serializer = serializer or conf.CELERY_EVENT_SERIALIZER
+        self.batch_size = (conf.CELERY_EVENT_BATCH_SIZE
+                                if batch_size is None else batch_size)
+        self.batch_interval = (conf.CELERY_EVENT_BATCH_INTERVAL
+                                if batch_interval is None else batch_interval)
+        self.timer = timer
+        self._batch = []
+        self._batch_started = None
+        self._batch_tref = None
         self.on_enabled = set()
         self.on_disabled = set()
+        self.on_backpressure = set()
 
         self.enabled = enabled
         if self.enabled:
@@ -95,6 +121,9 @@ class EventDispatcher(object):
                                   exchange=event_exchange,
                                   serializer=self.serializer)
         self.enabled = True
+        if self.batch_size and self.timer and self._batch_tref is None:
+            self._batch_tref = self.timer.apply_interval(
+                    self.batch_interval * 1000.0, self.flush_batch)
         for callback in self.on_enabled:
             callback()
 
@@ -116,6 +145,8 @@ class EventDispatcher(object):
             with self.mutex:
                 event = Event(type, hostname=self.hostname,
                                     clock=self.app.clock.forward(), **fields)
+                if self.batch_size:
+                    return self._add_to_batch(type, fields, event)
                 try:
                     self.publisher.publish(event,
                                            routing_key=type.replace("-", "."))
@@ -123,6 +154,54 @@ class EventDispatcher(object):
                     if not self.buffer_while_offline:
                         raise
                     self._outbound_buffer.append((type, fields, exc))
+                    self._backpressure()
+
+    def _add_to_batch(self, type, fields, event):
+        batch = self._batch
+        if not batch:
+            self._batch_started = event["timestamp"]
+        batch.append((type, fields, event))
+        if len(batch) >= self.batch_size or \
+                event["timestamp"] - self._batch_started >= \
+                    self.batch_interval:
+            self._send_batch()
+
+    def _send_batch(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            self.publisher.publish(
+                Event(self.BATCH_TYPE, hostname=self.hostname,
+                      clock=batch[-1][2]["clock"],
+                      events=[event for _, _, event in batch]),
+                routing_key=self.BATCH_TYPE.replace("-", "."))
+        except Exception, exc:
+            if not self.buffer_while_offline:
+                raise
+            self._outbound_buffer.extend((type, fields, exc)
+                                            for type, fields, _ in batch)
+            self._backpressure()
+
+    def _backpressure(self):
+        pending = self.pending
+        for callback in self.on_backpressure:
+            callback(pending)
+
+    def flush_batch(self):
+        """Send the events in the current batch, if the batch
+        was started more than :attr:`batch_interval` seconds ago."""
+        if self.enabled and self._batch:
+            with self.mutex:
+                if self._batch and time.time() - self._batch_started >= \
+                        self.batch_interval:
+                    self._send_batch()
+
+    @property
+    def pending(self):
+        """Number of events not yet sent, either because they are
+        waiting in the current batch, or buffered while offline."""
+        return len(self._batch) + len(self._outbound_buffer)
 
     def flush(self):
         while self._outbound_buffer:
@@ -138,6 +217,12 @@ class EventDispatcher(object):
     def close(self):
         """Close the event dispatcher."""
         self.mutex.locked() and self.mutex.release()
+        if self._batch_tref is not None:
+            self.timer.cancel(self._batch_tref)
+            self._batch_tref = None
+        if self._batch and self.publisher is not None:
+            with self.mutex:
+                self._send_batch()
         if self.publisher is not None:
             if not self.channel:  # close auto channel.
                 self.publisher.channel.close()
@@ -214,6 +299,10 @@ class EventReceiver(object):
 
     def _receive(self, body, message):
         type = body.pop("type").lower()
+        if type == EventDispatcher.BATCH_TYPE:
+            for event in body["events"]:
+                self._receive(event, message)
+            return
         clock = body.get("clock")
         if clock:
             self.app.clock.adjust(clock)
@@ -234,11 +323,15 @@ class Events(object):
                              app=self.app)
 
     def Dispatcher(self, connection=None, hostname=None, enabled=True,
-            channel=None, buffer_while_offline=True):
+            channel=None, buffer_while_offline=True, batch_size=None,
+            batch_interval=None, timer=None):
         return EventDispatcher(connection,
                                hostname=hostname,
                                enabled=enabled,
                                channel=channel,
+                               batch_size=batch_size,
+                               batch_interval=batch_interval,
+                               timer=timer,
                                app=self.app)
 
     def State(self):
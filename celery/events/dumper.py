@@ -20,7 +20,7 @@ from celery.app import app_or_default
 from celery.datastructures import LRUCache
 
 
-TASK_NAMES = LRUCache(limit=0xFFF)
+TASK_NAMES = LRUCache(limit=0xFFF, thread_safe=False)
 
 HUMAN_TYPES = {"worker-offline": "shutdown",
                "worker-online": "started",
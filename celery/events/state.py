@@ -24,6 +24,7 @@ from __future__ import with_statement
 
 import heapq
 
+from collections import defaultdict
 from threading import Lock
 from time import time
 
@@ -197,18 +198,64 @@ class Task(Element):
 
 
 class State(object):
-    """Records clusters state."""
+    """Records clusters state.
+
+    Tasks are indexed by name, worker hostname and state, and the
+    indexes are updated for every task event, so queries like
+    :meth:`tasks_by_type` only have to look at the matching tasks.
+    Tasks evicted from :attr:`tasks` are removed from the indexes.
+
+    """
     event_count = 0
     task_count = 0
 
     def __init__(self, callback=None,
             max_workers_in_memory=5000, max_tasks_in_memory=10000):
         self.workers = LRUCache(limit=max_workers_in_memory)
-        self.tasks = LRUCache(limit=max_tasks_in_memory)
+        self.tasks = LRUCache(limit=max_tasks_in_memory,
+                              on_evict=self._on_task_evicted)
         self.event_callback = callback
         self.group_handlers = {"worker": self.worker_event,
-                               "task": self.task_event}
+                               "task": self.task_event,
+                               "tasks": self.tasks_event}
         self._mutex = Lock()
+        self._reset_indexes()
+
+    def _reset_indexes(self):
+        self._tasks_by_type = defaultdict(set)
+        self._tasks_by_worker = defaultdict(set)
+        self._tasks_by_state = defaultdict(set)
+        self._indexes = (self._tasks_by_type,
+                         self._tasks_by_worker,
+                         self._tasks_by_state)
+        self._index_keys = {}
+
+    def _index_task(self, task):
+        uuid, worker = task.uuid, task.worker
+        keys = (task.name, worker and worker.hostname, task.state)
+        prev = self._index_keys.get(uuid)
+        if keys != prev:
+            self._index_keys[uuid] = keys
+            for i, index in enumerate(self._indexes):
+                if prev is None or prev[i] != keys[i]:
+                    if prev is not None:
+                        self._discard(index, prev[i], uuid)
+                    index[keys[i]].add(uuid)
+
+    def _discard(self, index, key, uuid):
+        ids = index[key]
+        ids.discard(uuid)
+        if not ids:
+            del(index[key])
+
+    def _unindex_task(self, uuid):
+        keys = self._index_keys.pop(uuid, None)
+        if keys is not None:
+            for index, key in zip(self._indexes, keys):
+                self._discard(index, key, uuid)
+
+    def _on_task_evicted(self, uuid, task):
+        self._unindex_task(uuid)
 
     def freeze_while(self, fun, *args, **kwargs):
         clear_after = kwargs.pop("clear_after", False)
@@ -231,6 +278,9 @@ class State(object):
             self.tasks.update(in_progress)
         else:
             self.tasks.clear()
+        self._reset_indexes()
+        for task in self.tasks.itervalues():
+            self._index_task(task)
 
     def _clear(self, ready=True):
         self.workers.clear()
@@ -283,14 +333,25 @@ class State(object):
         else:
             task.on_unknown_event(type, **fields)
         task.worker = worker
+        self._index_task(task)
+
+    def tasks_event(self, type, fields):
+        """Process event aggregating the same event for many tasks."""
+        tasks = fields.pop("tasks", None) or []
+        for task_fields in tasks:
+            self.task_event(type, dict(fields, **kwdict(task_fields)))
 
     def event(self, event):
         with self._mutex:
             return self._dispatch_event(event)
 
     def _dispatch_event(self, event):
-        self.event_count += 1
         event = kwdict(event)
+        if event["type"] == "event-batch":
+            for batched in event["events"]:
+                self._dispatch_event(batched)
+            return
+        self.event_count += 1
         group, _, type = event.pop("type").partition("-")
         self.group_handlers[group](type, event)
         if self.event_callback:
@@ -305,25 +366,34 @@ class State(object):
     def tasks_by_timestamp(self, limit=None):
         """Get tasks by timestamp.
 
-        Returns a list of `(uuid, task)` tuples.
+        Returns a list of `(uuid, task)` tuples.  If `limit` is set
+        only the most recently updated tasks are returned.
 
         """
-        return self._sort_tasks_by_time(self.itertasks(limit))
+        if limit:
+            return self._sort_tasks_by_time(self.tasks.most_recent(limit))
+        return self._sort_tasks_by_time(self.itertasks())
 
     def _sort_tasks_by_time(self, tasks):
         """Sort task items by time."""
         return sorted(tasks, key=lambda t: t[1].timestamp,
                       reverse=True)
 
+    def _tasks_in(self, ids, limit=None):
+        if not ids:
+            return []
+        # don't use self.tasks[uuid] as that would change the LRU order.
+        peek = self.tasks.peek
+        return self._sort_tasks_by_time([(uuid, peek(uuid))
+                    for uuid in ids if uuid in self.tasks])[:limit or None]
+
     def tasks_by_type(self, name, limit=None):
         """Get all tasks by type.
 
         Returns a list of `(uuid, task)` tuples.
 
         """
-        return self._sort_tasks_by_time([(uuid, task)
-                for uuid, task in self.itertasks(limit)
-                    if task.name == name])
+        return self._tasks_in(self._tasks_by_type.get(name), limit)
 
     def tasks_by_worker(self, hostname, limit=None):
         """Get all tasks by worker.
@@ -331,13 +401,19 @@ class State(object):
         Returns a list of `(uuid, task)` tuples.
 
         """
-        return self._sort_tasks_by_time([(uuid, task)
-                for uuid, task in self.itertasks(limit)
-                    if task.worker.hostname == hostname])
+        return self._tasks_in(self._tasks_by_worker.get(hostname), limit)
+
+    def tasks_by_state(self, state, limit=None):
+        """Get all tasks in a state.
+
+        Returns a list of `(uuid, task)` tuples.
+
+        """
+        return self._tasks_in(self._tasks_by_state.get(state), limit)
 
     def task_types(self):
         """Returns a list of all seen task types."""
-        return list(sorted(set(task.name for task in self.tasks.itervalues())))
+        return sorted(self._tasks_by_type)
 
     def alive_workers(self):
         """Returns a list of (seemingly) alive workers."""
@@ -33,7 +33,7 @@ def from_serializable(r):
     if not isinstance(r, ResultBase):
         id, nodes = r
         if nodes:
-            return TaskSetResult(id, [AsyncResult(id) for id, _ in nodes])
+            return TaskSetResult(id, nodes=nodes)
         return AsyncResult(id)
     return r
 
@@ -498,23 +498,39 @@ class ResultSet(ResultBase):
                                       interval=interval))
         return results
 
-    def iter_native(self, timeout=None, interval=None):
+    def iter_native(self, timeout=None, interval=None, max_interval=None):
         """Backend optimized version of :meth:`iterate`.
 
         .. versionadded:: 2.2
 
+        Yields ``(task_id, meta)`` tuples in the order the tasks
+        complete, so large sets of results can be consumed as a stream
+        instead of buffered in memory.
+
         Note that this does not support collecting the results
         for different task types using different backends.
 
         This is currently only supported by the AMQP, Redis and cache
         result backends.
 
+        :keyword timeout: The number of seconds to wait for all of the
+                          results to be ready.
+        :keyword interval: Time to wait (in seconds) between polling the
+                           backend for results.
+        :keyword max_interval: Backends that must poll for results will
+                               back off exponentially up to this interval
+                               while no new results arrive.
+
         """
         backend = self.results[0].backend
         ids = [result.id for result in self.results]
+        if max_interval is not None:
+            return backend.get_many(ids, timeout=timeout, interval=interval,
+                                    max_interval=max_interval)
         return backend.get_many(ids, timeout=timeout, interval=interval)
 
-    def join_native(self, timeout=None, propagate=True, interval=0.5):
+    def join_native(self, timeout=None, propagate=True, interval=0.5,
+            callback=None):
         """Backend optimized version of :meth:`join`.
 
         .. versionadded:: 2.2
@@ -525,12 +541,28 @@ class ResultSet(ResultBase):
         This is currently only supported by the AMQP, Redis and cache
         result backends.
 
+        :keyword callback: Optional callback called as
+                           ``callback(task_id, value)`` for every result
+                           in the order they complete.  The results
+                           are not collected if a callback is provided,
+                           and :const:`None` is returned.
+
         """
+        if callback is not None:
+            for task_id, meta in self.iter_native(timeout=timeout,
+                                                  interval=interval):
+                callback(task_id, meta["result"])
+            return
+
         results = self.results
-        acc = [None for _ in xrange(len(self))]
+        acc = [None] * len(results)
+        order_index = {}
+        for position, result in enumerate(results):
+            order_index.setdefault(result.id, []).append(position)
         for task_id, meta in self.iter_native(timeout=timeout,
                                               interval=interval):
-            acc[results.index(task_id)] = meta["result"]
+            for position in order_index[task_id]:
+                acc[position] = meta["result"]
         return acc
 
     def __len__(self):
@@ -569,22 +601,40 @@ class TaskSetResult(ResultSet):
 
     :param id: The id of the taskset.
     :param results: List of result instances.
+    :keyword nodes: The results in serialized form
+        (as returned by :meth:`serializable`), which are only
+        turned into result instances when first accessed.
 
     """
 
     #: The UUID of the taskset.
     id = None
 
-    #: List/iterator of results in the taskset
-    results = None
+    _results = None
+    _nodes = None
 
-    def __init__(self, id, results=None, **kwargs):
+    def __init__(self, id, results=None, nodes=None, **kwargs):
         self.id = id
 
         # XXX previously the "results" arg was named "subtasks".
         if "subtasks" in kwargs:
             results = kwargs["subtasks"]
         ResultSet.__init__(self, results, **kwargs)
+        if results is None:
+            self._nodes = nodes
+
+    def _get_results(self):
+        if self._nodes is not None:
+            self._results = [AsyncResult(id, app=self.app)
+                                for id, _ in self._nodes]
+            self._nodes = None
+        return self._results
+
+    def _set_results(self, results):
+        self._results, self._nodes = results, None
+
+    #: List/iterator of results in the taskset
+    results = property(_get_results, _set_results)
 
     def save(self, backend=None):
         """Save taskset result for later retrieval using :meth:`restore`.
@@ -609,8 +659,15 @@ class TaskSetResult(ResultSet):
         return self.__class__, self.__reduce_args__()
 
     def __reduce_args__(self):
+        if self._nodes is not None:
+            return self.id, None, self._nodes
         return self.id, self.results
 
+    def __len__(self):
+        if self._nodes is not None:
+            return len(self._nodes)
+        return len(self.results)
+
     def __eq__(self, other):
         if isinstance(other, TaskSetResult):
             return other.id == self.id and other.results == self.results
@@ -621,6 +678,8 @@ class TaskSetResult(ResultSet):
                                 [r.id for r in self.results])
 
     def serializable(self):
+        if self._nodes is not None:
+            return self.id, self._nodes
         return self.id, [r.serializable() for r in self.results]
 
     @classmethod
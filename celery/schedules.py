@@ -14,8 +14,9 @@ from __future__ import absolute_import
 
 import re
 
-from datetime import timedelta
-from dateutil.relativedelta import relativedelta
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import date, timedelta
 
 from . import current_app
 from .utils import is_iterable
@@ -109,8 +110,9 @@ class crontab_parser(object):
         expr    :: numspec ( '/' steps ) ?
         groups  :: expr ( ',' expr ) *
 
-    The parser is a general purpose one, useful for parsing hours, minutes and
-    day_of_week expressions.  Example usage::
+    The parser is a general purpose one, useful for parsing hours, minutes,
+    day_of_week, day_of_month and month_of_year expressions.
+    Example usage::
 
         >>> minutes = crontab_parser(60).parse("*/15")
         [0, 15, 30, 45]
@@ -118,6 +120,8 @@ class crontab_parser(object):
         [0, 4, 8, 12, 16, 20]
         >>> day_of_week = crontab_parser(7).parse("*")
         [0, 1, 2, 3, 4, 5, 6]
+        >>> months_of_year = crontab_parser(12, 1).parse("*/3")
+        [1, 4, 7, 10]
 
     """
     ParseException = ParseException
@@ -126,8 +130,9 @@ class crontab_parser(object):
     _steps = r'/(\w+)?'
     _star = r'\*'
 
-    def __init__(self, max_=60):
+    def __init__(self, max_=60, min_=0):
         self.max_ = max_
+        self.min_ = min_
         self.pats = (
                 (re.compile(self._range + self._steps), self._range_steps),
                 (re.compile(self._range), self._expand_range),
@@ -153,7 +158,7 @@ class crontab_parser(object):
         fr = self._expand_number(toks[0])
         if len(toks) > 1:
             to = self._expand_number(toks[1])
-            return range(fr, min(to + 1, self.max_ + 1))
+            return range(fr, min(to + 1, self.max_ + self.min_ + 1))
         return [fr]
 
     def _range_steps(self, toks):
@@ -167,7 +172,7 @@ class crontab_parser(object):
         return self._expand_star()[::int(toks[0])]
 
     def _expand_star(self, *args):
-        return range(self.max_)
+        return range(self.min_, self.max_ + self.min_)
 
     def _expand_number(self, s):
         if isinstance(s, basestring) and s[0] == '-':
@@ -191,8 +196,8 @@ class crontab(schedule):
     implementation of cron's features, so it should provide a fair
     degree of scheduling needs.
 
-    You can specify a minute, an hour, and/or a day of the week in any
-    of the following formats:
+    You can specify a minute, an hour, a day of the week, a day of the
+    month, and/or a month of the year in any of the following formats:
 
     .. attribute:: minute
 
@@ -221,10 +226,33 @@ class crontab(schedule):
           (Beware that `day_of_week="*/2"` does not literally mean
           "every two days", but "every day that is divisible by two"!)
 
+    .. attribute:: day_of_month
+
+        - A (list of) integers from 1-31 that represent the days of the
+          month that execution should occur.
+        - A string representing a crontab pattern.  This may get pretty
+          advanced, like `day_of_month="1-7,15-21"` (for the first and
+          third weeks of the month).
+
+    .. attribute:: month_of_year
+
+        - A (list of) integers from 1-12 that represent the months of
+          the year during which execution can occur.
+        - A string representing a crontab pattern.  This may get pretty
+          advanced, like `month_of_year="*/3"` (for the first month
+          of every quarter).
+
+    Unlike :manpage:`cron`, a day must match both the `day_of_week` and
+    the `day_of_month` for the task to run on that day.
+
+    The fields are compiled into sorted tables when the crontab is created,
+    so the next time to run is found by bisecting these tables, and it is
+    remembered until the task has run again.
+
     """
 
     @staticmethod
-    def _expand_cronspec(cronspec, max_):
+    def _expand_cronspec(cronspec, max_, min_=0):
         """Takes the given cronspec argument in one of the forms::
 
             int         (like 7)
@@ -240,13 +268,14 @@ class crontab(schedule):
 
         For the other base types, merely Python type conversions happen.
 
-        The argument `max_` is needed to determine the expansion of '*'.
+        The argument `max_` is needed to determine the expansion of '*',
+        and `min_` is the first valid value (e.g. 1 for days of the month).
 
         """
         if isinstance(cronspec, int):
             result = set([cronspec])
         elif isinstance(cronspec, basestring):
-            result = crontab_parser(max_).parse(cronspec)
+            result = crontab_parser(max_, min_).parse(cronspec)
         elif isinstance(cronspec, set):
             result = cronspec
         elif is_iterable(cronspec):
@@ -259,74 +288,111 @@ class crontab(schedule):
 
         # assure the result does not exceed the max
         for number in result:
-            if number >= max_:
+            if number >= max_ + min_ or number < min_:
                 raise ValueError(
                         "Invalid crontab pattern. Valid "
-                        "range is 0-%d. '%d' was found." % (max_ - 1, number))
+                        "range is %d-%d. '%d' was found." % (
+                            min_, max_ + min_ - 1, number))
 
         return result
 
-    def __init__(self, minute='*', hour='*', day_of_week='*', nowfun=None):
+    def __init__(self, minute='*', hour='*', day_of_week='*',
+            day_of_month='*', month_of_year='*', nowfun=None):
         self._orig_minute = minute
         self._orig_hour = hour
         self._orig_day_of_week = day_of_week
+        self._orig_day_of_month = day_of_month
+        self._orig_month_of_year = month_of_year
         self.hour = self._expand_cronspec(hour, 24)
         self.minute = self._expand_cronspec(minute, 60)
         self.day_of_week = self._expand_cronspec(day_of_week, 7)
+        self.day_of_month = self._expand_cronspec(day_of_month, 31, 1)
+        self.month_of_year = self._expand_cronspec(month_of_year, 12, 1)
         self.nowfun = nowfun or current_app.now
+        self._compile()
+
+    def _compile(self):
+        self._minutes = sorted(self.minute)
+        self._hours = sorted(self.hour)
+        self._days = sorted(self.day_of_month)
+        self._months = sorted(self.month_of_year)
+        self._weekdays = [day in self.day_of_week for day in xrange(7)]
+        self._every_day = (len(self._days) == 31 and len(self._months) == 12
+                            and all(self._weekdays))
+        self._last_estimate = None
 
     def __repr__(self):
-        return "<crontab: %s %s %s (m/h/d)>" % (self._orig_minute or "*",
-                                                self._orig_hour or "*",
-                                                self._orig_day_of_week or "*")
+        return "<crontab: %s %s %s %s %s (m/h/d/dM/MY)>" % (
+                    self._orig_minute or "*",
+                    self._orig_hour or "*",
+                    self._orig_day_of_week or "*",
+                    self._orig_day_of_month or "*",
+                    self._orig_month_of_year or "*")
 
     def __reduce__(self):
         return (self.__class__, (self._orig_minute,
                                  self._orig_hour,
-                                 self._orig_day_of_week), None)
+                                 self._orig_day_of_week,
+                                 self._orig_day_of_month,
+                                 self._orig_month_of_year), None)
+
+    def _runs_on(self, year, month, day):
+        return self._every_day or (
+                month in self.month_of_year and
+                day in self.day_of_month and
+                self._weekdays[date(year, month, day).isoweekday() % 7])
+
+    def _next_day(self, year, month, day):
+        """Returns the first day after the given date
+        the crontab runs on, as a tuple of `(year, month, day)`."""
+        months, days, weekdays = self._months, self._days, self._weekdays
+        start = (year, month)
+        # the calendar repeats itself every 400 years, so if there's
+        # no matching day by then the crontab never runs.
+        for year in xrange(year, year + 401):
+            for month in months[bisect_left(months, month):]:
+                # only the days after the start date are skipped.
+                after = day if (year, month) == start else 0
+                last_day = monthrange(year, month)[1]
+                for d in days[bisect_right(days, after):]:
+                    if d > last_day:
+                        break
+                    if weekdays[date(year, month, d).isoweekday() % 7]:
+                        return year, month, d
+            month = 1
+        raise ValueError("%r never runs" % (self, ))
+
+    def next_run_at(self, last_run_at):
+        """Returns the first time after `last_run_at` the
+        crontab runs at."""
+        minutes, hours = self._minutes, self._hours
+        if self._runs_on(last_run_at.year, last_run_at.month,
+                         last_run_at.day):
+            if last_run_at.hour in self.hour:
+                i = bisect_right(minutes, last_run_at.minute)
+                if i < len(minutes):
+                    return last_run_at.replace(minute=minutes[i],
+                                               second=0, microsecond=0)
+            i = bisect_right(hours, last_run_at.hour)
+            if i < len(hours):
+                return last_run_at.replace(hour=hours[i], minute=minutes[0],
+                                           second=0, microsecond=0)
+        year, month, day = self._next_day(last_run_at.year,
+                                          last_run_at.month,
+                                          last_run_at.day)
+        return last_run_at.replace(year=year, month=month, day=day,
+                                   hour=hours[0], minute=minutes[0],
+                                   second=0, microsecond=0)
 
     def remaining_estimate(self, last_run_at):
         """Returns when the periodic task should run next as a timedelta."""
-        weekday = last_run_at.isoweekday()
-        weekday = 0 if weekday == 7 else weekday  # Sunday is day 0, not day 7.
-
-        execute_this_hour = (weekday in self.day_of_week and
-                                last_run_at.hour in self.hour and
-                                    last_run_at.minute < max(self.minute))
-
-        if execute_this_hour:
-            next_minute = min(minute for minute in self.minute
-                                        if minute > last_run_at.minute)
-            delta = relativedelta(minute=next_minute,
-                                  second=0,
-                                  microsecond=0)
-        else:
-            next_minute = min(self.minute)
-            execute_today = (weekday in self.day_of_week and
-                                 last_run_at.hour < max(self.hour))
-
-            if execute_today:
-                next_hour = min(hour for hour in self.hour
-                                        if hour > last_run_at.hour)
-                delta = relativedelta(hour=next_hour,
-                                      minute=next_minute,
-                                      second=0,
-                                      microsecond=0)
-            else:
-                next_hour = min(self.hour)
-                next_day = min([day for day in self.day_of_week
-                                    if day > weekday] or
-                               self.day_of_week)
-                add_week = next_day == weekday
-
-                delta = relativedelta(weeks=add_week and 1 or 0,
-                                      weekday=(next_day - 1) % 7,
-                                      hour=next_hour,
-                                      minute=next_minute,
-                                      second=0,
-                                      microsecond=0)
-
-        return remaining(last_run_at, delta, now=self.nowfun())
+        # the scheduler keeps the same `last_run_at` until the task runs,
+        # so we only find the next time to run once per run.
+        last = self._last_estimate
+        if last is None or last[0] is not last_run_at:
+            last = self._last_estimate = (last_run_at,
+                                          self.next_run_at(last_run_at))
+        return last[1] - self.nowfun()
 
     def is_due(self, last_run_at):
         """Returns tuple of two items `(is_due, next_time_to_run)`,
@@ -345,7 +411,9 @@ class crontab(schedule):
 
     def __eq__(self, other):
         if isinstance(other, crontab):
-            return (other.day_of_week == self.day_of_week and
+            return (other.month_of_year == self.month_of_year and
+                    other.day_of_month == self.day_of_month and
+                    other.day_of_week == self.day_of_week and
                     other.hour == self.hour and
                     other.minute == self.minute)
         return other is self
@@ -25,6 +25,12 @@ configuration settings to use the auth serializer.
 Please see the configuration reference for more information.
 """
 
+LEGACY_SESSION_KEY = """\
+The CELERY_SECURITY_SESSION_KEY setting can't be used with
+CELERY_SECURITY_LEGACY_FORMAT, as earlier versions can't read
+messages authenticated using a session key.
+"""
+
 
 def disable_untrusted_serializers(whitelist=None):
     for name in set(registry._decoders) - set(whitelist or []):
@@ -32,7 +38,8 @@ def disable_untrusted_serializers(whitelist=None):
 
 
 def setup_security(allowed_serializers=None, key=None, cert=None, store=None,
-        digest="sha1", serializer="json"):
+        digest="sha1", serializer="json", session_key=None,
+        legacy_format=None):
     """Setup the message-signing serializer.
 
     Disables untrusted serializers and if configured to use the ``auth``
@@ -53,6 +60,13 @@ def setup_security(allowed_serializers=None, key=None, cert=None, store=None,
         they have been signed.  See :setting:`CELERY_TASK_SERIALIZER` for
         the serializers supported.
         Default is ``json``.
+    :keyword session_key: Name of file containing a secret shared
+        by all clients and workers, used to authenticate messages
+        using HMAC instead of signing them using the private key.
+        Defaults to the :setting:`CELERY_SECURITY_SESSION_KEY` setting.
+    :keyword legacy_format: Send messages in the format used by earlier
+        versions, so that workers not yet upgraded can read them.
+        Defaults to the :setting:`CELERY_SECURITY_LEGACY_FORMAT` setting.
 
     """
 
@@ -70,10 +84,22 @@ def setup_security(allowed_serializers=None, key=None, cert=None, store=None,
     key = key or conf.CELERY_SECURITY_KEY
     cert = cert or conf.CELERY_SECURITY_CERTIFICATE
     store = store or conf.CELERY_SECURITY_CERT_STORE
+    session_key = session_key or conf.CELERY_SECURITY_SESSION_KEY
+    if legacy_format is None:
+        legacy_format = conf.CELERY_SECURITY_LEGACY_FORMAT
 
     if not (key and cert and store):
         raise ImproperlyConfigured(SETTING_MISSING)
+    if session_key and legacy_format:
+        raise ImproperlyConfigured(LEGACY_SESSION_KEY)
+
+    kwargs = {}
+    if legacy_format:
+        kwargs["legacy_format"] = True
+    if session_key:
+        with open(session_key) as sf:
+            kwargs["session_key"] = sf.read().strip()
 
     with open(key) as kf:
         with open(cert) as cf:
-            register_auth(kf.read(), cf.read(), store)
+            register_auth(kf.read(), cf.read(), store, **kwargs)
@@ -2,14 +2,37 @@ from __future__ import absolute_import
 from __future__ import with_statement
 
 import base64
+import hashlib
+import hmac
+
+from struct import calcsize, pack, unpack_from
 
 from kombu.serialization import registry, encode, decode
 from kombu.utils.encoding import bytes_to_str, str_to_bytes
 
+from celery.exceptions import SecurityError
+from celery.utils.functional import LRUCache
+
 from .certificate import Certificate, FSCertStore
 from .key import PrivateKey
 from .utils import reraise_errors
 
+#: Messages using the binary framing start with this marker,
+#: that can never be the start of a base64 encoded message.
+MAGIC = "\x00\x02"
+
+#: Message signed using the private key of the signer.
+SIGNED = 0
+
+#: Message authenticated using the shared session key.
+HMAC = 1
+
+#: Message header: authentication mode and the length of the
+#: signer, signature, content_type and content_encoding fields.
+#: The fields are followed by the body, which is the rest of the message.
+HEADER = "!BHHHH"
+HEADER_SIZE = len(MAGIC) + calcsize(HEADER)
+
 
 def b64encode(s):
     return bytes_to_str(base64.b64encode(str_to_bytes(s)))
@@ -19,19 +42,54 @@ def b64decode(s):
     return base64.b64decode(str_to_bytes(s))
 
 
+try:
+    from hmac import compare_digest
+except ImportError:  # pragma: no cover
+
+    def compare_digest(a, b):  # noqa
+        """Compare two strings in constant time, so that the time
+        it takes doesn't tell how many characters are equal."""
+        if len(a) != len(b):
+            return False
+        result = 0
+        for x, y in zip(a, b):
+            result |= ord(x) ^ ord(y)
+        return result == 0
+
+
 class SecureSerializer(object):
+    """Serializer signing messages using public-key cryptography.
+
+    :keyword session_key: If set, messages are authenticated using
+        a HMAC with this shared secret instead of being signed using
+        the private key, which is a lot faster.  The HMAC only proves
+        that the message was sent by someone knowing the secret,
+        so anyone knowing it can send messages in the name of any
+        signer in the certificate store.
+    :keyword cert_cache_size: Max number of signer certificates to keep
+        after a message from that signer has been verified.
+    :keyword legacy_format: Send messages using the base64 format of
+        earlier versions, so that they can be read by workers that
+        have not been upgraded yet.  Can't be used with a session key.
+
+    """
 
     def __init__(self, key=None, cert=None, cert_store=None,
-            digest="sha1", serializer="json"):
+            digest="sha1", serializer="json", session_key=None,
+            cert_cache_size=100, legacy_format=False):
+        if session_key is not None and legacy_format:
+            raise ValueError("The legacy format can't use a session key")
         self._key = key
         self._cert = cert
         self._cert_store = cert_store
         self._digest = digest
         self._serializer = serializer
+        self._session_key = session_key
+        self._legacy_format = legacy_format
+        self._verified = LRUCache(limit=cert_cache_size)
 
     def serialize(self, data):
         """serialize data structure into string"""
-        assert self._key is not None
         assert self._cert is not None
         with reraise_errors("Unable to serialize: %r", (Exception, )):
             content_type, content_encoding, body = encode(
@@ -40,9 +98,18 @@ class SecureSerializer(object):
             # this way the receiver doesn't have to decode the contents
             # to verify the signature (and thus avoiding potential flaws
             # in the decoding step).
+            signer = self._cert.get_id()
+            if self._session_key is not None:
+                # all the fields are authenticated, not just the body.
+                mode = HMAC
+                signature = self._hmac(mode, signer, content_type,
+                                       content_encoding, body)
+            else:
+                assert self._key is not None
+                mode = SIGNED
+                signature = self._key.sign(body, self._digest)
             return self._pack(body, content_type, content_encoding,
-                              signature=self._key.sign(body, self._digest),
-                              signer=self._cert.get_id())
+                              signature=signature, signer=signer, mode=mode)
 
     def deserialize(self, data):
         """deserialize data structure from string"""
@@ -52,28 +119,87 @@ class SecureSerializer(object):
             signature, signer, body = (payload["signature"],
                                        payload["signer"],
                                        payload["body"])
-            self._cert_store[signer].verify(body, signature, self._digest)
+            self._verify(payload.get("mode", SIGNED), signer,
+                         body, signature, payload["content_type"],
+                         payload["content_encoding"])
         return decode(body, payload["content_type"],
                             payload["content_encoding"], force=True)
 
+    def _verify(self, mode, signer, body, signature,
+            content_type=None, content_encoding=None):
+        try:
+            cert = self._verified[signer]
+        except KeyError:
+            cert = self._cert_store[signer]
+        if mode == HMAC:
+            if self._session_key is None:
+                raise SecurityError("No session key to verify %r" % (
+                        signer, ))
+            expected = self._hmac(mode, signer, content_type,
+                                  content_encoding, body)
+            if not compare_digest(expected, signature):
+                raise SecurityError("Bad signature: %r" % (signer, ))
+        elif mode == SIGNED:
+            cert.verify(body, signature, self._digest)
+        else:
+            raise SecurityError("Unknown signature mode: %r" % (mode, ))
+        self._verified[signer] = cert
+
+    def _hmac(self, mode, signer, content_type, content_encoding, body):
+        # The MAC covers the header and every field but the MAC itself,
+        # in the order they are packed.
+        digestmod = getattr(hashlib, self._digest)
+        signer, content_type, content_encoding = (str_to_bytes(signer),
+                str_to_bytes(content_type), str_to_bytes(content_encoding))
+        mac = hmac.new(self._session_key, digestmod=digestmod)
+        for part in (MAGIC, pack(HEADER, mode, len(signer),
+                                 digestmod().digest_size, len(content_type),
+                                 len(content_encoding)),
+                     signer, content_type, content_encoding,
+                     str_to_bytes(body)):
+            mac.update(part)
+        return mac.digest()
+
     def _pack(self, body, content_type, content_encoding, signer, signature,
-            sep='\x00\x01'):
-        return b64encode(sep.join([signer, signature,
-                                   content_type, content_encoding, body]))
+            mode=SIGNED, sep='\x00\x01'):
+        signer, content_type, content_encoding = (str_to_bytes(signer),
+                str_to_bytes(content_type), str_to_bytes(content_encoding))
+        if self._legacy_format:
+            return b64encode(sep.join([signer, signature,
+                                       content_type, content_encoding,
+                                       body]))
+        return "".join([MAGIC, pack(HEADER, mode, len(signer), len(signature),
+                                    len(content_type), len(content_encoding)),
+                        signer, signature, content_type, content_encoding,
+                        str_to_bytes(body)])
 
     def _unpack(self, payload, sep='\x00\x01',
             fields=("signer", "signature", "content_type",
                     "content_encoding", "body")):
-        return dict(zip(fields, b64decode(payload).split(sep)))
+        payload = str_to_bytes(payload)
+        if not payload.startswith(MAGIC):
+            # base64 encoded message sent by an earlier version.
+            return dict(zip(fields, b64decode(payload).split(sep)))
+        header = unpack_from(HEADER, payload, len(MAGIC))
+        values, offset = {"mode": header[0]}, HEADER_SIZE
+        for field, size in zip(fields, header[1:]):
+            values[field] = payload[offset:offset + size]
+            offset += size
+        if offset > len(payload):
+            raise SecurityError("Truncated message")
+        values["body"] = payload[offset:]
+        return values
 
 
 def register_auth(key=None, cert=None, store=None, digest="sha1",
-        serializer="json"):
+        serializer="json", session_key=None, legacy_format=False):
     """register security serializer"""
     s = SecureSerializer(key and PrivateKey(key),
                          cert and Certificate(cert),
                          store and FSCertStore(store),
-                         digest=digest, serializer=serializer)
+                         digest=digest, serializer=serializer,
+                         session_key=session_key,
+                         legacy_format=legacy_format)
     registry.register("auth", s.serialize, s.deserialize,
                       content_type="application/data",
-                      content_encoding="utf-8")
+                      content_encoding="binary")
@@ -16,6 +16,7 @@ from .utils.dispatch import Signal
 task_sent = Signal(providing_args=["task_id", "task",
                                    "args", "kwargs",
                                    "eta", "taskset"])
+tasks_sent = Signal(providing_args=["tasks"])
 task_prerun = Signal(providing_args=["task_id", "task",
                                      "args", "kwargs"])
 task_postrun = Signal(providing_args=["task_id", "task",
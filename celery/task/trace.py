@@ -103,7 +103,8 @@ class TraceInfo(object):
         exc, type_, tb = self.retval, self.exc_type, self.tb
         message, orig_exc = self.retval.args
         if store_errors:
-            task.backend.mark_as_retry(req.id, orig_exc, self.strtb)
+            task.backend.mark_as_retry(req.id, orig_exc, self.strtb,
+                                       request=req)
         expanded_msg = "%s: %s" % (message, str(orig_exc))
         einfo = ExceptionInfo((type_, type_(expanded_msg, None), tb))
         task.on_retry(exc, req.id, req.args, req.kwargs, einfo)
@@ -114,7 +115,8 @@ class TraceInfo(object):
         req = task.request
         exc, type_, tb = self.retval, self.exc_type, self.tb
         if store_errors:
-            task.backend.mark_as_failure(req.id, exc, self.strtb)
+            task.backend.mark_as_failure(req.id, exc, self.strtb,
+                                         request=req)
         exc = get_pickleable_exception(exc)
         einfo = ExceptionInfo((type_, exc, tb))
         task.on_failure(exc, req.id, req.args, req.kwargs, einfo)
@@ -179,7 +181,8 @@ def build_tracer(name, task, loader=None, hostname=None, store_errors=True,
                 loader_task_init(uuid, task)
                 if track_started:
                     store_result(uuid, {"pid": pid,
-                                        "hostname": hostname}, STARTED)
+                                        "hostname": hostname}, STARTED,
+                                 request=task_request)
 
                 # -*- TRACE -*-
                 try:
@@ -216,7 +219,8 @@ def build_tracer(name, task, loader=None, hostname=None, store_errors=True,
                     [subtask(callback).apply_async((retval, ))
                         for callback in task_request.callbacks or []]
                     if publish_result:
-                        store_result(uuid, retval, SUCCESS)
+                        store_result(uuid, retval, SUCCESS,
+                                     request=task_request)
 
                 # -* POST *-
                 if task_request.chord:
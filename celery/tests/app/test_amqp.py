@@ -3,6 +3,7 @@ from __future__ import with_statement
 
 from mock import Mock
 
+from celery import signals
 from celery.app.amqp import MSG_OPTIONS, extract_msg_options
 from celery.tests.utils import AppCase
 
@@ -52,6 +53,53 @@ class test_TaskPublisher(AppCase):
         pub.delay_task("tasks.add", (2, 2), {}, retry=False, chord=123)
         self.assertFalse(pub.connection.ensure.call_count)
 
+    def test_delay_tasks(self):
+        pub = self.app.amqp.TaskPublisher(Mock())
+        pub.channel.connection.client.declared_entities = set()
+        pub.send = Mock()
+        pub._declare_exchange = Mock()
+        evd = Mock()
+        sent = []
+
+        def on_tasks_sent(sender=None, tasks=None, **kwargs):
+            sent.append((sender, tasks))
+        signals.tasks_sent.connect(on_tasks_sent)
+        try:
+            ids = pub.delay_tasks("tasks.add", [
+                ((2, 2), {}, {"exchange": "foo", "task_id": "id1"}),
+                ((4, 4), {}, {"exchange": "foo", "countdown": 10}),
+                ((8, 8), {}, {"exchange": "bar", "priority": 3})],
+                event_dispatcher=evd, retry=False)
+        finally:
+            signals.tasks_sent.disconnect(on_tasks_sent)
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[0], "id1")
+        self.assertEqual(pub.send.call_count, 3)
+        self.assertEqual(pub._declare_exchange.call_count, 2)
+        self.assertTrue(pub.send.call_args_list[1][0][0]["eta"])
+        self.assertEqual(pub.send.call_args_list[2][1]["priority"], 3)
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0][0], "tasks.add")
+        self.assertEqual([body["id"] for body in sent[0][1]], ids)
+        self.assertEqual(evd.send.call_count, 1)
+        self.assertEqual(evd.send.call_args[0][0], "tasks-sent")
+        self.assertEqual(len(evd.send.call_args[1]["tasks"]), 3)
+
+    def test_delay_tasks_empty(self):
+        pub = self.app.amqp.TaskPublisher(Mock())
+        evd = Mock()
+        self.assertEqual(pub.delay_tasks("tasks.add", [],
+                                         event_dispatcher=evd), [])
+        self.assertFalse(evd.send.call_count)
+
+    def test_delay_tasks_retry(self):
+        pub = self.app.amqp.TaskPublisher(Mock())
+        pub.channel.connection.client.declared_entities = set()
+        pub.delay_tasks("tasks.add", [((2, 2), {}, {})], retry=True,
+                        retry_policy={"frobulate": 32.4})
+        self.assertTrue(pub.connection.ensure.call_count)
+
 
 class test_PublisherPool(AppCase):
 
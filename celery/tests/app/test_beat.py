@@ -1,7 +1,11 @@
 from __future__ import absolute_import
 
+import os
+import shutil
+import tempfile
+
 from datetime import datetime, timedelta
-from mock import patch
+from mock import Mock, patch
 from nose import SkipTest
 
 from celery import beat
@@ -183,7 +187,8 @@ class test_Scheduler(Case):
         scheduler = mSchedulerRuntimeError()
         scheduler.add(name="test_due_tick_RuntimeError",
                       schedule=always_due)
-        self.assertEqual(scheduler.tick(), scheduler.max_interval)
+        with self.assertRaises(RuntimeError):
+            scheduler.tick()
 
     def test_pending_tick(self):
         scheduler = mScheduler()
@@ -207,6 +212,65 @@ class test_Scheduler(Case):
         scheduler.update_from_dict(s)
         self.assertEqual(scheduler.tick(), min(nums))
 
+    def test_tick_only_checks_due_entries(self):
+        scheduler = mScheduler()
+        pending = mocked_schedule(False, 100)
+        pending.is_due = Mock(return_value=(False, 100))
+        due = mocked_schedule(True, 10)
+        due.is_due = Mock(return_value=(True, 10))
+        scheduler.update_from_dict({"pending": {"schedule": pending},
+                                    "due": {"schedule": due}})
+        self.assertEqual(scheduler.tick(), 10)
+        self.assertEqual(pending.is_due.call_count, 1)
+        self.assertEqual(due.is_due.call_count, 1)
+        self.assertEqual(len(scheduler.sent), 1)
+
+        self.assertAlmostEqual(scheduler.tick(), 10, 1)
+        self.assertEqual(pending.is_due.call_count, 1)
+        self.assertEqual(due.is_due.call_count, 1)
+
+    def test_tick_reserved_entry_is_checked(self):
+        scheduler = mScheduler()
+        entry = scheduler.add(name="test_tick_reserved_entry_is_checked",
+                              schedule=mocked_schedule(False, 100))
+        self.assertEqual(scheduler.tick(), 100)
+        scheduler.apply_async(entry)
+        self.assertEqual(scheduler.tick(), 100)
+        self.assertEqual(scheduler.schedule[entry.name].total_run_count, 1)
+
+    def test_tick_schedule_changed(self):
+        scheduler = mScheduler()
+        scheduler.add(name="foo", schedule=mocked_schedule(False, 100))
+        self.assertEqual(scheduler.tick(), 100)
+        scheduler.schedule["bar"] = scheduler.Entry(name="bar",
+                                        schedule=mocked_schedule(False, 50))
+        self.assertEqual(scheduler.tick(), 50)
+        scheduler.set_schedule({})
+        self.assertEqual(scheduler.tick(), scheduler.max_interval)
+
+    @patch("celery.beat.time")
+    def test_tick_entry_replaced(self, time):
+        time.time.return_value = 1000.0
+        scheduler = mScheduler()
+        scheduler.add(name="foo", schedule=mocked_schedule(False, 100))
+        self.assertEqual(scheduler.tick(), 100)
+        scheduler.schedule["foo"] = scheduler.Entry(name="foo",
+                                        schedule=mocked_schedule(True, 10))
+        time.time.return_value = 1100.0
+        self.assertEqual(scheduler.tick(), 10)
+        time.time.return_value = 1110.0
+        self.assertEqual(scheduler.tick(), 10)
+        self.assertEqual(len(scheduler.sent), 2)
+        self.assertTrue(scheduler._heap)
+
+    def test_merge_inplace_rebuilds_heap(self):
+        scheduler = mScheduler()
+        scheduler.add(name="foo", schedule=mocked_schedule(False, 100))
+        self.assertEqual(scheduler.tick(), 100)
+        scheduler.merge_inplace({"foo": {
+                                    "schedule": mocked_schedule(False, 20)}})
+        self.assertEqual(scheduler.tick(), 20)
+
     def test_schedule_no_remain(self):
         scheduler = mScheduler()
         scheduler.add(name="test_schedule_no_remain",
@@ -233,6 +297,112 @@ class test_Scheduler(Case):
         self.assertEqual(a.schedule["bar"].schedule._next_run_at, 40)
 
 
+class test_SQLiteStore(Case):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "celerybeat-schedule")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def entry(self, name, **kwargs):
+        return beat.ScheduleEntry(name=name, task=name,
+                                  schedule=schedule(timedelta(seconds=10)),
+                                  **kwargs)
+
+    def test_incremental_writes(self):
+        store = beat.SQLiteStore(self.filename)
+        entries = store.open()
+        self.assertFalse(entries)
+        entries.update({"foo": self.entry("foo"), "bar": self.entry("bar")})
+        entries["baz"] = self.entry("baz")
+        self.assertEqual(store.sync(entries), 3)
+        self.assertEqual(store.sync(entries), 0)
+
+        entries["foo"] = entries["foo"].next()
+        entries.pop("bar")
+        self.assertEqual(store.sync(entries), 1)
+        self.assertEqual(store.stats["sync_count"], 3)
+        self.assertEqual(store.stats["last_sync_written"], 1)
+        store.close()
+
+        entries = beat.SQLiteStore(self.filename).open()
+        self.assertItemsEqual(entries.keys(), ["foo", "baz"])
+        self.assertEqual(entries["foo"].total_run_count, 1)
+
+    def test_first_sync_writes_all(self):
+        store = beat.SQLiteStore(self.filename)
+        entries = store.open()
+        entries["foo"] = self.entry("foo")
+        store.sync(entries)
+        store.close()
+
+        store = beat.SQLiteStore(self.filename)
+        entries = store.open()
+        entries["foo"].total_run_count = 3
+        self.assertEqual(store.sync(entries), 1)
+        store.close()
+        entries = beat.SQLiteStore(self.filename).open()
+        self.assertEqual(entries["foo"].total_run_count, 3)
+
+    def test_skips_entries_that_cant_be_loaded(self):
+        store = beat.SQLiteStore(self.filename)
+        entries = store.open()
+        entries["foo"] = self.entry("foo")
+        store.sync(entries)
+        store.conn.execute("INSERT INTO celerybeat_schedule "
+                           "VALUES ('bar', 'garbage')")
+        store.close()
+        entries = beat.SQLiteStore(self.filename).open()
+        self.assertEqual(entries.keys(), ["foo"])
+
+    def test_recover(self):
+        with open(self.filename, "w") as fh:
+            fh.write("this is not a database" * 100)
+        store = beat.SQLiteStore(self.filename)
+        with self.assertRaises(Exception):
+            store.open()
+        store.recover()
+        self.assertTrue(os.path.exists(self.filename + ".corrupt"))
+        self.assertFalse(store.open())
+
+    def test_persistent_scheduler(self):
+        scheduler = beat.PersistentScheduler(
+                        schedule_filename=self.filename,
+                        store_cls="celery.beat.SQLiteStore")
+        self.assertIsInstance(scheduler._store, beat.SQLiteStore)
+        scheduler.add(name="foo", task="foo",
+                      schedule=schedule(timedelta(seconds=10)))
+        scheduler.reserve(scheduler.schedule["foo"])
+        scheduler.sync()
+        self.assertEqual(scheduler._store.last_sync_written, 1)
+        scheduler.close()
+
+
+class test_PersistentScheduler(Case):
+
+    def test_recovers_corrupted_store(self):
+        sh = MockShelve()
+        opened = []
+
+        def open(*args, **kwargs):
+            opened.append(args)
+            if len(opened) == 1:
+                raise KeyError("corrupted")
+            return sh
+
+        class PersistentScheduler(beat.PersistentScheduler):
+            persistence = Object()
+            persistence.open = open
+
+        with patch("celery.beat.ShelveStore.recover") as recover:
+            scheduler = PersistentScheduler(schedule_filename="foo")
+            self.assertTrue(recover.called)
+        self.assertEqual(len(opened), 2)
+        self.assertIs(scheduler.schedule, sh["entries"])
+
+
 class test_Service(Case):
 
     def get_service(self):
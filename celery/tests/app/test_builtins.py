@@ -60,6 +60,39 @@ class test_group(Case):
         x = group([add.s(4, 4), add.s(8, 8)])
         x.apply_async()
 
+    def test_run_applies_many(self):
+        x = group([add.s(2, 2), add.s(4, 4), xsum.s([1]),
+                   group([add.s(8, 8)]), add.s(16, 16)])
+        tasks, result = self.task.prepare({}, tasks=x.tasks)
+        prev = add.apply_many, xsum.apply_many
+        add_many, xsum_many = add.apply_many, xsum.apply_many = \
+                Mock(), Mock()
+        sent = []
+        add_many.side_effect = xsum_many.side_effect = \
+                lambda requests, **kw: sent.append(list(requests))
+        try:
+            res = self.task.run([dict(task) for task in tasks],
+                                result.serializable())
+        finally:
+            add.apply_many, xsum.apply_many = prev
+        self.assertEqual(res.id, result.id)
+        self.assertEqual(add_many.call_count, 2)
+        self.assertEqual(xsum_many.call_count, 1)
+        self.assertFalse(add_many.call_args[1]["results"])
+        self.assertEqual([[args for args, _, _ in r] for r in sent],
+                         [[(2, 2), (4, 4)], [([1], )], [(16, 16)]])
+        self.assertEqual(sent[0][1][2]["task_id"], result.results[1].id)
+        self.assertIsNone(sent[0][1][2]["taskset_id"])
+
+    def test_prepare_lazy_result(self):
+        x = group([add.s(2, 2), add.s(4, 4)])
+        tasks, result = self.task.prepare({}, tasks=x.tasks)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.serializable(), (result.id,
+                    [(task.options["task_id"], None) for task in tasks]))
+        self.assertEqual([r.id for r in result.results],
+                         [task.options["task_id"] for task in tasks])
+
     def test_apply_async_with_parent(self):
         _tls.current_task = add
         try:
@@ -151,3 +151,111 @@ class test_prepare(Case):
         R = {"foo": "bar"}
         p = routes.prepare(R)
         self.assertIsInstance(p[0], routes.MapRoute)
+
+
+class ArgsRouter(object):
+
+    def route_for_task(self, task, args=None, kwargs=None):
+        if args:
+            return {"queue": args[0]}
+
+
+class test_routing_table(Case):
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_map_route_cached(self):
+        R = routes.prepare(({mytask.name: {"queue": "foo"}}, ))
+        router = routes.Router(R, current_app.conf.CELERY_QUEUES)
+        route = router.route({}, mytask.name)
+        self.assertDictContainsSubset(a_queue, route)
+        self.assertIn(mytask.name, router.table)
+        router.routes = [None]  # the table is used from now on.
+        self.assertEqual(router.route({}, mytask.name), route)
+
+    @with_queues(foo=a_queue, bar=b_queue, **{
+        current_app.conf.CELERY_DEFAULT_QUEUE: d_queue})
+    def test_misses_cached(self):
+        R = routes.prepare(({"celery.xaza": {"queue": "bar"}}, ))
+        router = routes.Router(R, current_app.amqp.queues)
+        router.route({}, "celery.poza")
+        self.assertIn("celery.poza", router.table)
+        self.assertIsNone(router.table["celery.poza"])
+        self.assertEqual(router.route({}, "celery.poza"),
+                dict(d_queue, queue=current_app.conf.CELERY_DEFAULT_QUEUE))
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_not_cacheable(self):
+        R = routes.prepare((ArgsRouter(), {mytask.name: {"queue": "foo"}}))
+        router = routes.Router(R, current_app.conf.CELERY_QUEUES)
+        self.assertDictContainsSubset(b_queue,
+                router.route({}, mytask.name, args=["bar"]))
+        self.assertDictContainsSubset(a_queue,
+                router.route({}, mytask.name, args=[]))
+        self.assertNotIn(mytask.name, router.table)
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_cacheable_before_uncacheable(self):
+        R = routes.prepare(({mytask.name: {"queue": "foo"}}, ArgsRouter()))
+        router = routes.Router(R, current_app.conf.CELERY_QUEUES)
+        self.assertDictContainsSubset(a_queue,
+                router.route({}, mytask.name, args=["bar"]))
+        self.assertIn(mytask.name, router.table)
+        self.assertDictContainsSubset(b_queue,
+                router.route({}, "celery.poza", args=["bar"]))
+        self.assertNotIn("celery.poza", router.table)
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_route_not_modified(self):
+        R = routes.prepare(({mytask.name: {"queue": "foo"}}, ))
+        router = routes.Router(R, current_app.conf.CELERY_QUEUES)
+        router.route({"routing_key": "x"}, mytask.name)
+        self.assertEqual(router.route({}, mytask.name)["routing_key"],
+                         a_queue["binding_key"])
+
+
+class test_amqp_Router(Case):
+
+    def setUp(self):
+        self.prev_routes = current_app.conf.CELERY_ROUTES
+        current_app.amqp.flush_routes()
+
+    def tearDown(self):
+        current_app.conf.CELERY_ROUTES = self.prev_routes
+        current_app.amqp.flush_routes()
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_table_shared(self):
+        amqp = current_app.amqp
+        router = amqp.Router()
+        self.assertIs(amqp.Router().table, router.table)
+        self.assertIsNot(amqp.Router(create_missing=True).table,
+                         router.table)
+        self.assertIsNot(amqp.Router({"foo": a_queue}).table, router.table)
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_routes_changed(self):
+        amqp = current_app.amqp
+        current_app.conf.CELERY_ROUTES = {mytask.name: {"queue": "foo"}}
+        router = amqp.Router()
+        self.assertDictContainsSubset(a_queue,
+                router.route({}, mytask.name))
+        current_app.conf.CELERY_ROUTES = {mytask.name: {"queue": "bar"}}
+        router2 = amqp.Router()
+        self.assertIsNot(router2.table, router.table)
+        self.assertDictContainsSubset(b_queue,
+                router2.route({}, mytask.name))
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_queues_changed(self):
+        amqp = current_app.amqp
+        router = amqp.Router()
+        current_app.conf.CELERY_QUEUES = {"foo": b_queue}
+        amqp.queues = amqp.Queues(current_app.conf.CELERY_QUEUES)
+        self.assertIsNot(amqp.Router().table, router.table)
+
+    @with_queues(foo=a_queue, bar=b_queue)
+    def test_flush_routes(self):
+        amqp = current_app.amqp
+        router = amqp.Router()
+        amqp.flush_routes()
+        self.assertIsNot(amqp.Router().table, router.table)
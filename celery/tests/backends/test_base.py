@@ -4,10 +4,11 @@ from __future__ import with_statement
 import sys
 import types
 
-from mock import Mock
+from mock import Mock, patch
 from nose import SkipTest
 
 from celery import current_app
+from celery.exceptions import TimeoutError
 from celery.result import AsyncResult, TaskSetResult
 from celery.utils import serialization
 from celery.utils.serialization import subclass_exception
@@ -262,6 +263,44 @@ class test_KeyValueStoreBackend(Case):
             self.assertEqual(i, 9)
             self.assertTrue(list(self.b.get_many(ids.keys())))
 
+    @patch("celery.backends.base.time.sleep")
+    def test_get_many_backoff_and_timeout(self, sleep):
+        ids = [uuid(), uuid()]
+        self.b.mark_as_done(ids[0], 1)
+        self.b.mark_as_started(ids[1])
+        it = self.b.get_many(ids, timeout=10, interval=0.5,
+                             max_interval=2)
+        self.assertEqual(it.next(), (ids[0], self.b._cache[ids[0]]))
+
+        rounds = [0]
+
+        def on_sleep(secs):
+            rounds[0] += 1
+            if rounds[0] == 4:
+                self.b.mark_as_done(ids[1], 2)
+        sleep.side_effect = on_sleep
+        task_id, meta = it.next()
+        self.assertEqual(task_id, ids[1])
+        self.assertEqual(meta["result"], 2)
+        self.assertEqual([args[0][0] for args in sleep.call_args_list],
+                         [0.5, 1.0, 2, 2])
+        with self.assertRaises(StopIteration):
+            it.next()
+
+        with patch("celery.backends.base.time.time") as time:
+            time.side_effect = iter([100.0, 100.0, 110.0])
+            with self.assertRaises(TimeoutError):
+                list(self.b.get_many([uuid()], timeout=10))
+
+    def test_get_many_no_sleep_when_ready(self):
+        ids = [uuid() for i in xrange(3)]
+        for i, id in enumerate(ids):
+            self.b.mark_as_done(id, i)
+        self.b._cache.clear()
+        with patch("celery.backends.base.time.sleep") as sleep:
+            self.assertEqual(len(list(self.b.get_many(ids))), 3)
+            self.assertFalse(sleep.called)
+
     def test_get_missing_meta(self):
         self.assertIsNone(self.b.get_result("xxx-missing"))
         self.assertEqual(self.b.get_status("xxx-missing"), states.PENDING)
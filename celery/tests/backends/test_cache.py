@@ -58,32 +58,112 @@ class test_CacheBackend(Case):
 
     def test_on_chord_apply(self):
         tb = CacheBackend(backend="memory://")
-        tb.on_chord_apply("setid", [])
+        tb.on_chord_apply("setid", [], result=map(AsyncResult, [1, 2, 3]))
+        self.assertEqual(tb.get(tb.get_key_for_chord("setid")), "0")
+        self.assertEqual(tb.get(tb.get_key_for_chord_size("setid")), "3")
 
-    @patch("celery.result.TaskSetResult")
-    def test_on_chord_part_return(self, setresult):
+    def chord_part(self, tb, name="foobarbaz"):
+        task = Mock()
+        task.name = name
+        task.request.chord = subtask(task)
+        task.request.taskset = "setid"
+        return task
+
+    def test_on_chord_part_return(self):
         tb = CacheBackend(backend="memory://")
+        tids = [uuid(), uuid()]
+        task = self.chord_part(tb)
+        try:
+            current_app.tasks["foobarbaz"] = task
+            tb.on_chord_apply("setid", [], result=map(AsyncResult, tids))
 
-        deps = Mock()
-        deps.total = 2
-        setresult.restore.return_value = deps
-        task = Mock()
-        task.name = "foobarbaz"
+            tb.mark_as_done(tids[0], 2)
+            tb.on_chord_part_return(task)
+            self.assertFalse(task.apply_async.call_count)
+
+            tb.mark_as_done(tids[1], 4)
+            tb.on_chord_part_return(task)
+            task.apply_async.assert_called_with(([2, 4], ), {})
+            for key in (tb.get_key_for_chord("setid"),
+                        tb.get_key_for_chord_size("setid"),
+                        tb.get_key_for_taskset("setid")):
+                self.assertIsNone(tb.get(key))
+        finally:
+            current_app.tasks.pop("foobarbaz")
+
+    def test_on_chord_part_return_without_size(self):
+        # chords applied before the size was stored.
+        tb = CacheBackend(backend="memory://")
+        tids = [uuid(), uuid()]
+        task = self.chord_part(tb)
         try:
             current_app.tasks["foobarbaz"] = task
-            task.request.chord = subtask(task)
-            task.request.taskset = "setid"
+            tb.on_chord_apply("setid", [], result=map(AsyncResult, tids))
+            tb.delete(tb.get_key_for_chord_size("setid"))
+            tb.mark_as_done(tids[0], 2)
+            tb.mark_as_done(tids[1], 4)
+
+            tb.on_chord_part_return(task)
+            self.assertFalse(task.apply_async.call_count)
+            tb.on_chord_part_return(task)
+            task.apply_async.assert_called_with(([2, 4], ), {})
+        finally:
+            current_app.tasks.pop("foobarbaz")
 
-            tb.on_chord_apply(task.request.taskset, [])
+    @patch("celery.backends.base.logger")
+    def test_on_chord_part_return_taskset_missing(self, logger):
+        tb = CacheBackend(backend="memory://")
+        task = self.chord_part(tb)
+        try:
+            current_app.tasks["foobarbaz"] = task
+            tb.on_chord_apply("setid", [], result=map(AsyncResult, [uuid()]))
+            tb.delete(tb.get_key_for_taskset("setid"))
+            tb.on_chord_part_return(task)
+            self.assertFalse(task.apply_async.call_count)
+            self.assertTrue(logger.error.called)
+            self.assertIsNone(tb.get(tb.get_key_for_chord("setid")))
 
-            self.assertFalse(deps.join.called)
+            # no size either (applied by an earlier version).
+            logger.error.reset_mock()
+            tb.set(tb.get_key_for_chord("setid"), "0")
             tb.on_chord_part_return(task)
-            self.assertFalse(deps.join.called)
+            self.assertFalse(task.apply_async.call_count)
+            self.assertTrue(logger.error.called)
+        finally:
+            current_app.tasks.pop("foobarbaz")
 
+    def test_on_chord_part_return_propagate(self):
+        tb = CacheBackend(backend="memory://")
+        tids = [uuid(), uuid()]
+        task = self.chord_part(tb)
+        try:
+            current_app.tasks["foobarbaz"] = task
+            tb.on_chord_apply("setid", [], result=map(AsyncResult, tids))
+            tb.mark_as_done(tids[0], 2)
+            tb.mark_as_failure(tids[1], KeyError("foo"))
             tb.on_chord_part_return(task)
-            deps.join.assert_called_with(propagate=False)
-            deps.delete.assert_called_with()
 
+            with self.assertRaises(KeyError):
+                tb.on_chord_part_return(task, propagate=True)
+            self.assertFalse(task.apply_async.call_count)
+        finally:
+            current_app.tasks.pop("foobarbaz")
+
+    @patch("celery.result.TaskSetResult.join")
+    def test_on_chord_part_return_not_ready(self, join):
+        # parts not ready yet are waited for by joining the taskset.
+        join.return_value = [2, 4]
+        tb = CacheBackend(backend="memory://")
+        tids = [uuid(), uuid()]
+        task = self.chord_part(tb)
+        try:
+            current_app.tasks["foobarbaz"] = task
+            tb.on_chord_apply("setid", [], result=map(AsyncResult, tids))
+            tb.mark_as_done(tids[0], 2)
+            tb.on_chord_part_return(task)
+            tb.on_chord_part_return(task)
+            join.assert_called_with(propagate=False)
+            task.apply_async.assert_called_with(([2, 4], ), {})
         finally:
             current_app.tasks.pop("foobarbaz")
 
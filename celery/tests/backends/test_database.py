@@ -3,13 +3,16 @@ from __future__ import with_statement
 
 import sys
 
+from pickle import loads, dumps
+
 from datetime import datetime
 
+from mock import Mock
 from nose import SkipTest
 
 from celery import states
 from celery.app import app_or_default
-from celery.exceptions import ImproperlyConfigured
+from celery.exceptions import ImproperlyConfigured, TimeoutError
 from celery.result import AsyncResult
 from celery.utils import uuid
 
@@ -189,6 +192,86 @@ class test_DatabaseBackend(Case):
 
         tb.cleanup()
 
+    def test_store_result_upserts(self):
+        tb = DatabaseBackend()
+        tid = uuid()
+        tb.mark_as_started(tid)
+        tb.mark_as_done(tid, 42)
+        s = tb.ResultSession()
+        try:
+            self.assertEqual(
+                s.query(Task).filter(Task.task_id == tid).count(), 1)
+        finally:
+            s.close()
+        self.assertEqual(tb.get_status(tid), states.SUCCESS)
+        self.assertEqual(tb.get_result(tid), 42)
+
+    def test_upsert_concurrent_insert(self):
+        tb = DatabaseBackend()
+        tid = uuid()
+        tb.mark_as_started(tid)
+        s = tb.ResultSession()
+        executed = []
+
+        class Session(object):
+            # another worker inserts the task after the update,
+            # on a database without a native upsert.
+            bind = Mock()
+            bind.dialect.name = "postgresql"
+
+            def execute(self, statement, params):
+                executed.append(statement)
+                if len(executed) == 1:
+                    return Mock(rowcount=0)
+                return s.execute(statement, params)
+
+            def rollback(self):
+                s.rollback()
+
+        try:
+            tb._upsert_task(Session(), tid, {"result": 42,
+                                             "status": states.SUCCESS,
+                                             "traceback": None})
+            s.commit()
+            self.assertEqual(len(executed), 3)
+            self.assertEqual(
+                s.query(Task).filter(Task.task_id == tid).count(), 1)
+        finally:
+            s.close()
+        self.assertEqual(tb.get_status(tid), states.SUCCESS)
+        self.assertEqual(tb.get_result(tid), 42)
+
+    def test_get_many(self):
+        tb = DatabaseBackend()
+        tb.max_ids_per_query = 2
+        tids = [uuid() for i in range(5)]
+        for i, tid in enumerate(tids):
+            tb.mark_as_done(tid, i)
+        metas = dict(tb.get_many(tids, timeout=1, interval=0.01))
+        self.assertEqual(len(metas), 5)
+        for i, tid in enumerate(tids):
+            self.assertEqual(metas[tid]["result"], i)
+            self.assertEqual(metas[tid]["status"], states.SUCCESS)
+
+    def test_get_many_skips_pending(self):
+        tb = DatabaseBackend()
+        tid = uuid()
+        tb.mark_as_started(tid)
+        self.assertFalse(tb._get_many_meta(["xxx-nonexisting-id"]))
+        with self.assertRaises(TimeoutError):
+            list(tb.get_many([tid], timeout=0.02, interval=0.01))
+
+    def test_pooled_sessions(self):
+        tb = DatabaseBackend(pooled_sessions=True)
+        self.assertTrue(tb.pooled_sessions)
+        tid = uuid()
+        tb.mark_as_done(tid, 42)
+        self.assertEqual(tb.get_result(tid), 42)
+        from celery.backends.database import session
+        self.assertIs(session.create_pooled_session(tb.dburi)[1],
+                      session.create_pooled_session(tb.dburi)[1])
+        self.assertTrue(loads(dumps(tb)).pooled_sessions)
+
     def test_Task__repr__(self):
         self.assertIn("foo", repr(Task("foo")))
 
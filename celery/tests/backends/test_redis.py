@@ -6,7 +6,7 @@ from mock import Mock, patch
 
 from celery import current_app
 from celery import states
-from celery.result import AsyncResult
+from celery.result import AsyncResult, TaskSetResult
 from celery.task import subtask
 from celery.utils import cached_property, uuid
 from celery.utils.timeutils import timedelta_seconds
@@ -14,7 +14,26 @@ from celery.utils.timeutils import timedelta_seconds
 from celery.tests.utils import Case
 
 
+class Pipeline(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.steps = []
+
+    def __getattr__(self, attr):
+
+        def add_step(*args, **kwargs):
+            self.steps.append((getattr(self.client, attr), args, kwargs))
+            return self
+        return add_step
+
+    def execute(self):
+        self.client.executed += 1
+        return [step(*args, **kwargs) for step, args, kwargs in self.steps]
+
+
 class Redis(object):
+    executed = 0
 
     class Connection(object):
         connected = True
@@ -34,6 +53,16 @@ class Redis(object):
     def get(self, key):
         return self.keyspace.get(key)
 
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key):
+        value = self.keyspace[key] = int(self.keyspace.get(key) or 0) + 1
+        return value
+
+    def pipeline(self, transaction=True):
+        return Pipeline(self)
+
     def setex(self, key, value, expires):
         self.set(key, value)
         self.expire(key, expires)
@@ -118,32 +147,152 @@ class test_RedisBackend(Case):
         b.expires = None
         b.set("foo", "bar")
 
-    @patch("celery.result.TaskSetResult")
-    def test_on_chord_part_return(self, setresult):
-        b = self.MockBackend()
-        deps = Mock()
-        deps.total = 10
-        setresult.restore.return_value = deps
-        b.client.incr.return_value = 1
+    def test_on_chord_part_return(self):
+        b = self.Backend()
+        tids = [uuid(), uuid()]
         task = Mock()
         task.name = "foobarbaz"
+        key = b.get_key_for_chord("setid")
         try:
             current_app.tasks["foobarbaz"] = task
             task.request.chord = subtask(task)
             task.request.taskset = "setid"
+            b.on_chord_apply("setid", {}, result=map(AsyncResult, tids))
+            b.mark_as_done(tids[0], 2)
+            b.mark_as_done(tids[1], 4)
+            executed = b.client.executed
 
             b.on_chord_part_return(task)
-            self.assertTrue(b.client.incr.call_count)
+            self.assertEqual(b.client.keyspace[key], 1)
+            self.assertEqual(b.client.expiry[key], 86400)
+            self.assertEqual(b.client.executed, executed + 1)
+            self.assertFalse(task.apply_async.call_count)
 
-            b.client.incr.return_value = deps.total
             b.on_chord_part_return(task)
-            deps.join.assert_called_with(propagate=False)
-            deps.delete.assert_called_with()
-
-            self.assertTrue(b.client.expire.call_count)
+            task.apply_async.assert_called_with(([2, 4], ), {})
+            self.assertNotIn(key, b.client.keyspace)
+            self.assertNotIn(b.get_key_for_chord_size("setid"),
+                             b.client.keyspace)
+            self.assertNotIn(b.get_key_for_taskset("setid"),
+                             b.client.keyspace)
         finally:
             current_app.tasks.pop("foobarbaz")
 
+    def test_on_chord_part_return_no_taskset(self):
+        b = self.Backend()
+        task = Mock()
+        task.request.taskset = None
+        b.on_chord_part_return(task)
+        self.assertFalse(b.client.executed)
+
+    def test_set_is_pipelined(self):
+        b = self.Backend(expires=512)
+        b.set("foo", "bar")
+        self.assertEqual(b.client.keyspace["foo"], "bar")
+        self.assertEqual(b.client.expiry["foo"], 512)
+        self.assertEqual(b.client.executed, 1)
+
+    def test_write_behind(self):
+        b = self.Backend(write_behind=True, write_behind_batch=3,
+                         write_behind_interval=10)
+        tids = [uuid() for i in xrange(3)]
+        b.store_result(tids[0], 1, states.SUCCESS)
+        b.store_result(tids[1], 2, states.SUCCESS)
+        self.assertFalse(b.client.keyspace)
+        self.assertTrue(b._flush_timer)
+
+        # tasksets are not buffered
+        b.save_taskset("setid", TaskSetResult("setid", []))
+        self.assertIn(b.get_key_for_taskset("setid"), b.client.keyspace)
+
+        # batch full
+        b.store_result(tids[2], 3, states.SUCCESS)
+        for tid in tids:
+            self.assertIn(b.get_key_for_task(tid), b.client.keyspace)
+        self.assertIsNone(b._flush_timer)
+        self.assertEqual(b.client.executed, 2)
+
+    def test_write_behind_read_your_writes(self):
+        b = self.Backend(write_behind=True, write_behind_interval=10)
+        tid = uuid()
+        b.store_result(tid, 42, states.SUCCESS)
+        self.assertFalse(b.client.keyspace)
+        self.assertEqual(b.get_result(tid), 42)
+        self.assertEqual(b.client.executed, 1)
+
+        tid2 = uuid()
+        b.store_result(tid2, 43, states.SUCCESS)
+        self.assertEqual(dict(b.get_many([tid2]))[tid2]["result"], 43)
+
+        b.flush()
+        self.assertEqual(b.client.executed, 2)
+
+    def test_write_behind_interval(self):
+        b = self.Backend(write_behind=True, write_behind_interval=0.01)
+        tid = uuid()
+        b.store_result(tid, 42, states.SUCCESS)
+        b._flush_timer.join()
+        self.assertIn(b.get_key_for_task(tid), b.client.keyspace)
+
+    @patch("celery.backends.redis.register_after_fork")
+    @patch("celery.backends.redis.Finalize")
+    def test_write_behind_flushed_at_exit(self, Finalize, after_fork):
+        b = self.Backend(write_behind=True)
+        Finalize.assert_called_with(None, b.flush, exitpriority=10)
+        # pool processes only run finalizers registered after fork.
+        obj, fun = after_fork.call_args[0]
+        self.assertIs(obj, b)
+        Finalize.reset_mock()
+        fun(obj)
+        Finalize.assert_called_with(None, b.flush, exitpriority=10)
+
+        Finalize.reset_mock()
+        self.Backend()
+        self.assertFalse(Finalize.called)
+
+    def test_write_behind_after_fork(self):
+        b = self.Backend(write_behind=True, write_behind_interval=10)
+        b.store_result(uuid(), 1, states.SUCCESS)
+        timer = b._flush_timer
+        try:
+            # fork while the parent has a pending flush, and the
+            # mutex is held by another thread.
+            b._pending_mutex.acquire()
+            with patch("celery.backends.redis.Finalize") as Finalize:
+                b._after_fork()
+                Finalize.assert_called_with(None, b.flush, exitpriority=10)
+            self.assertFalse(b._pending)
+            self.assertFalse(b._pending_keys)
+            self.assertIsNone(b._flush_timer)
+
+            tid = uuid()
+            b.store_result(tid, 2, states.SUCCESS)
+            self.assertTrue(b._flush_timer)
+            self.assertIsNot(b._flush_timer, timer)
+            b.flush()
+            self.assertEqual(b.client.keyspace.keys(),
+                             [b.get_key_for_task(tid)])
+        finally:
+            timer.cancel()
+
+    def test_write_behind_flush_error(self):
+        b = self.Backend(write_behind=True, write_behind_interval=10)
+        tids = [uuid(), uuid()]
+        b.store_result(tids[0], 1, states.SUCCESS)
+        execute = Pipeline.execute
+        Pipeline.execute = Mock(side_effect=KeyError("connection lost"))
+        try:
+            with self.assertRaises(KeyError):
+                b.flush()
+        finally:
+            Pipeline.execute = execute
+        b.store_result(tids[1], 2, states.SUCCESS)
+        self.assertEqual([key for key, _ in b._pending],
+                         [b.get_key_for_task(tid) for tid in tids])
+        b.flush()
+        for tid in tids:
+            self.assertIn(b.get_key_for_task(tid), b.client.keyspace)
+
     def test_process_cleanup(self):
         self.Backend().process_cleanup()
 
@@ -0,0 +1,174 @@
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import socket
+
+from mock import Mock
+
+from celery import current_app
+from celery import states
+from celery.app.task import Context
+from celery.backends import get_backend_cls
+from celery.backends.amqp import AMQPBackend
+from celery.backends.rpc import RPCBackend
+from celery.exceptions import TimeoutError
+from celery.utils import uuid
+
+from celery.tests.utils import Case
+
+
+class test_RPCBackend(Case):
+
+    def create_backend(self, **opts):
+        opts = dict(dict(serializer="pickle", persistent=False), **opts)
+        return RPCBackend(**opts)
+
+    def setUp(self):
+        self.client = self.create_backend()
+        self.worker = self.create_backend()
+
+    def request(self, task_id=None, reply_to=None):
+        request = Context()
+        request.update({"id": task_id or uuid(),
+                        "reply_to": reply_to or self.client.reply_to})
+        return request
+
+    def test_alias(self):
+        self.assertIs(get_backend_cls("rpc"), RPCBackend)
+
+    def test_reply_to(self):
+        self.assertTrue(self.client.reply_to)
+        self.assertEqual(self.client.reply_to, self.client.reply_to)
+        self.assertNotEqual(self.client.reply_to, self.worker.reply_to)
+
+    def test_reply_to_reset_after_fork(self):
+        oid = self.client.oid
+        self.client._replies["foo"] = {}
+        self.client._oid_pid = -1
+        self.assertNotEqual(self.client.oid, oid)
+        self.assertFalse(self.client._replies)
+
+    def test_mark_as_done(self):
+        request = self.request()
+        self.worker.mark_as_done(request.id, 42, request=request)
+        self.assertEqual(self.client.get_status(request.id), states.SUCCESS)
+        self.assertEqual(self.client.get_result(request.id), 42)
+        self.assertEqual(self.client.wait_for(request.id, timeout=1), 42)
+
+    def test_poll_pending(self):
+        self.assertEqual(self.client.poll(uuid())["status"], states.PENDING)
+
+    def test_poll_keeps_other_results(self):
+        r1, r2 = self.request(), self.request()
+        self.worker.mark_as_started(r1.id, request=r1)
+        self.worker.mark_as_done(r2.id, 2, request=r2)
+        self.assertEqual(self.client.poll(r1.id)["status"], states.STARTED)
+        self.assertIn(r2.id, self.client._replies)
+        self.assertEqual(self.client.poll(r2.id)["result"], 2)
+
+    def test_replies_are_kept_until_asked_for(self):
+        client = self.create_backend(max_cached_results=3)
+        requests = [self.request(reply_to=client.reply_to)
+                        for i in xrange(5)]
+        for i, request in enumerate(requests):
+            self.worker.mark_as_done(request.id, i, request=request)
+        # all of the results are received while waiting for the last.
+        self.assertEqual(client.wait_for(requests[4].id, timeout=1), 4)
+        self.assertEqual(len(client._replies), 4)
+        for i in (1, 3, 0, 2):
+            self.assertEqual(client.wait_for(requests[i].id, timeout=1), i)
+        self.assertFalse(client._replies)
+        # only the results asked for are cached, and the cache is bounded.
+        self.assertEqual(len(client._cache), 3)
+
+    def test_forget(self):
+        request = self.request()
+        self.worker.mark_as_done(request.id, 42, request=request)
+        self.assertEqual(self.client.poll(uuid())["status"], states.PENDING)
+        self.assertIn(request.id, self.client._replies)
+        self.client.forget(request.id)
+        self.assertNotIn(request.id, self.client._replies)
+
+    def test_mark_as_failure(self):
+        request = self.request()
+        self.worker.mark_as_failure(request.id, KeyError("foo"),
+                                    request=request)
+        with self.assertRaises(KeyError):
+            self.client.wait_for(request.id, timeout=1)
+        self.assertIsInstance(self.client.wait_for(request.id, timeout=1,
+                                                   propagate=False),
+                              KeyError)
+
+    def test_get_many(self):
+        requests = [self.request() for i in xrange(10)]
+        # results for other clients are not received.
+        other = self.request(reply_to=self.worker.reply_to)
+        self.worker.mark_as_done(other.id, "other", request=other)
+        for i, request in enumerate(reversed(requests)):
+            self.worker.mark_as_started(request.id, request=request)
+            self.worker.mark_as_done(request.id, i, request=request)
+        ids = [request.id for request in requests]
+        res = list(self.client.get_many(ids, timeout=1))
+        self.assertEqual([task_id for task_id, _ in res], ids[::-1])
+        self.assertEqual([meta["result"] for _, meta in res], range(10))
+        self.assertFalse(self.client._replies)
+        # results are cached after being received
+        res2 = list(self.client.get_many(ids, timeout=1))
+        self.assertItemsEqual(res2, res)
+        self.assertNotIn(other.id, self.client._cache)
+
+    def test_get_many_timeout(self):
+        self.client.drain_interval = 0.01
+        with self.assertRaises(socket.timeout):
+            list(self.client.get_many([uuid()], timeout=0.05))
+
+    def test_wait_for_timeout(self):
+        self.client.drain_interval = 0.01
+        with self.assertRaises(TimeoutError):
+            self.client.wait_for(uuid(), timeout=0.05)
+
+    def test_store_result_without_reply_to(self):
+        # results for clients not using a reply queue are sent to
+        # the queue for that task, like the amqp backend.
+        tid = uuid()
+        self.worker.mark_as_done(tid, 42)
+        self.assertEqual(self.client.poll(tid)["status"], states.PENDING)
+        amqp = AMQPBackend(serializer="pickle", persistent=False)
+        self.assertEqual(amqp.poll(tid)["result"], 42)
+
+    def test_apply_async_sends_reply_to(self):
+        app = current_app
+        prev = app.__dict__.get("backend")
+        app.backend = self.client
+        try:
+
+            @app.task()
+            def rpc_task():
+                pass
+
+            @app.task(ignore_result=True)
+            def rpc_task_ignored():
+                pass
+
+            publisher = Mock()
+            rpc_task.apply_async(publisher=publisher)
+            self.assertEqual(
+                publisher.delay_task.call_args[1]["reply_to"],
+                self.client.reply_to)
+            rpc_task_ignored.apply_async(publisher=publisher)
+            self.assertNotIn("reply_to", publisher.delay_task.call_args[1])
+        finally:
+            if prev is None:
+                app.__dict__.pop("backend", None)
+            else:
+                app.backend = prev
+
+    def test_task_body(self):
+        publisher = current_app.amqp.TaskPublisher(
+                        current_app.broker_connection())
+        try:
+            body = publisher._task_body("foo", reply_to="bar")
+            self.assertEqual(body["reply_to"], "bar")
+            self.assertNotIn("reply_to", publisher._task_body("foo"))
+        finally:
+            publisher.close()
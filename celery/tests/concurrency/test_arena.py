@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import os
+import shutil
+import tempfile
+
+from mock import Mock
+
+from celery.concurrency.processes import TaskPool
+from celery.concurrency.processes.arena import (Arena, apply_shared,
+                                                estimate_size, load)
+from celery.tests.utils import Case
+
+
+def add(x, y):
+    return x + y
+
+
+class Array(object):
+    nbytes = 4096
+
+
+class test_estimate_size(Case):
+
+    def test_estimate(self):
+        self.assertEqual(estimate_size(("x" * 10, [u"y" * 10])), 20)
+        self.assertEqual(estimate_size({"a": {"b": [Array()]}}), 4096)
+        self.assertEqual(estimate_size((1, 2.0, None, object())), 0)
+
+    def test_limit(self):
+        self.assertEqual(estimate_size(["x" * 10] * 10, limit=25), 30)
+        self.assertEqual(estimate_size(["x" * 10] * 10, max_items=3), 20)
+
+
+class test_Arena(Case):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.arena = Arena(100, dirname=self.tmpdir)
+
+    def tearDown(self):
+        self.arena.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_should_share(self):
+        self.assertTrue(self.arena.should_share(("x" * 100, ), {}))
+        self.assertTrue(self.arena.should_share((), {"x": "x" * 100}))
+        self.assertFalse(self.arena.should_share(("x" * 99, ), {}))
+
+    def test_put_load_free(self):
+        path = self.arena.put((add, ("x" * 100, "y"), {}))
+        self.assertTrue(path.startswith(self.arena.path))
+        self.assertEqual(len(self.arena), 1)
+        self.assertEqual(load(path), (add, ("x" * 100, "y"), {}))
+        self.assertEqual(apply_shared(path), "x" * 100 + "y")
+        self.arena.free(path)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(len(self.arena))
+        self.arena.free(path)   # already removed
+
+    def test_put_error(self):
+        with self.assertRaises(Exception):
+            self.arena.put(lambda: 1)   # can't be pickled.
+        self.assertFalse(len(self.arena))
+        self.assertFalse(os.listdir(self.arena.path))
+
+    def test_close(self):
+        self.arena.put((add, (1, 2), {}))
+        self.arena.close()
+        self.assertFalse(os.path.exists(self.arena.path))
+        self.assertFalse(len(self.arena))
+
+
+class test_TaskPool_shared(Case):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.pool = TaskPool(2, shm_threshold=100)
+        self.pool._pool = Mock()
+        self.pool.arena = Arena(100, dirname=self.tmpdir)
+
+    def tearDown(self):
+        self.pool.arena.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_options(self):
+        self.assertEqual(self.pool.shm_threshold, 100)
+        self.assertNotIn("shm_threshold", self.pool.options)
+
+    def test_apply_small(self):
+        self.pool.apply_shared(add, (1, 2), {})
+        args, kwargs = self.pool._pool.apply_async.call_args
+        self.assertEqual(args, (add, (1, 2), {}))
+        self.assertFalse(len(self.pool.arena))
+
+    def test_apply_large(self):
+        callback, error_callback = Mock(), Mock()
+        self.pool.apply_shared(add, ("x" * 100, "y"), {},
+                               callback=callback,
+                               error_callback=error_callback,
+                               soft_timeout=10)
+        args, kwargs = self.pool._pool.apply_async.call_args
+        self.assertIs(args[0], apply_shared)
+        path = args[1][0]
+        self.assertEqual(kwargs["soft_timeout"], 10)
+        self.assertEqual(len(self.pool.arena), 1)
+        self.assertEqual(apply_shared(path), "x" * 100 + "y")
+
+        kwargs["callback"]("xy")
+        callback.assert_called_with("xy")
+        self.assertFalse(os.path.exists(path))
+
+        self.pool.apply_shared(add, ("x" * 100, "y"), {},
+                               error_callback=error_callback)
+        args, kwargs = self.pool._pool.apply_async.call_args
+        kwargs["error_callback"]("lost")   # e.g. time limit exceeded.
+        error_callback.assert_called_with("lost")
+        self.assertFalse(os.path.exists(args[1][0]))
+
+    def test_apply_large_raises(self):
+        self.pool._pool.apply_async.side_effect = KeyError()
+        with self.assertRaises(KeyError):
+            self.pool.apply_shared(add, ("x" * 100, "y"), {})
+        self.assertFalse(len(self.pool.arena))
@@ -3,6 +3,8 @@ from __future__ import with_statement
 
 import socket
 
+from mock import Mock
+
 from celery import events
 from celery.app import app_or_default
 from celery.tests.utils import Case
@@ -67,6 +69,75 @@ class test_EventDispatcher(Case):
         for ev in evs:
             self.assertTrue(producer.has_event(ev))
 
+    def test_send_batch(self):
+        producer = MockProducer()
+        eventer = self.app.events.Dispatcher(object(), enabled=False,
+                                             channel=object(),
+                                             batch_size=3,
+                                             batch_interval=3600)
+        eventer.publisher = producer
+        eventer.enabled = True
+        eventer.send("ev1")
+        eventer.send("ev2")
+        self.assertFalse(producer.sent)
+        self.assertEqual(eventer.pending, 2)
+        eventer.send("ev3", foo="bar")
+        self.assertEqual(len(producer.sent), 1)
+        batch = producer.has_event("event-batch")
+        self.assertEqual([ev["type"] for ev in batch["events"]],
+                         ["ev1", "ev2", "ev3"])
+        self.assertEqual(batch["events"][2]["foo"], "bar")
+        self.assertEqual(batch["clock"], batch["events"][2]["clock"])
+        self.assertEqual(eventer.pending, 0)
+
+        eventer.send("ev4")
+        eventer.flush_batch()
+        self.assertEqual(eventer.pending, 1)
+        eventer.batch_interval = 0
+        eventer.flush_batch()
+        self.assertEqual(eventer.pending, 0)
+        self.assertEqual(len(producer.sent), 2)
+
+        eventer.batch_interval = 3600
+        eventer.send("ev5")
+        eventer.close()
+        self.assertEqual(len(producer.sent), 3)
+
+    def test_send_batch_buffer_while_offline(self):
+        producer = MockProducer()
+        producer.raise_on_publish = True
+        eventer = self.app.events.Dispatcher(object(), enabled=False,
+                                             batch_size=2)
+        eventer.publisher = producer
+        eventer.enabled = True
+        reported = []
+
+        def on_backpressure(pending):
+            reported.append(pending)
+        eventer.on_backpressure.add(on_backpressure)
+        eventer.send("ev1")
+        eventer.send("ev2", foo="bar")
+        self.assertEqual(reported, [2])
+        self.assertEqual(eventer.pending, 2)
+
+        producer.raise_on_publish = False
+        eventer.flush()
+        batch = producer.has_event("event-batch")
+        self.assertEqual([ev["type"] for ev in batch["events"]],
+                         ["ev1", "ev2"])
+
+    def test_batch_timer(self):
+        timer = Mock()
+        eventer = self.app.events.Dispatcher(object(), enabled=False,
+                                             batch_size=10,
+                                             batch_interval=0.5,
+                                             timer=timer)
+        eventer.channel = Mock()
+        eventer.enable()
+        timer.apply_interval.assert_called_with(500.0, eventer.flush_batch)
+        eventer.close()
+        timer.cancel.assert_called_with(timer.apply_interval.return_value)
+
     def test_enabled_disable(self):
         connection = self.app.broker_connection()
         channel = connection.channel()
@@ -120,6 +191,20 @@ class test_EventReceiver(Case):
         r._receive(message, object())
         self.assertTrue(got_event[0])
 
+    def test_process_batch(self):
+        message = {"type": "event-batch", "clock": 30,
+                   "events": [{"type": "world-war", "clock": 10},
+                              {"type": "world-peace", "clock": 20}]}
+        got_events = []
+
+        r = events.EventReceiver(object(),
+                                 handlers={"*": got_events.append},
+                                 node_id="celery.tests")
+        r._receive(message, object())
+        self.assertEqual([ev["type"] for ev in got_events],
+                         ["world-war", "world-peace"])
+        self.assertGreaterEqual(self.app.clock.value, 20)
+
     def test_catch_all_event(self):
 
         message = {"type": "world-war"}
@@ -306,6 +306,45 @@ class test_State(Case):
         self.assertEqual(len(r.state.tasks_by_type("task1")), 10)
         self.assertEqual(len(r.state.tasks_by_type("task2")), 10)
 
+    def test_tasks_by_type_limit(self):
+        r = ev_snapshot(State())
+        last = [ev["uuid"] for ev in r.events
+                    if ev.get("name") == "task1"][-3:]
+        r.play()
+        tasks = r.state.tasks_by_type("task1", limit=3)
+        self.assertEqual(len(tasks), 3)
+        self.assertItemsEqual([uuid for uuid, _ in tasks], last)
+
+    def test_tasks_by_state(self):
+        r = ev_snapshot(State())
+        tid = r.events[-1]["uuid"]
+        r.play()
+        r.state.event(Event("task-started", uuid=tid, hostname="utest1"))
+        self.assertEqual(len(r.state.tasks_by_state(states.RECEIVED)), 19)
+        self.assertEqual(r.state.tasks_by_state(states.STARTED),
+                         [(tid, r.state.tasks[tid])])
+        self.assertEqual(r.state.tasks_by_state(states.SUCCESS), [])
+
+    def test_indexes_pruned_on_eviction(self):
+        r = ev_snapshot(State(max_tasks_in_memory=5))
+        r.play()
+        self.assertEqual(len(r.state.tasks), 5)
+        self.assertEqual(len(r.state.tasks_by_timestamp()), 5)
+        self.assertEqual(len(r.state.tasks_by_type("task1")) +
+                         len(r.state.tasks_by_type("task2")), 5)
+        self.assertEqual(len(r.state._index_keys), 5)
+
+    def test_indexes_after_clear_tasks(self):
+        r = ev_snapshot(State())
+        tid = r.events[-1]["uuid"]
+        r.play()
+        r.state.event(Event("task-succeeded", uuid=tid, hostname="utest1"))
+        r.state.clear_tasks()
+        self.assertEqual(len(r.state.tasks_by_timestamp()), 19)
+        self.assertFalse(r.state.tasks_by_state(states.SUCCESS))
+        r.state.clear_tasks(ready=False)
+        self.assertFalse(r.state.task_types())
+
     def test_alive_workers(self):
         r = ev_snapshot(State())
         r.play()
@@ -329,6 +368,29 @@ class test_State(Case):
                                                 "uuid": "x",
                                                 "hostname": "y"})
 
+    def test_tasks_sent_batch(self):
+        s = State()
+        tid1, tid2 = uuid(), uuid()
+        s.event(Event("tasks-sent", hostname="utest1", tasks=[
+            {"uuid": tid1, "name": "task1", "args": "()", "kwargs": "{}"},
+            {"uuid": tid2, "name": "task1", "args": "(1, )"}]))
+        self.assertEqual(s.tasks[tid1].state, states.PENDING)
+        self.assertEqual(s.tasks[tid2].args, "(1, )")
+        self.assertEqual(s.tasks[tid2].worker.hostname, "utest1")
+        self.assertEqual(s.event_count, 1)
+
+    def test_event_batch(self):
+        s = State()
+        tid = uuid()
+        s.event(Event("event-batch", hostname="utest1", events=[
+            Event("task-received", uuid=tid, name="task1",
+                  args="()", kwargs="{}", hostname="utest1"),
+            Event("task-started", uuid=tid, hostname="utest1"),
+            Event("worker-heartbeat", hostname="utest1")]))
+        self.assertEqual(s.tasks[tid].state, states.STARTED)
+        self.assertTrue(s.workers["utest1"].alive)
+        self.assertEqual(s.event_count, 3)
+
     def test_callback(self):
         scratch = {}
 
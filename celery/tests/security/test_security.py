@@ -79,6 +79,34 @@ class test_security(SecurityCase):
             dis.assert_called_with(["json"])
             reg.assert_called_with("A", "B", store)
 
+    @patch("celery.security.register_auth")
+    @patch("celery.security.disable_untrusted_serializers")
+    def test_setup_registry_session_key(self, dis, reg):
+        reads = iter(["secret\n", "A", "B"])
+
+        def effect(*args):
+            m = Mock()
+            m.read.return_value = reads.next()
+            return m
+
+        with mock_open(side_effect=effect):
+            store = Mock()
+            setup_security(["json"], "KEY", "CERT", store,
+                           session_key="SESSION")
+            reg.assert_called_with("A", "B", store, session_key="secret")
+
+    @patch("celery.security.register_auth")
+    @patch("celery.security.disable_untrusted_serializers")
+    def test_setup_registry_legacy_format(self, dis, reg):
+        with mock_open():
+            store = Mock()
+            setup_security(["json"], "KEY", "CERT", store,
+                           legacy_format=True)
+            self.assertTrue(reg.call_args[1]["legacy_format"])
+            with self.assertRaises(ImproperlyConfigured):
+                setup_security(["json"], "KEY", "CERT", store,
+                               session_key="SESSION", legacy_format=True)
+
     def test_security_conf(self):
         current_app.conf.CELERY_TASK_SERIALIZER = 'auth'
 
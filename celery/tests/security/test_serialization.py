@@ -2,7 +2,8 @@ from __future__ import absolute_import
 
 from celery.exceptions import SecurityError
 
-from celery.security.serialization import SecureSerializer, register_auth
+from celery.security.serialization import (SecureSerializer, register_auth,
+                                           b64encode, b64decode, HMAC, MAGIC)
 from celery.security.certificate import Certificate, CertStore
 from celery.security.key import PrivateKey
 from kombu.serialization import registry
@@ -13,11 +14,12 @@ from .case import SecurityCase
 
 class test_SecureSerializer(SecurityCase):
 
-    def _get_s(self, key, cert, certs):
+    def _get_s(self, key, cert, certs, **kwargs):
         store = CertStore()
         for c in certs:
             store.add_cert(Certificate(c))
-        return SecureSerializer(PrivateKey(key), Certificate(cert), store)
+        return SecureSerializer(PrivateKey(key), Certificate(cert), store,
+                                **kwargs)
 
     def test_serialize(self):
         s = self._get_s(KEY1, CERT1, [CERT1])
@@ -50,6 +52,88 @@ class test_SecureSerializer(SecurityCase):
         s2 = self._get_s(KEY2, CERT2, [CERT1])
         self.assertEqual(s2.deserialize(s1.serialize("foo")), "foo")
 
+    def test_binary_framing(self):
+        s = self._get_s(KEY1, CERT1, [CERT1])
+        data = s.serialize({"foo": "bar" * 1000})
+        self.assertTrue(data.startswith(MAGIC))
+        self.assertEqual(s.deserialize(data), {"foo": "bar" * 1000})
+        # tampered body
+        self.assertRaises(SecurityError, s.deserialize,
+                          data[:-3] + "baz")
+        # truncated message
+        self.assertRaises(SecurityError, s.deserialize, data[:20])
+
+    def test_deserialize_legacy_framing(self):
+        s = self._get_s(KEY1, CERT1, [CERT1])
+        body = '"foo"'
+        data = b64encode("\x00\x01".join([Certificate(CERT1).get_id(),
+                                           PrivateKey(KEY1).sign(body, "sha1"),
+                                           "application/json", "utf-8",
+                                           body]))
+        self.assertEqual(s.deserialize(data), "foo")
+        self.assertEqual(s.deserialize(unicode(data)), "foo")
+
+    def test_session_key(self):
+        s1 = self._get_s(KEY1, CERT1, [CERT2], session_key="secret")
+        s2 = self._get_s(KEY2, CERT2, [CERT1], session_key="secret")
+        data = s1.serialize("foo")
+        self.assertEqual(s1._unpack(data)["mode"], HMAC)
+        self.assertEqual(s2.deserialize(data), "foo")
+        # signed messages are still accepted.
+        self.assertEqual(s2.deserialize(
+                self._get_s(KEY1, CERT1, []).serialize("bar")), "bar")
+
+    def test_session_key_mismatch(self):
+        s1 = self._get_s(KEY1, CERT1, [CERT1], session_key="secret")
+        s2 = self._get_s(KEY1, CERT1, [CERT1], session_key="other")
+        s3 = self._get_s(KEY1, CERT1, [CERT1])
+        data = s1.serialize("foo")
+        self.assertRaises(SecurityError, s2.deserialize, data)
+        self.assertRaises(SecurityError, s3.deserialize, data)
+
+    def test_session_key_authenticates_fields(self):
+        s1 = self._get_s(KEY1, CERT1, [CERT1, CERT2], session_key="secret")
+        s2 = self._get_s(KEY2, CERT2, [CERT1, CERT2], session_key="secret")
+        data, other = s1.serialize("foo"), s2.serialize("foo")
+        p1, p2 = s1._unpack(data), s1._unpack(other)
+        # claiming another signer with the same MAC.
+        self.assertRaises(SecurityError, s1.deserialize,
+            s1._pack(p1["body"], p1["content_type"], p1["content_encoding"],
+                     signer=p2["signer"], signature=p1["signature"],
+                     mode=HMAC))
+        # changing the content type.
+        self.assertRaises(SecurityError, s1.deserialize,
+            s1._pack(p1["body"], "application/x-yaml",
+                     p1["content_encoding"], signer=p1["signer"],
+                     signature=p1["signature"], mode=HMAC))
+
+    def test_legacy_format(self):
+        s1 = self._get_s(KEY1, CERT1, [CERT1], legacy_format=True)
+        data = s1.serialize("foo")
+        self.assertFalse(data.startswith(MAGIC))
+        self.assertEqual(b64decode(data).split("\x00\x01")[-1], '"foo"')
+        self.assertEqual(self._get_s(KEY1, CERT1, [CERT1]).deserialize(data),
+                         "foo")
+        with self.assertRaises(ValueError):
+            self._get_s(KEY1, CERT1, [CERT1], legacy_format=True,
+                        session_key="secret")
+
+    def test_session_key_unknown_source(self):
+        s1 = self._get_s(KEY1, CERT1, [CERT2], session_key="secret")
+        self.assertRaises(SecurityError,
+                          s1.deserialize, s1.serialize("foo"))
+
+    def test_verified_certificates_are_cached(self):
+        s = self._get_s(KEY1, CERT1, [CERT1], cert_cache_size=1)
+        signer = Certificate(CERT1).get_id()
+        self.assertRaises(SecurityError, s.deserialize,
+                          self._get_s(KEY2, CERT1, []).serialize("foo"))
+        self.assertNotIn(signer, s._verified)
+        s.deserialize(s.serialize("foo"))
+        self.assertIn(signer, s._verified)
+        s._cert_store = CertStore()
+        self.assertEqual(s.deserialize(s.serialize("bar")), "bar")
+
     def test_register_auth(self):
         register_auth(KEY1, CERT1, '')
         self.assertIn('application/data', registry._decoders)
@@ -176,7 +176,55 @@ class test_TaskBucket(Case):
         x.buckets = {1: Mock()}
         x.buckets[1].get_nowait.side_effect = buckets.RateLimitExceeded()
         x.buckets[1].expected_time.return_value = 0
-        x._get()
+        x._ready.append(1)
+        x._scheduled.add(1)
+        remaining, item = x._get()
+        self.assertTrue(remaining)
+        self.assertIsNone(item)
+        self.assertEqual(x._waiting[0][1], 1)
+
+    def test_get_throttled_bucket_is_not_polled(self):
+        x = buckets.TaskBucket(task_registry=self.registry)
+        x.buckets = {1: Mock()}
+        x._waiting.append((time.time() + 100, 1))
+        x._scheduled.add(1)
+        remaining, item = x._get()
+        self.assertGreater(remaining, 90)
+        self.assertFalse(x.buckets[1].get_nowait.called)
+
+    def test_get_throttled_bucket_when_due(self):
+        x = buckets.TaskBucket(task_registry=self.registry)
+        x.buckets = {1: Mock()}
+        x.buckets[1].qsize.return_value = 0
+        x._waiting.append((time.time() - 1, 1))
+        x._scheduled.add(1)
+        remaining, item = x._get()
+        self.assertEqual(remaining, 0)
+        self.assertIs(item, x.buckets[1].get_nowait.return_value)
+        self.assertNotIn(1, x._scheduled)
+
+    def test_get_skips_empty_and_removed_buckets(self):
+        x = buckets.TaskBucket(task_registry=self.registry)
+        x.buckets = {1: Mock()}
+        x.buckets[1].get_nowait.side_effect = buckets.Empty()
+        x._ready.extend([1, 2])
+        x._scheduled.update([1, 2])
+        with self.assertRaises(buckets.Empty):
+            x._get()
+        self.assertFalse(x._scheduled)
+
+    @skip_if_disabled
+    def test_throttled_bucket_doesnt_delay_others(self):
+        b = buckets.TaskBucket(task_registry=self.registry)
+        b.put(MockJob(uuid(), TaskC.name, [1], {}))
+        b.put(MockJob(uuid(), TaskC.name, [2], {}))
+        self.assertEqual(b.get().args, [1])
+        job = MockJob(uuid(), TaskB.name, [3], {})
+        b.put(job)
+        time_start = time.time()
+        self.assertEqual(b.get(), job)
+        self.assertLess(time.time() - time_start, 0.5)
+        self.assertEqual(b.qsize(), 1)
 
     @skip_if_disabled
     def test_refresh(self):
@@ -316,6 +364,9 @@ class test_TaskBucket(Case):
         self.assertFalse(x.empty())
         x.clear()
         self.assertTrue(x.empty())
+        self.assertFalse(x._scheduled)
+        with self.assertRaises(buckets.Empty):
+            x.get_nowait()
 
     @skip_if_disabled
     def test_items(self):
@@ -47,6 +47,20 @@ def patch_unlock_retry():
     unlock.retry = prev
 
 
+@contextmanager
+def patch_ready(is_ready):
+    polled = []
+
+    def ready(self):
+        polled.append(self.id)
+        return is_ready(self)
+    prev, AsyncResult.ready = AsyncResult.ready, ready
+    try:
+        yield polled
+    finally:
+        AsyncResult.ready = prev
+
+
 class test_unlock_chord_task(AppCase):
 
     @patch("celery.result.TaskSetResult")
@@ -65,35 +79,51 @@ class test_unlock_chord_task(AppCase):
         callback_s = callback.s()
         try:
             with patch_unlock_retry() as (unlock, retry):
-                subtask, canvas.maybe_subtask = canvas.maybe_subtask, passthru
-                try:
-                    unlock("setid", callback_s,
-                           result=map(AsyncResult, [1, 2, 3]))
-                finally:
-                    canvas.maybe_subtask = subtask
+                with patch_ready(lambda r: True):
+                    subtask, canvas.maybe_subtask = (canvas.maybe_subtask,
+                                                     passthru)
+                    try:
+                        unlock("setid", callback_s, result=[1, 2, 3])
+                    finally:
+                        canvas.maybe_subtask = subtask
                 callback.apply_async.assert_called_with(([2, 4, 8, 6], ), {})
                 # did not retry
                 self.assertFalse(retry.call_count)
         finally:
             result.TaskSetResult = pts
 
-    @patch("celery.result.TaskSetResult")
-    def test_when_not_ready(self, TaskSetResult):
+    def test_when_not_ready(self):
         with patch_unlock_retry() as (unlock, retry):
-
-            class NeverReady(TSR):
-                is_ready = False
-
-            pts, result.TaskSetResult = result.TaskSetResult, NeverReady
-            try:
+            with patch_ready(lambda r: r.id < 2) as polled:
                 callback = Mock()
                 unlock("setid", callback, interval=10, max_retries=30,
-                            result=map(AsyncResult, [1, 2, 3]))
+                            result=[1, 2, 3], ready=0)
                 self.assertFalse(callback.delay.call_count)
-                # did retry
-                unlock.retry.assert_called_with(countdown=10, max_retries=30)
-            finally:
-                result.TaskSetResult = pts
+                self.assertEqual(polled, [1, 2])
+                # did retry, and will not poll the first task again.
+                unlock.retry.assert_called_with(("setid", callback), {
+                        "interval": 10, "propagate": False,
+                        "max_retries": 30, "result": [1, 2, 3],
+                        "max_interval": 30, "ready": 1},
+                    countdown=10, max_retries=30)
+
+                del polled[:]
+                unlock("setid", callback, interval=10, result=[1, 2, 3],
+                       ready=1)
+                self.assertEqual(polled, [2])
+
+    def test_when_not_ready_backoff(self):
+        with patch_unlock_retry() as (unlock, retry):
+            with patch_ready(lambda r: False):
+                for retries, countdown in ((1, 2), (3, 8), (5, 30),
+                                           (100, 30)):
+                    unlock.request.update({"retries": retries})
+                    try:
+                        unlock("setid", Mock(), interval=1, result=[1])
+                    finally:
+                        unlock.request.clear()
+                    self.assertEqual(retry.call_args[1]["countdown"],
+                                     countdown)
 
     def test_is_in_registry(self):
         self.assertIn("celery.chord_unlock", current_app.tasks)
@@ -1,11 +1,14 @@
 from __future__ import absolute_import
 from __future__ import with_statement
 
+from mock import Mock
+
 from celery import states
 from celery.app import app_or_default
 from celery.utils import uuid
 from celery.utils.serialization import pickle
 from celery.result import AsyncResult, EagerResult, TaskSetResult, ResultSet
+from celery.result import from_serializable
 from celery.exceptions import TimeoutError
 from celery.task import task
 from celery.task.base import Task
@@ -275,6 +278,31 @@ class test_TaskSetResult(AppCase):
         res = ts.join_native()
         self.assertEqual(res, range(10))
 
+    def test_join_native_callback(self):
+        backend = SimpleBackend()
+        subtasks = [AsyncResult(uuid(), backend=backend)
+                        for i in range(10)]
+        ts = TaskSetResult(uuid(), subtasks)
+        backend.ids = [subtask.id for subtask in subtasks]
+        got = []
+        self.assertIsNone(ts.join_native(
+                callback=lambda id, value: got.append((id, value))))
+        self.assertEqual(got, zip(backend.ids, range(10)))
+
+    def test_join_native_duplicate_members(self):
+        backend = SimpleBackend()
+        subtask = AsyncResult(uuid(), backend=backend)
+        ts = TaskSetResult(uuid(), [subtask, subtask])
+        backend.ids = [subtask.id]
+        self.assertEqual(ts.join_native(), [0, 0])
+
+    def test_iter_native_max_interval(self):
+        backend = Mock()
+        ts = TaskSetResult(uuid(), [AsyncResult(uuid(), backend=backend)])
+        ts.iter_native(interval=0.1, max_interval=2)
+        backend.get_many.assert_called_with([ts.results[0].id],
+                timeout=None, interval=0.1, max_interval=2)
+
     def test_iter_native(self):
         backend = SimpleBackend()
         subtasks = [AsyncResult(uuid(), backend=backend)
@@ -340,6 +368,25 @@ class test_TaskSetResult(AppCase):
     def test_completed_count(self):
         self.assertEqual(self.ts.completed_count(), len(self.ts))
 
+    def test_lazy_nodes(self):
+        ids = [uuid() for i in xrange(3)]
+        nodes = [(id, None) for id in ids]
+        ts = from_serializable((uuid(), nodes))
+        self.assertEqual(len(ts), 3)
+        self.assertIs(ts.serializable()[1], nodes)
+        ts2 = pickle.loads(pickle.dumps(ts))
+        self.assertIs(ts2._results, None)
+        self.assertEqual([r.id for r in ts2.results], ids)
+        self.assertEqual([r.id for r in ts.results], ids)
+        self.assertIsNone(ts._nodes)
+        self.assertEqual(ts.serializable(), (ts.id, nodes))
+        self.assertEqual(ts, ts2)
+
+    def test_lazy_nodes_replaced(self):
+        ts = TaskSetResult(uuid(), nodes=[(uuid(), None)])
+        ts.results = []
+        self.assertEqual(len(ts), 0)
+
 
 class test_pending_AsyncResult(AppCase):
 
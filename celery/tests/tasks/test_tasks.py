@@ -4,6 +4,8 @@ from __future__ import with_statement
 from datetime import datetime, timedelta
 from functools import wraps
 
+from mock import Mock
+
 from celery import task
 from celery.task import current
 from celery.app import app_or_default
@@ -331,6 +333,89 @@ class test_tasks(Case):
 
         self.assertTrue(dispatcher[0])
 
+    def test_apply_many(self):
+        T1 = self.createTask("c.unittest.t.t1")
+        consumer = T1.get_consumer()
+        consumer.discard_all()
+
+        res = T1.apply_many([((), {"name": "George Costanza"}, None),
+                             ((), {"name": "Elaine M. Benes"},
+                              {"countdown": 10})])
+        self.assertEqual(len(res), 2)
+        self.assertNextTaskDataEqual(consumer, res.results[0], T1.name,
+                name="George Costanza")
+        self.assertNextTaskDataEqual(consumer, res.results[1], T1.name,
+                name="Elaine M. Benes", test_eta=True)
+        self.assertIsNone(consumer.fetch())
+
+    def test_apply_many_routes_once(self):
+        T1 = self.createTask("c.unittest.t.t1")
+        router = T1.app.amqp.Router()
+        router.route = Mock()
+        router.route.return_value = {"exchange": "celery",
+                                     "routing_key": "celery"}
+        pub = Mock()
+        sent = []
+
+        def delay_tasks(name, requests, **kwargs):
+            sent.extend(requests)
+        pub.delay_tasks.side_effect = delay_tasks
+        res = T1.apply_many([((i, ), {}, None) for i in xrange(10)] +
+                            [((10, ), {}, {"queue": "foo"})],
+                            publisher=pub, router=router)
+        self.assertEqual(router.route.call_count, 2)
+        self.assertEqual(len(sent), 11)
+        self.assertEqual([opts["task_id"] for _, _, opts in sent],
+                         [r.id for r in res.results])
+        self.assertEqual(sent[0][2]["exchange"], "celery")
+
+    def test_apply_many_without_results(self):
+        T1 = self.createTask("c.unittest.t.t1")
+        pub = Mock()
+        sent = []
+
+        def delay_tasks(name, requests, **kwargs):
+            sent.extend(requests)
+        pub.delay_tasks.side_effect = delay_tasks
+        T1.AsyncResult = Mock()
+        self.assertIsNone(T1.apply_many([((i, ), {}, None)
+                                            for i in xrange(10)],
+                                        publisher=pub, results=False))
+        self.assertEqual(len(sent), 10)
+        self.assertFalse(T1.AsyncResult.called)
+
+    def test_apply_many_custom_router(self):
+        T1 = self.createTask("c.unittest.t.t1")
+
+        class Router(object):
+
+            def route_for_task(self, task, args=None, kwargs=None):
+                pass
+
+        router = T1.app.amqp.Router()
+        router.routes = [Router()]
+        router.route = Mock()
+        router.route.return_value = {}
+        pub = Mock()
+        requests = [((i, ), {}, None) for i in xrange(10)]
+
+        def delay_tasks(name, requests, **kwargs):
+            list(requests)
+        pub.delay_tasks.side_effect = delay_tasks
+        T1.apply_many(requests, publisher=pub, router=router)
+        self.assertEqual(router.route.call_count, 10)
+
+    def test_apply_many_eager(self):
+        T1 = self.createTask("c.unittest.t.t1")
+        T1.app.conf.CELERY_ALWAYS_EAGER = True
+        try:
+            res = T1.apply_many([((), {}, None), ((), {}, {"task_id": "x"})])
+        finally:
+            T1.app.conf.CELERY_ALWAYS_EAGER = False
+        self.assertIsInstance(res.results[0], EagerResult)
+        self.assertEqual(res.results[1].id, "x")
+        self.assertTrue(res.successful())
+
     def test_get_publisher(self):
         connection = app_or_default().broker_connection()
         p = increment_counter.get_publisher(connection, auto_declare=False,
@@ -589,6 +674,14 @@ class test_crontab_parser(Case):
         self.assertEqual(crontab_parser().parse('1-9/2'),
                 set([1, 3, 5, 7, 9]))
 
+    def test_parse_with_min(self):
+        self.assertEqual(crontab_parser(31, 1).parse('*'),
+                         set(range(1, 32)))
+        self.assertEqual(crontab_parser(12, 1).parse('*/3'),
+                         set([1, 4, 7, 10]))
+        self.assertEqual(crontab_parser(12, 1).parse('10-12'),
+                         set([10, 11, 12]))
+
     def test_parse_errors_on_empty_string(self):
         with self.assertRaises(ParseException):
             crontab_parser(60).parse('')
@@ -622,6 +715,10 @@ class test_crontab_parser(Case):
         self.assertEqual(crontab(minute="1", hour="2", day_of_week="5"),
                          crontab(minute="1", hour="2", day_of_week="5"))
         self.assertNotEqual(crontab(minute="1"), crontab(minute="2"))
+        self.assertNotEqual(crontab(day_of_month="1"),
+                            crontab(day_of_month="2"))
+        self.assertNotEqual(crontab(month_of_year="1"),
+                            crontab(month_of_year="2"))
         self.assertFalse(object() == crontab(minute="1"))
         self.assertFalse(crontab(minute="1") == object())
 
@@ -675,6 +772,70 @@ class test_crontab_remaining_estimate(Case):
                                    datetime(2010, 9, 11, 14, 30, 15))
         self.assertEqual(next, datetime(2010, 9, 13, 0, 5))
 
+    def test_day_of_month(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_month="1,15"),
+                                   datetime(2010, 9, 11, 14, 30, 15))
+        self.assertEqual(next, datetime(2010, 9, 15, 0, 0))
+
+    def test_day_of_month_not_this_month(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_month=31),
+                                   datetime(2010, 9, 11, 14, 30, 15))
+        self.assertEqual(next, datetime(2010, 10, 31, 0, 0))
+
+    def test_month_of_year(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_month=1,
+                                           month_of_year="*/3"),
+                                   datetime(2010, 10, 1, 0, 0, 15))
+        self.assertEqual(next, datetime(2011, 1, 1, 0, 0))
+
+    def test_month_of_year_later_month(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           month_of_year=2),
+                                   datetime(2012, 1, 20, 12))
+        self.assertEqual(next, datetime(2012, 2, 1, 0, 0))
+
+    def test_day_of_month_later_month(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_month=5,
+                                           month_of_year="3,6"),
+                                   datetime(2012, 4, 10, 0, 0))
+        self.assertEqual(next, datetime(2012, 6, 5, 0, 0))
+
+    def test_day_of_month_and_day_of_week(self):
+        # friday the 13th.
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_week="fri",
+                                           day_of_month=13),
+                                   datetime(2010, 9, 11, 14, 30, 15))
+        self.assertEqual(next, datetime(2011, 5, 13, 0, 0))
+
+    def test_leap_day(self):
+        next = self.next_ocurrance(crontab(minute=0, hour=0,
+                                           day_of_month=29,
+                                           month_of_year=2),
+                                   datetime(2010, 9, 11, 14, 30, 15))
+        self.assertEqual(next, datetime(2012, 2, 29, 0, 0))
+
+    def test_never_runs(self):
+        c = crontab(day_of_month=30, month_of_year=2)
+        with self.assertRaises(ValueError):
+            c.next_run_at(datetime(2010, 9, 11, 14, 30, 15))
+
+    def test_remembers_next_run_at(self):
+        c = crontab(minute=[5, 42])
+        last_run_at = datetime(2010, 9, 11, 14, 30, 15)
+        c.nowfun = lambda: last_run_at
+        c.next_run_at = Mock(return_value=datetime(2010, 9, 11, 14, 42))
+        c.remaining_estimate(last_run_at)
+        self.assertEqual(c.remaining_estimate(last_run_at),
+                         timedelta(seconds=11 * 60 + 45))
+        self.assertEqual(c.next_run_at.call_count, 1)
+        c.remaining_estimate(datetime(2010, 9, 11, 14, 30, 15))
+        self.assertEqual(c.next_run_at.call_count, 2)
+
 
 class test_crontab_is_due(Case):
 
@@ -748,6 +909,34 @@ class test_crontab_is_due(Case):
             else:
                 break
 
+    def test_crontab_spec_dom_formats(self):
+        c = crontab(day_of_month=5)
+        self.assertEqual(c.day_of_month, set([5]))
+        c = crontab(day_of_month='1-7,15-21')
+        self.assertEqual(c.day_of_month, set(range(1, 8) + range(15, 22)))
+        c = crontab()
+        self.assertEqual(c.day_of_month, set(range(1, 32)))
+
+    def test_crontab_spec_invalid_dom(self):
+        with self.assertRaises(ValueError):
+            crontab(day_of_month=0)
+        with self.assertRaises(ValueError):
+            crontab(day_of_month='29-32')
+
+    def test_crontab_spec_moy_formats(self):
+        c = crontab(month_of_year=1)
+        self.assertEqual(c.month_of_year, set([1]))
+        c = crontab(month_of_year='*/2')
+        self.assertEqual(c.month_of_year, set([1, 3, 5, 7, 9, 11]))
+        c = crontab()
+        self.assertEqual(c.month_of_year, set(range(1, 13)))
+
+    def test_crontab_spec_invalid_moy(self):
+        with self.assertRaises(ValueError):
+            crontab(month_of_year=13)
+        with self.assertRaises(ValueError):
+            crontab(month_of_year='0-2')
+
     def test_crontab_spec_invalid_dow(self):
         with self.assertRaises(ValueError):
             crontab(day_of_week='fooday-barday')
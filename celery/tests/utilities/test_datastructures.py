@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 from __future__ import with_statement
 
+import pickle
 import sys
 
 from celery.datastructures import (ExceptionInfo, LRUCache, LimitedSet,
@@ -167,6 +168,58 @@ class test_LimitedSet(Case):
         s.add("foo")
         self.assertIsInstance(s.as_dict(), dict)
 
+    def test_expires_oldest_first(self):
+        s = LimitedSet(maxlen=3)
+        for i, n in enumerate(["foo", "bar", "baz"]):
+            s.add(n, now=100 + i)
+        s.add("foo", now=110)  # re-adding makes it the newest member.
+        s.add("xuzzy", now=111)
+        self.assertNotIn("bar", s)
+        self.assertEqual(s.first, ("baz", 102))
+        self.assertEqual(len(s), 3)
+
+    def test_does_not_expire_unexpired(self):
+        s = LimitedSet(maxlen=1, expires=3600)
+        s.add("foo")
+        s.add("bar")
+        self.assertIn("foo", s)
+        self.assertIn("bar", s)
+
+    def test_first_skips_removed(self):
+        s = LimitedSet()
+        s.add("foo", now=1)
+        s.add("bar", now=2)
+        s.pop_value("foo")
+        self.assertEqual(s.first, ("bar", 2))
+        s.pop_value("bar")
+        self.assertIsNone(s.first)
+
+    def test_heap_is_compacted(self):
+        s = LimitedSet()
+        for i in xrange(1000):
+            s.add("foo", now=i + 1)
+        self.assertLess(len(s._heap), 200)
+        self.assertEqual(s.first, ("foo", 1000))
+
+    def test_update_keeps_timestamps(self):
+        s = LimitedSet(maxlen=2)
+        s.update({"foo": 1, "bar": 2})
+        self.assertEqual(s.as_dict(), {"foo": 1, "bar": 2})
+        s.update({"foo": 0})
+        self.assertEqual(s.as_dict()["foo"], 1)
+        s.update({"baz": 3})
+        self.assertItemsEqual(list(s), ["bar", "baz"])
+
+    def test_pickle(self):
+        s = LimitedSet(maxlen=10, expires=30)
+        s.add("foo", now=2)
+        s.add("bar", now=1)
+        s2 = pickle.loads(pickle.dumps(s))
+        self.assertEqual(s2.maxlen, 10)
+        self.assertEqual(s2.expires, 30)
+        self.assertEqual(s2.as_dict(), s.as_dict())
+        self.assertEqual(s2.first, ("bar", 1))
+
 
 class test_LRUCache(Case):
 
@@ -212,7 +265,7 @@ class test_LRUCache(Case):
             def run(self):
                 while not self._is_shutdown.isSet():
                     try:
-                        self.cache.data.popitem(last=False)
+                        self.cache.popitem(last=False)
                     except KeyError:
                         break
                 self._is_stopped.set()
@@ -244,6 +297,88 @@ class test_LRUCache(Case):
         c.update(a=1, b=2, c=3)
         self.assertTrue(c.items())
 
+    def test_stats(self):
+        x = LRUCache(2)
+        x["a"], x["b"] = 1, 2
+        x["a"]
+        self.assertIsNone(x.get("c"))
+        x["c"] = 3
+        self.assertEqual((x.hits, x.misses, x.evictions), (1, 1, 1))
+        self.assertEqual(x.keys(), ["a", "c"])
+
+    def test_on_evict(self):
+        evicted = []
+        x = LRUCache(2, on_evict=lambda k, v: evicted.append((k, v)))
+        x["a"], x["b"], x["a"], x["c"] = 1, 2, 3, 4
+        self.assertEqual(evicted, [("b", 2)])
+        self.assertEqual(x.items(), [("a", 3), ("c", 4)])
+
+    def test_on_evict_incr(self):
+        evicted = []
+        x = LRUCache(weigher=lambda k, v: len(v), max_weight=3,
+                     on_evict=lambda k, v: evicted.append((k, v)))
+        x["a"], x["b"] = "99", "9"
+        self.assertEqual(x.incr("b"), 10)
+        self.assertEqual(evicted, [("a", "99")])
+        self.assertEqual(x.evictions, 1)
+        self.assertEqual(x.items(), [("b", "10")])
+
+    def test_weight(self):
+        x = LRUCache(weigher=lambda k, v: len(v), max_weight=10)
+        x["a"], x["b"] = "xxxx", "yyyy"
+        self.assertEqual(x.weight, 8)
+        x["c"] = "zzzz"
+        self.assertEqual(x.keys(), ["b", "c"])
+        x["b"] = "y"
+        self.assertEqual(x.weight, 5)
+        x["d"] = "w" * 11
+        self.assertNotIn("d", x)
+        self.assertFalse(x)
+        self.assertEqual(x.weight, 0)
+
+    def test_not_thread_safe(self):
+        x = LRUCache(2, thread_safe=False)
+        self.assertIsNone(x.mutex)
+        x["a"], x["b"], x["c"] = 1, 2, 3
+        self.assertEqual(x["b"], 2)
+        self.assertEqual(x.pop("b"), 2)
+        self.assertEqual(x.popitem(), ("c", 3))
+        x["d"] = "10"
+        self.assertEqual(x.incr("d"), 11)
+        x.clear()
+        self.assertFalse(x)
+
+    def test_peek_does_not_change_order(self):
+        x = LRUCache(3)
+        x.update(a=1)
+        x["b"], x["c"] = 2, 3
+        self.assertEqual(x.peek("a"), 1)
+        self.assertIsNone(x.peek("xxx"))
+        self.assertEqual(x.keys()[0], "a")
+        self.assertEqual(x.hits, 0)
+
+    def test_most_recent(self):
+        x = LRUCache()
+        x["a"], x["b"], x["c"] = 1, 2, 3
+        x["a"]
+        self.assertEqual(x.most_recent(2), [("a", 1), ("c", 3)])
+        self.assertEqual(len(x.most_recent()), 3)
+
+    def test_pop_popitem_delitem(self):
+        x = LRUCache()
+        x["a"], x["b"], x["c"] = 1, 2, 3
+        self.assertEqual(x.popitem(last=False), ("a", 1))
+        self.assertEqual(x.pop("xxx", None), None)
+        with self.assertRaises(KeyError):
+            x.pop("xxx")
+        del(x["b"])
+        self.assertEqual(x.keys(), ["c"])
+        self.assertEqual(x.setdefault("c", 10), 3)
+        self.assertEqual(x.setdefault("d", 10), 10)
+        x.clear()
+        with self.assertRaises(KeyError):
+            x.popitem()
+
 
 class test_AttributeDict(Case):
 
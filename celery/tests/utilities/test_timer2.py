@@ -63,6 +63,85 @@ class test_Schedule(Case):
         self.assertIsInstance(exc, OverflowError)
 
 
+class test_TimingWheelSchedule(Case):
+
+    def setUp(self):
+        self.s = timer2.TimingWheelSchedule(resolution=1, wheel_size=4)
+
+    def entry(self, s):
+        return timer2.Entry(lambda: None, (s, ), {})
+
+    def drain(self, s, now):
+        applied = []
+        with patch("celery.utils.timer2.time") as time:
+            time.return_value = now
+            it = iter(s)
+            while 1:
+                delay, entry = it.next()
+                if entry is None:
+                    return applied, delay
+                applied.append(entry.args[0])
+
+    def test_enter_levels(self):
+        now = time.time()
+        with patch("celery.utils.timer2.time") as _time:
+            _time.return_value = now
+            for secs in (0.5, 2, 30, 3000):
+                self.s.enter(self.entry(secs), now + secs)
+        self.assertEqual(len(self.s._queue), 1)
+        self.assertItemsEqual([level for level, _ in self.s._slots],
+                              [1, 3, 6])
+        self.assertFalse(self.s.empty())
+
+    def test_applied_in_order(self):
+        now = time.time()
+        for secs in (3000, 30, 0.5, 2.5, 2, 30.2):
+            self.s.enter(self.entry(secs), now + secs)
+        applied, delay = self.drain(self.s, now)
+        self.assertEqual(applied, [])
+        self.assertLessEqual(delay, 0.5)
+        self.assertEqual(self.drain(self.s, now + 3)[0], [0.5, 2, 2.5])
+        self.assertEqual(self.drain(self.s, now + 29.9)[0], [])
+        self.assertEqual(self.drain(self.s, now + 31)[0], [30, 30.2])
+        self.assertEqual(self.drain(self.s, now + 3001)[0], [3000])
+        self.assertTrue(self.s.empty())
+
+    def test_cancel(self):
+        now = time.time()
+        entries = [self.s.enter(self.entry(secs), now + secs)
+                        for secs in (0.5, 10, 20)]
+        entries[0].cancel()
+        entries[1].cancel()
+        self.assertEqual(self.drain(self.s, now + 30)[0], [20])
+        self.assertTrue(self.s.empty())
+
+    def test_info(self):
+        now = time.time()
+        for secs in (40, 0.5, 10, 3000, 5):
+            self.s.enter(self.entry(secs), now + secs)
+        self.assertEqual([i["item"].args[0] for i in self.s.info()],
+                         [0.5, 5, 10, 40, 3000])
+        self.assertEqual([i["item"].args[0] for i in self.s.info(1, 2)],
+                         [5, 10])
+        self.assertEqual([i["item"].args[0] for i in self.s.info(3, 5)],
+                         [40, 3000])
+        self.assertEqual(len(self.s.queue), 5)
+
+    def test_clear(self):
+        self.s.enter(self.entry(10), time.time() + 10)
+        self.s.clear()
+        self.assertTrue(self.s.empty())
+        self.assertFalse(self.s._expires)
+
+    def test_empty_yields_none(self):
+        self.assertEqual(self.drain(self.s, time.time()), ([], None))
+
+    def test_timer_precision(self):
+        t = timer2.TimingWheelTimer(precision=0.5)
+        self.assertIsInstance(t.schedule, timer2.TimingWheelSchedule)
+        self.assertEqual(t.schedule.max_interval, 0.5)
+
+
 class test_Timer(Case):
 
     @skip_if_quick
@@ -1,4 +1,5 @@
 from __future__ import absolute_import
+from __future__ import with_statement
 
 import sys
 
@@ -40,6 +41,136 @@ class MockPool(BasePool):
         return self._pool._processes
 
 
+class Simulation(object):
+    """Simulates tasks arriving at a worker, where every
+    task takes `service_time` seconds to process."""
+
+    def __init__(self, scaler, service_time=1.0, load=0.5):
+        self.scaler = scaler
+        self.service_time = service_time
+        self.now = 1000.0
+        self.running = {}
+        self.waiting = []
+        self.next_id = 0
+        scaler.policy.loadavg = lambda: load
+
+    def tick(self, arrivals, seconds=1.0):
+        """Advance time, then let the autoscaler make a decision."""
+        self.now += seconds
+        for task_id, done_at in self.running.items():
+            if done_at <= self.now:
+                del self.running[task_id]
+        for i in xrange(int(arrivals * seconds)):
+            self.waiting.append(self.next_id)
+            self.next_id += 1
+        while self.waiting and \
+                len(self.running) < self.scaler.processes:
+            self.running[self.waiting.pop(0)] = self.now + self.service_time
+            state.total_count["sim"] += 1
+        state.active_requests.clear()
+        state.active_requests.update(self.running)
+        state.reserved_requests.clear()
+        state.reserved_requests.update(self.running)
+        state.reserved_requests.update(self.waiting)
+        before = self.scaler.processes
+        self.scaler.maybe_scale(self.now)
+        return before, self.scaler.processes
+
+
+class test_PredictivePolicy(Case):
+
+    def setUp(self):
+        self.pool = MockPool(2)
+        self.scaler = autoscale.Autoscaler(self.pool, 20, 2, keepalive=1e-9)
+        self.sim = Simulation(self.scaler)
+
+    def tearDown(self):
+        state.total_count.pop("sim", None)
+        state.active_requests.clear()
+        state.reserved_requests.clear()
+
+    def run_ticks(self, n, arrivals):
+        steps = [self.sim.tick(arrivals) for i in xrange(n)]
+        for before, after in steps:
+            self.assertLessEqual(abs(after - before),
+                                 self.scaler.policy.max_step)
+        return steps
+
+    def test_grows_to_estimate_in_steps(self):
+        steps = self.run_ticks(30, arrivals=10)
+        self.assertEqual(steps[0], (2, 4))       # no estimate yet.
+        policy = self.scaler.policy
+        self.assertAlmostEqual(policy.arrival_rate, 10, delta=0.5)
+        self.assertAlmostEqual(policy.service_time, 1.0, delta=0.1)
+        # 10 tasks/s * 1s / 0.8 utilization
+        info = self.scaler.info()["policy"]
+        self.assertEqual(info["needed"], 13)
+        self.assertEqual(info["decision"]["reason"], "steady")
+        # the backlog from the burst is drained using a few extra
+        # processes, that are kept within the hysteresis band.
+        self.assertFalse(self.sim.waiting)
+        self.assertGreaterEqual(self.scaler.processes, 13)
+        self.assertLessEqual(self.scaler.processes, 13 / 0.75)
+
+    def test_no_thrashing(self):
+        self.run_ticks(30, arrivals=10)
+        processes = self.scaler.processes
+        for arrivals in (10, 11, 9) * 10:
+            self.assertEqual(self.sim.tick(arrivals),
+                             (processes, processes))
+
+    def test_shrinks_with_hysteresis(self):
+        self.run_ticks(30, arrivals=10)
+        self.run_ticks(30, arrivals=2)
+        self.assertEqual(self.scaler.policy.needed, 3)
+        self.assertGreaterEqual(self.scaler.processes, 3)
+        self.assertLessEqual(self.scaler.processes, 3 / 0.75)
+        self.run_ticks(30, arrivals=0)
+        self.assertEqual(self.scaler.processes, 2)    # min_concurrency.
+
+    def test_max_concurrency(self):
+        self.run_ticks(30, arrivals=100)
+        self.assertEqual(self.scaler.processes, 20)
+
+    def test_cpu_bound(self):
+        self.scaler.policy.loadavg = lambda: 2.0
+        self.run_ticks(10, arrivals=10)
+        self.assertEqual(self.scaler.processes, 2)
+        self.assertEqual(self.scaler.policy.decision["reason"], "cpu bound")
+
+    def test_grows_when_busy_before_estimate(self):
+        self.sim.service_time = 100.0
+        self.run_ticks(2, arrivals=4)
+        self.assertGreater(self.scaler.processes, 2)
+
+    def test_cold_start(self):
+        # --autoscale=10 starts the pool with no processes.
+        self.pool = MockPool(0)
+        self.scaler = autoscale.Autoscaler(self.pool, 10, 0, keepalive=1e-9)
+        self.sim = Simulation(self.scaler, load=2.0)
+        self.sim.waiting.extend(xrange(5))
+        self.sim.next_id = 5
+        self.assertEqual(self.sim.tick(0), (0, 2))
+        self.assertEqual(self.scaler.policy.decision["reason"], "grow")
+        self.scaler.policy.loadavg = lambda: 0.5
+        self.run_ticks(1, arrivals=0)
+        self.assertGreater(self.scaler.processes, 2)
+        # the backlog at the first sample is counted as arrivals.
+        self.assertEqual(self.scaler.policy.arrival_rate, 0.3 * 5)
+        self.run_ticks(5, arrivals=0)
+        self.assertFalse(self.sim.waiting)
+
+    def test_loadavg(self):
+        policy = autoscale.PredictivePolicy(self.scaler)
+        with patch("os.getloadavg") as getloadavg:
+            with patch("celery.worker.autoscale.cpu_count") as cpu_count:
+                getloadavg.return_value = (4.0, 1.0, 1.0)
+                cpu_count.return_value = 2
+                self.assertEqual(policy.loadavg(), 2.0)
+                getloadavg.side_effect = OSError()
+                self.assertIsNone(policy.loadavg())
+
+
 class test_Autoscaler(Case):
 
     def setUp(self):
@@ -68,7 +199,8 @@ class test_Autoscaler(Case):
 
     @sleepdeprived(autoscale)
     def test_scale(self):
-        x = autoscale.Autoscaler(self.pool, 10, 3)
+        x = autoscale.Autoscaler(self.pool, 10, 3,
+                                 policy=autoscale.ReservedPolicy)
         x.scale()
         self.assertEqual(x.pool.num_processes, 3)
         for i in range(20):
@@ -142,6 +274,20 @@ class test_Autoscaler(Case):
         self.assertEqual(info['max'], 10)
         self.assertEqual(info['min'], 3)
         self.assertEqual(info['current'], 3)
+        self.assertIn('policy', info)
+
+    def test_policy_by_name(self):
+        x = autoscale.Autoscaler(self.pool, 10, 3,
+                policy="celery.worker.autoscale.ReservedPolicy")
+        self.assertIsInstance(x.policy, autoscale.ReservedPolicy)
+        self.assertIsInstance(autoscale.Autoscaler(self.pool, 10).policy,
+                              autoscale.PredictivePolicy)
+
+    def test_Policy_interface(self):
+        policy = autoscale.Policy(Mock())
+        with self.assertRaises(NotImplementedError):
+            policy.target(time())
+        self.assertEqual(policy.info(), {})
 
     @patch("os._exit")
     def test_thread_crash(self, _exit):
@@ -247,6 +247,8 @@ class test_ControlPanel(Case):
                 consumer.eta_schedule.Entry(lambda x: x, (r, )),
                     datetime.now() + timedelta(seconds=10))
         self.assertTrue(panel.handle("dump_schedule"))
+        self.assertFalse(panel.handle("dump_schedule", {"start": 1,
+                                                         "limit": 10}))
 
     def test_dump_reserved(self):
         consumer = Consumer()
@@ -61,6 +61,34 @@ class test_Mediator(Case):
         m.body()
         self.assertEqual(got["value"], "Jerry Seinfeld")
 
+    def test_mediator_body_batch(self):
+        ready_queue = Queue()
+        got = []
+
+        def mycallback(tasks):
+            got.append([task.value for task in tasks])
+
+        m = Mediator(ready_queue, mycallback, batch_size=2)
+        for value in ("George", "Jerry", "Elaine"):
+            ready_queue.put(MockTask(value))
+        m.body()
+        m.body()
+        self.assertEqual(got, [["George", "Jerry"], ["Elaine"]])
+
+    def test_mediator_body_batch_revoked(self):
+        ready_queue = Queue()
+        callback = Mock()
+        m = Mediator(ready_queue, callback, batch_size=2)
+        t = MockTask("Jerry Seinfeld")
+        t.id = uuid()
+        revoked_tasks.add(t.id)
+        try:
+            ready_queue.put(t)
+            m.body()
+        finally:
+            revoked_tasks.pop_value(t.id)
+        self.assertFalse(callback.called)
+
     @patch("os._exit")
     def test_mediator_crash(self, _exit):
         ms = [None]
@@ -0,0 +1,164 @@
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import os
+import shutil
+import tempfile
+
+from datetime import datetime
+from time import time
+
+from kombu import Exchange, Producer, Queue
+from mock import Mock, patch
+
+from celery import current_app
+from celery.utils import uuid
+from celery.worker import state
+from celery.worker.job import Request
+from celery.worker.parking import Parking
+
+from celery.tests.utils import Case
+
+
+class test_Parking(Case):
+
+    def setUp(self):
+        self.app = current_app
+        self.timer = Mock()
+        self.exchange = Exchange("test_parking", type="direct")
+        self.queue = Queue("test_parking", self.exchange, "test_parking")
+        with self.app.broker_connection() as conn:
+            self.queue(conn.default_channel).declare()
+        self.parking = Parking(self.app, self.timer, 3600)
+
+    def create_task(self, eta):
+        add = self.app.tasks["celery.chord_unlock"]
+        task = Request({"task": add.name, "id": uuid(),
+                        "args": [2, 2], "kwargs": {},
+                        "eta": datetime.fromtimestamp(eta).isoformat()},
+                       app=self.app, task=add,
+                       delivery_info={"exchange": "test_parking",
+                                      "routing_key": "test_parking"})
+        task.on_ack = Mock()
+        return task
+
+    def park(self, secs, parking=None):
+        eta = time() + secs
+        task = self.create_task(eta)
+        (self.parking if parking is None else parking).park(task, eta)
+        return task
+
+    def received(self, raw=False):
+        with self.app.broker_connection() as conn:
+            queue = self.queue(conn.default_channel)
+            messages = []
+            while 1:
+                message = queue.get()
+                if message is None:
+                    return messages
+                messages.append(message if raw else message.payload)
+                message.ack()
+
+    def test_should_park(self):
+        now = time()
+        self.assertTrue(self.parking.should_park(now + 3601, now=now))
+        self.assertFalse(self.parking.should_park(now + 3599, now=now))
+
+    def test_interval(self):
+        self.assertEqual(self.parking.interval, 60.0)
+        self.assertEqual(Parking(self.app, self.timer, 10).interval, 2.5)
+
+    def test_start_stop(self):
+        self.parking.start()
+        self.parking.start()
+        self.assertEqual(self.timer.apply_interval.call_count, 1)
+        tref = self.parking.tref
+        self.parking.stop()
+        self.timer.cancel.assert_called_with(tref)
+        self.assertIsNone(self.parking.tref)
+
+    def test_park_and_readmit(self):
+        first = self.park(7200)
+        second = self.park(3 * 7200)
+        self.assertTrue(first.on_ack.called)
+        self.assertEqual(len(self.parking), 2)
+
+        self.assertEqual(self.parking.readmit(), 0)
+        self.assertEqual(self.parking.readmit(time() + 5400), 1)
+        self.assertEqual([body["id"] for body in self.received()],
+                         [first.id])
+        self.assertNotIn(first.id, self.parking.db)
+        self.assertIn(second.id, self.parking.db)
+        self.assertEqual(len(self.parking), 1)
+
+    def test_readmit_original_message(self):
+        add = self.app.tasks["celery.chord_unlock"]
+        eta = time() + 7200
+        body = {"task": add.name, "id": uuid(), "args": [2, 2],
+                "kwargs": {},
+                "eta": datetime.fromtimestamp(eta).isoformat()}
+        with self.app.broker_connection() as conn:
+            Producer(conn.default_channel).publish(body,
+                    exchange="test_parking", routing_key="test_parking",
+                    serializer="json", priority=3, headers={"foo": "bar"})
+        message, = self.received(raw=True)
+        task = Request(message.payload, app=self.app, task=add,
+                       delivery_info=message.delivery_info,
+                       message=message)
+        task.on_ack = Mock()
+        self.parking.park(task, eta)
+
+        self.assertEqual(self.parking.readmit(time() + 7200), 1)
+        message, = self.received(raw=True)
+        self.assertEqual(message.content_type, "application/json")
+        self.assertEqual(message.headers, {"foo": "bar"})
+        self.assertEqual(message.delivery_info["priority"], 3)
+        self.assertEqual(message.payload, body)
+
+    def test_readmit_drops_bad_record(self):
+        bad, good = self.park(7200), self.park(7300)
+        eta, delivery_info = self.parking.db[bad.id][:2]
+        self.parking.db[bad.id] = (eta, delivery_info, object(),
+                                   "application/x-unknown", "binary", {}, {})
+        self.assertEqual(self.parking.readmit(time() + 7300), 1)
+        self.assertEqual([body["id"] for body in self.received()],
+                         [good.id])
+        self.assertFalse(self.parking.db)
+        self.assertFalse(len(self.parking))
+
+    def test_readmit_connection_error(self):
+        task = self.park(7200)
+        self.parking._publish = Mock()
+        self.parking._publish.side_effect = KeyError("lost")
+        with patch("kombu.connection.BrokerConnection.connection_errors",
+                   new=(KeyError, )):
+            self.assertEqual(self.parking.readmit(time() + 7200), 0)
+        self.assertIn(task.id, self.parking.db)
+        self.assertEqual(len(self.parking), 1)
+
+    def test_readmit_skips_revoked(self):
+        task = self.park(7200)
+        state.revoked.add(task.id)
+        try:
+            self.assertEqual(self.parking.readmit(time() + 7200), 0)
+        finally:
+            state.revoked.clear()
+        self.assertFalse(self.received())
+        self.assertFalse(len(self.parking))
+
+    def test_persistent(self):
+        tmpdir = tempfile.mkdtemp()
+        filename = os.path.join(tmpdir, "parking")
+        try:
+            parking = Parking(self.app, self.timer, 3600, filename)
+            task = self.park(7200, parking)
+            parking.stop()
+
+            parking = Parking(self.app, self.timer, 3600, filename)
+            self.assertEqual(len(parking), 1)
+            self.assertEqual(parking.readmit(time() + 7200), 1)
+            parking.stop()
+            self.assertEqual([body["id"] for body in self.received()],
+                             [task.id])
+        finally:
+            shutil.rmtree(tmpdir)
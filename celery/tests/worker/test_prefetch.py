@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+
+from mock import Mock
+
+from celery.worker import state
+from celery.worker.consumer import QoS
+from celery.worker.prefetch import AdaptivePrefetch, PREFETCH_COUNT_MAX
+
+from celery.tests.utils import Case
+
+
+class test_AdaptivePrefetch(Case):
+
+    def setUp(self):
+        self.timer = Mock()
+        self.pool = Mock()
+        self.pool.num_processes = 4
+        self.prefetch = AdaptivePrefetch(self.timer, 1.0, self.pool)
+        self.qos = QoS(Mock(), 16)
+
+    def tearDown(self):
+        self.prefetch.stop()
+
+    def test_start_stop(self):
+        self.prefetch.start(self.qos)
+        self.prefetch.start(self.qos)
+        self.assertEqual(self.timer.apply_interval.call_count, 1)
+        self.assertIn(self.prefetch.task_ready, state.ready_callbacks)
+        self.assertEqual(self.prefetch.target, 16)
+        tref = self.prefetch.tref
+        self.prefetch.stop()
+        self.timer.cancel.assert_called_with(tref)
+        self.assertNotIn(self.prefetch.task_ready, state.ready_callbacks)
+
+    def test_observe(self):
+        self.prefetch.observe(1.0)
+        self.assertEqual(self.prefetch.service_time, 1.0)
+        self.prefetch.observe(2.0)
+        self.assertAlmostEqual(self.prefetch.service_time, 1.2)
+        self.assertEqual(self.prefetch.samples, 2)
+
+    def test_task_ready(self):
+        self.prefetch.start(self.qos)
+        request = Mock()
+        request.time_start = None
+        state.task_ready(request)
+        self.assertEqual(self.prefetch.samples, 0)
+        request.time_start = 100.0
+        self.prefetch.task_ready(request, now=100.5)
+        self.assertEqual(self.prefetch.service_time, 0.5)
+
+    def test_calculate(self):
+        self.prefetch.base = 16
+        self.assertEqual(self.prefetch.calculate(), 16)
+        self.prefetch.observe(300.0)
+        self.assertEqual(self.prefetch.calculate(), 5)
+        self.prefetch.service_time = 0.005
+        self.assertEqual(self.prefetch.calculate(), 4 + 800)
+        self.prefetch.service_time = 0.0
+        self.assertEqual(self.prefetch.calculate(), PREFETCH_COUNT_MAX)
+
+    def test_update(self):
+        self.prefetch.start(self.qos)
+        self.qos.increment(2)           # two tasks with an eta.
+        self.prefetch.observe(0.1)
+        self.assertEqual(self.prefetch.update(), 44)
+        self.assertEqual(self.qos.value, 46)
+        self.prefetch.service_time = 60.0
+        self.assertEqual(self.prefetch.update(), 5)
+        self.assertEqual(self.qos.value, 7)
+        self.qos.update()
+        self.assertEqual(self.qos.prev, 7)
+
+    def test_update_while_unlimited(self):
+        self.prefetch.start(self.qos)
+        self.qos.value = 0              # e.g. the prefetch count was reset.
+        self.prefetch.observe(0.1)
+        self.assertEqual(self.prefetch.update(), 44)
+        self.assertEqual(self.qos.value, 0)
+        self.assertEqual(self.prefetch.base, 16)
+        self.qos.value = 16
+        self.assertEqual(self.prefetch.update(), 44)
+        self.assertEqual(self.qos.value, 44)
+
+    def test_info(self):
+        self.prefetch.start(self.qos)
+        info = self.prefetch.info()
+        self.assertEqual(info["target"], 16)
+        self.assertEqual(info["window"], 1.0)
+        self.assertIsNone(info["service_time"])
@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 
 from kombu.transport.base import Message
 from kombu.utils.encoding import from_utf8, default_encode
-from mock import Mock, patch
+from mock import ANY, Mock, patch
 from nose import SkipTest
 
 from celery import current_app
@@ -27,7 +27,8 @@ from celery.task import task as task_dec
 from celery.task.base import Task
 from celery.utils import uuid
 from celery.worker import job as module
-from celery.worker.job import Request, TaskRequest, execute_and_trace
+from celery.worker.job import (Request, RequestBatch, TaskRequest,
+                               execute_and_trace, execute_job, execute_many)
 from celery.worker.state import revoked
 
 from celery.tests.utils import Case
@@ -149,7 +150,8 @@ class test_trace_task(Case):
             ret = jail(tid, mytask.name, [2], {})
             self.assertEqual(ret, 4)
             mytask.backend.store_result.assert_called_with(tid, 4,
-                                                           states.SUCCESS)
+                                                           states.SUCCESS,
+                                                           request=ANY)
             self.assertIn("Process cleanup failed",
                           _logger.error.call_args[0][0])
         finally:
@@ -174,7 +176,7 @@ class test_trace_task(Case):
         class Backend(mytask.backend.__class__):
             _started = []
 
-            def store_result(self, tid, meta, state):
+            def store_result(self, tid, meta, state, request=None):
                 if state == states.STARTED:
                     self._started.append(tid)
 
@@ -723,15 +725,57 @@ class test_TaskRequest(Case):
 
         p = MockPool()
         tw.execute_using_pool(p)
-        self.assertTrue(p.target)
-        self.assertEqual(p.args[0], mytask.name)
-        self.assertEqual(p.args[1], tid)
-        self.assertEqual(p.args[2], [4])
-        self.assertIn("f", p.args[3])
-        self.assertIn([4], p.args)
+        self.assertIs(p.target, execute_job)
+        body, kwargs, delivery_info, fields = p.args
+        self.assertEqual(body["task"], mytask.name)
+        self.assertEqual(body["id"], tid)
+        self.assertEqual(body["args"], [4])
+        self.assertIn("f", kwargs)
+        self.assertEqual(fields["hostname"], tw.hostname)
 
         tw.task.accept_magic_kwargs = False
         tw.execute_using_pool(p)
+        self.assertIsNone(p.args[1])
+
+    def test_job_installed_context(self):
+        tw = TaskRequest(mytask.name, uuid(), [4], {"f": "x"})
+        prev = module.context, module._context_key, module.process_titles
+        try:
+            module.install_context(tw.hostname, 10, "logfile")
+            self.assertEqual(len(tw.job(10, "logfile")), 3)
+            self.assertEqual(len(tw.job(20, "logfile")), 4)
+        finally:
+            module.context, module._context_key, module.process_titles = prev
+
+    def test_execute_job(self):
+        tw = TaskRequest(mytask.name, uuid(), [4], {})
+        prev = module.context, module._context_key, module.process_titles
+        try:
+            module.install_context(tw.hostname, 10, titles=False)
+            with patch("celery.worker.job.setps") as setps:
+                self.assertEqual(execute_job(*tw.job(10)), 4 ** 4)
+                self.assertFalse(setps.called)
+            self.assertEqual(tw.request_dict["loglevel"], 10)
+            self.assertEqual(tw.request_dict["delivery_info"],
+                             tw.delivery_info)
+            self.assertEqual(execute_job(*tw.job(20)), 4 ** 4)
+            self.assertEqual(tw.request_dict["loglevel"], 20)
+        finally:
+            module.context, module._context_key, module.process_titles = prev
+
+    def test_execute_job_context_not_installed(self):
+        tw = TaskRequest(mytask.name, uuid(), [4], {})
+        prev = module.context, module._context_key, module.process_titles
+        try:
+            module.install_context(tw.hostname, 10, titles=False)
+            job = tw.job(10)
+            module.context = None
+            with self.assertRaises(RuntimeError):
+                execute_job(*job)
+            # explicit fields don't need the context.
+            self.assertEqual(execute_job(*tw.job(20)), 4 ** 4)
+        finally:
+            module.context, module._context_key, module.process_titles = prev
 
     def test_default_kwargs(self):
         tid = uuid()
@@ -775,3 +819,119 @@ class test_TaskRequest(Case):
     def test_on_failure_utf8_exception(self):
         self._test_on_failure(Exception(
             from_utf8(u"Бобры атакуют")))
+
+
+class test_RequestBatch(Case):
+
+    def setUp(self):
+        self.requests = [TaskRequest(mytask.name, uuid(), [i], {})
+                            for i in xrange(3)]
+        self.batch = RequestBatch(self.requests)
+
+    def test_batchable(self):
+        self.assertTrue(RequestBatch.batchable(self.requests[0]))
+        mytask.time_limit = 10
+        try:
+            self.assertFalse(RequestBatch.batchable(self.requests[0]))
+        finally:
+            mytask.time_limit = None
+
+        class CustomExecute(Task):
+
+            def run(self):
+                pass
+
+            def execute(self, request, pool, loglevel, logfile):
+                pass
+
+        request = TaskRequest(CustomExecute.name, uuid(), [], {})
+        self.assertFalse(RequestBatch.batchable(request))
+
+    def test_execute_many(self):
+        results = execute_many([request.job() for request in self.requests])
+        self.assertEqual([retval for _, retval in results], [1, 1, 4])
+        self.assertTrue(all(time_start for time_start, _ in results))
+
+    def test_execute_using_pool(self):
+        pool = Mock()
+        revoked.add(self.requests[1].id)
+        try:
+            self.batch.execute_using_pool(pool)
+        finally:
+            revoked.pop_value(self.requests[1].id)
+        self.assertEqual(len(self.batch), 2)
+        args, kwargs = pool.apply_async.call_args
+        self.assertIs(args[0], execute_many)
+        self.assertEqual([job[0]["id"] for job in kwargs["args"][0]],
+                         [self.requests[0].id, self.requests[2].id])
+        self.assertEqual(kwargs["callback"], self.batch.on_success)
+
+    def test_execute_using_pool_all_revoked(self):
+        pool = Mock()
+        for request in self.requests:
+            revoked.add(request.id)
+        try:
+            self.assertIsNone(self.batch.execute_using_pool(pool))
+        finally:
+            for request in self.requests:
+                revoked.pop_value(request.id)
+        self.assertFalse(pool.apply_async.called)
+
+    def test_callbacks(self):
+        self.batch.on_accepted(314, 1000.0)
+        for request in self.requests:
+            self.assertEqual(request.worker_pid, 314)
+            self.assertTrue(request.acknowledged)
+        self.requests[2].on_failure = Mock()
+        try:
+            raise KeyError("foo")
+        except KeyError:
+            einfo = ExceptionInfo(sys.exc_info())
+        self.batch.on_success([(1001.0, 1), (1002.0, 2), (1003.0, einfo)])
+        self.assertEqual([request.time_start for request in self.requests],
+                         [1001.0, 1002.0, 1003.0])
+        self.requests[2].on_failure.assert_called_with(einfo)
+
+    def test_on_failure(self):
+        for request in self.requests:
+            request.on_failure = Mock()
+        try:
+            raise WorkerLostError("lost")
+        except WorkerLostError:
+            einfo = ExceptionInfo(sys.exc_info())
+        self.batch.on_success(einfo)
+        for request in self.requests:
+            request.on_failure.assert_called_with(einfo)
+
+    def test_on_failure_keeps_stored_states(self):
+        backend = mytask.backend
+        for request in self.requests:
+            request.on_success = Mock()
+            request.on_failure = Mock()
+        # the first task succeeded and the second failed before
+        # the pool worker was lost.
+        backend.mark_as_done(self.requests[0].id, 42)
+        backend.mark_as_failure(self.requests[1].id, KeyError("foo"))
+        try:
+            raise WorkerLostError("lost")
+        except WorkerLostError:
+            einfo = ExceptionInfo(sys.exc_info())
+        self.batch.on_failure(einfo)
+
+        self.requests[0].on_success.assert_called_with(42)
+        self.assertFalse(self.requests[0].on_failure.called)
+        stored = self.requests[1].on_failure.call_args[0][0]
+        self.assertIsInstance(stored.exception, KeyError)
+        self.requests[2].on_failure.assert_called_with(einfo)
+        self.assertEqual(backend.get_status(self.requests[0].id),
+                         states.SUCCESS)
+
+    def test_on_failure_backend_without_peek(self):
+        for request in self.requests:
+            request.on_failure = Mock()
+        mytask.backend.mark_as_done(self.requests[0].id, 42)
+        einfo = Mock()
+        with patch.object(mytask.backend, "supports_peek", False):
+            self.batch.on_failure(einfo)
+        for request in self.requests:
+            request.on_failure.assert_called_with(einfo)
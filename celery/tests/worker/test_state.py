@@ -1,6 +1,13 @@
 from __future__ import absolute_import
+from __future__ import with_statement
+
+import os
+import shelve
+import shutil
+import tempfile
 
 from celery.datastructures import LimitedSet
+from celery.utils import uuid
 from celery.worker import state
 from celery.tests.utils import Case
 
@@ -50,6 +57,7 @@ class MyPersistent(state.Persistent):
 class test_Persistent(StateResetCase):
 
     def on_setup(self):
+        MyPersistent.storage.clear()
         self.p = MyPersistent(filename="celery-state")
 
     def test_close_twice(self):
@@ -86,6 +94,116 @@ class test_Persistent(StateResetCase):
         for item in data2:
             self.assertIn(item, self.p.db["revoked"])
 
+    def test_sync_is_bounded(self):
+        prev = state.revoked.maxlen
+        state.revoked.maxlen = 3
+        try:
+            self.p.db["revoked"] = {"foo": 1, "bar": 2, "baz": 3}
+            state.revoked.add("ini")
+            self.p.sync(self.p.db)
+            self.assertItemsEqual(self.p.db["revoked"],
+                                  ["bar", "baz", "ini"])
+        finally:
+            state.revoked.maxlen = prev
+
+
+class test_AppendOnlyPersistent(StateResetCase):
+
+    def on_setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, "celery-state")
+
+    def on_teardown(self):
+        shutil.rmtree(self.dir)
+
+    def test_save_load(self):
+        ids = [uuid(), "foo", u"f\xf8o"]
+        for i, id in enumerate(ids):
+            state.revoked.add(id, now=100 + i)
+        state.AppendOnlyPersistent(self.filename).save()
+        state.revoked.clear()
+
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(p.records, 3)
+        for i, id in enumerate(ids):
+            self.assertEqual(state.revoked.as_dict()[id], 100 + i)
+
+    def test_uuids_are_compact(self):
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(len(p.encode(uuid(), 1.0)), 25)
+
+    def test_save_appends_new_revokes(self):
+        p = state.AppendOnlyPersistent(self.filename)
+        state.revoked.add("foo", now=1)
+        p.save()
+        size = os.path.getsize(self.filename)
+        p.save()
+        self.assertEqual(os.path.getsize(self.filename), size)
+        state.revoked.add("bar", now=2)
+        p.save()
+        self.assertEqual(p.records, 2)
+        self.assertGreater(os.path.getsize(self.filename), size)
+
+    def test_compact(self):
+        p = state.AppendOnlyPersistent(self.filename)
+        p.compact_factor = 0
+        state.revoked.add("foo", now=1)
+        p.save()
+        for i in range(100):
+            state.revoked.add("bar", now=i + 2)
+            p.save()
+        self.assertEqual(p.records, 101)
+        p.save()
+        self.assertEqual(p.records, 2)
+        state.revoked.clear()
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(state.revoked.as_dict(), {"foo": 1, "bar": 101})
+
+    def test_ignores_truncated_record(self):
+        p = state.AppendOnlyPersistent(self.filename)
+        state.revoked.add("foo", now=1)
+        p.save()
+        state.revoked.add(uuid(), now=2)
+        p.save()
+        with open(self.filename, "r+b") as fh:
+            fh.truncate(os.path.getsize(self.filename) - 1)
+        state.revoked.clear()
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(p.records, 1)
+        self.assertEqual(list(state.revoked), ["foo"])
+
+    def test_save_after_truncated_record(self):
+        p = state.AppendOnlyPersistent(self.filename)
+        state.revoked.add("foo", now=1)
+        p.save()
+        size = os.path.getsize(self.filename)
+        state.revoked.add(uuid(), now=2)
+        p.save()
+        with open(self.filename, "r+b") as fh:
+            fh.truncate(os.path.getsize(self.filename) - 1)
+        state.revoked.clear()
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(os.path.getsize(self.filename), size)
+        state.revoked.add("bar", now=3)
+        p.save()
+        state.revoked.clear()
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(p.records, 2)
+        self.assertEqual(state.revoked.as_dict(), {"foo": 1, "bar": 3})
+
+    def test_migrates_shelve(self):
+        db = shelve.open(self.filename)
+        db["revoked"] = {"foo": 1, "bar": 2}
+        db.close()
+        files = os.listdir(self.dir)
+        p = state.AppendOnlyPersistent(self.filename)
+        self.assertEqual(state.revoked.as_dict(), {"foo": 1, "bar": 2})
+        self.assertTrue(p._is_log())
+        self.assertEqual(p.records, 2)
+        self.assertItemsEqual(os.listdir(self.dir),
+                              [os.path.basename(self.filename)] +
+                              [name + ".bak" for name in files])
+
 
 class SimpleReq(object):
 
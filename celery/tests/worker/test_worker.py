@@ -1,8 +1,11 @@
 from __future__ import absolute_import
 from __future__ import with_statement
 
+import os
+import shutil
 import socket
 import sys
+import tempfile
 
 from collections import deque
 from datetime import datetime, timedelta
@@ -18,7 +21,7 @@ from celery import current_app
 from celery.app.defaults import DEFAULTS
 from celery.concurrency.base import BasePool
 from celery.datastructures import AttributeDict
-from celery.exceptions import SystemTerminate
+from celery.exceptions import ImproperlyConfigured, SystemTerminate
 from celery.task import task as task_dec
 from celery.task import periodic_task as periodic_task_dec
 from celery.utils import uuid
@@ -167,6 +170,22 @@ class test_QoS(Case):
         qos.decrement()
         self.assertEqual(qos.value, PREFETCH_COUNT_MAX - 1)
 
+    def test_adjust_eventually(self):
+        consumer = Mock()
+        qos = QoS(consumer, 10)
+        qos.update()
+        qos.adjust_eventually(5)
+        self.assertEqual(qos.value, 15)
+        self.assertEqual(qos.prev, 10)
+        qos.adjust_eventually(-20)
+        self.assertEqual(qos.value, 1)
+        qos.update()
+        self.assertIn({"prefetch_count": 1}, consumer.qos.call_args)
+
+        disabled = QoS(consumer, 0)
+        disabled.adjust_eventually(10)
+        self.assertEqual(disabled.value, 0)
+
     def test_consumer_increment_decrement(self):
         consumer = Mock()
         qos = QoS(consumer, 10)
@@ -225,6 +244,19 @@ class test_Consumer(Case):
         info = l.info
         self.assertTrue(info["broker"])
 
+    def test_info_adaptive_prefetch(self):
+        l = MyKombuConsumer(self.ready_queue, self.eta_schedule,
+                            send_events=False, prefetch_window=1.0,
+                            initial_prefetch_count=10, pool=Mock())
+        l.qos = QoS(l.task_consumer, 10)
+        l.prefetch.start(l.qos)
+        try:
+            info = l.info["adaptive_prefetch"]
+            self.assertEqual(info["target"], 10)
+            self.assertEqual(info["window"], 1.0)
+        finally:
+            l.prefetch.stop()
+
     def test_start_when_closed(self):
         l = MyKombuConsumer(self.ready_queue, self.eta_schedule,
                             send_events=False)
@@ -595,6 +627,36 @@ class test_Consumer(Case):
         with self.assertRaises(Empty):
             self.ready_queue.get_nowait()
 
+    def test_eta_horizon_requires_db(self):
+        with self.assertRaises(ImproperlyConfigured):
+            MyKombuConsumer(self.ready_queue, self.eta_schedule,
+                            send_events=False, eta_horizon=3600)
+
+    def test_receive_message_eta_parked(self):
+        dirname = tempfile.mkdtemp()
+        try:
+            l = MyKombuConsumer(self.ready_queue, self.eta_schedule,
+                                send_events=False, eta_horizon=3600,
+                                eta_parking_db=os.path.join(dirname,
+                                                            "parked"))
+            l.event_dispatcher = Mock()
+            l.qos = Mock()
+            backend = Mock()
+            m = create_message(backend, task=foo_task.name,
+                               args=[2, 4, 8], kwargs={},
+                               eta=(datetime.now() +
+                                   timedelta(days=1)).isoformat())
+            m.ack = Mock()
+            l.update_strategies()
+            l.receive_message(m.decode(), m)
+            self.assertTrue(self.eta_schedule.empty())
+            self.assertFalse(l.qos.increment.called)
+            self.assertEqual(len(l.parking), 1)
+            self.assertTrue(m.ack.called)
+            l.parking.stop()
+        finally:
+            shutil.rmtree(dirname)
+
     def test_reset_pidbox_node(self):
         l = MyKombuConsumer(self.ready_queue, self.eta_schedule,
                           send_events=False)
@@ -801,6 +863,7 @@ class test_WorkController(AppCase):
         from celery.concurrency.processes import process_initializer
         from celery.concurrency.processes import (WORKER_SIGRESET,
                                                   WORKER_SIGIGNORE)
+        from celery.worker import job
 
         def on_worker_process_init(**kwargs):
             on_worker_process_init.called = True
@@ -810,7 +873,17 @@ class test_WorkController(AppCase):
         loader = Mock()
         app = Celery(loader=loader, set_as_current=False)
         app.conf = AttributeDict(DEFAULTS)
-        process_initializer(app, "awesome.worker.com")
+        prev = job.context, job._context_key, job.process_titles
+        try:
+            process_initializer(app, "awesome.worker.com",
+                                {"hostname": "awesome.worker.com",
+                                 "loglevel": 10, "titles": False})
+            self.assertDictContainsSubset({"hostname": "awesome.worker.com",
+                                           "loglevel": 10, "logfile": None},
+                                          job.context)
+            self.assertFalse(job.process_titles)
+        finally:
+            job.context, job._context_key, job.process_titles = prev
         self.assertIn((tuple(WORKER_SIGIGNORE), {}),
                       _signals.ignore.call_args_list)
         self.assertIn((tuple(WORKER_SIGRESET), {}),
@@ -895,6 +968,27 @@ class test_WorkController(AppCase):
         self.assertEqual(worker.pool.apply_async.call_count, 1)
         worker.pool.stop()
 
+    def test_process_tasks(self):
+        worker = self.worker
+        worker.pool = Mock()
+        backend = Mock()
+        tasks = []
+        for i in xrange(3):
+            m = create_message(backend, task=foo_task.name, args=[4, 8, i],
+                               kwargs={})
+            tasks.append(Request.from_message(m, m.decode()))
+        worker.process_tasks(tasks)
+        self.assertEqual(worker.pool.apply_async.call_count, 1)
+        worker.process_tasks(tasks[:1])
+        self.assertEqual(worker.pool.apply_async.call_count, 2)
+
+        foo_task.time_limit = 10
+        try:
+            worker.process_tasks(tasks)
+        finally:
+            foo_task.time_limit = None
+        self.assertEqual(worker.pool.apply_async.call_count, 5)
+
     def test_process_task_raise_base(self):
         worker = self.worker
         worker.pool = Mock()
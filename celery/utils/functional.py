@@ -16,7 +16,7 @@ import operator
 
 from functools import partial, wraps
 from itertools import islice
-from threading import Lock, RLock
+from threading import Lock
 
 try:
     from collections import Sequence
@@ -26,76 +26,279 @@ except ImportError:
 
 from kombu.utils.functional import promise, maybe_promise
 
-from .compat import UserDict, OrderedDict
-
 KEYWORD_MARK = object()
 is_not_None = partial(operator.is_not, None)
 
 
-class LRUCache(UserDict):
+class _Link(object):
+    """A node in the doubly linked list used by :class:`LRUCache`."""
+    __slots__ = ("prev", "next", "key", "value", "weight")
+
+
+class LRUCache(object):
     """LRU Cache implementation using a doubly linked list to track access.
 
+    Items are kept in a dict of keys to nodes in a circular doubly
+    linked list, ordered from the least recently used to the most
+    recently used, so lookups, insertions and evictions are O(1).
+
     :keyword limit: The maximum number of keys to keep in the cache.
         When a new key is inserted and the limit has been exceeded,
         the *Least Recently Used* key will be discarded from the
         cache.
+    :keyword on_evict: Optional callback called with the key and value
+        of every item discarded because the limit was exceeded.
+    :keyword thread_safe: Set to :const:`False` to not use a lock,
+        if the cache is only used by a single thread (or is already
+        protected by a lock).
+    :keyword weigher: Optional function returning the weight of a
+        ``(key, value)`` pair.
+    :keyword max_weight: If set, least recently used items are discarded
+        until the sum of the weights of all items is below this value.
+        Items weighing more than `max_weight` are not kept.
+
+    The :attr:`hits`, :attr:`misses` and :attr:`evictions` attributes
+    count the lookups and evictions since the cache was created.
 
     """
+    hits = misses = evictions = 0
 
-    def __init__(self, limit=None):
+    def __init__(self, limit=None, on_evict=None, thread_safe=True,
+            weigher=None, max_weight=None):
         self.limit = limit
-        self.mutex = RLock()
-        self.data = OrderedDict()
+        self.on_evict = on_evict
+        self.weigher = weigher
+        self.max_weight = max_weight
+        self.weight = 0
+        self.mutex = Lock() if thread_safe else None
+        self._map = {}
+        root = self._root = _Link()
+        root.prev = root.next = root
+        root.key = root.value = None
 
     def __getitem__(self, key):
+        if self.mutex is None:
+            return self._get(key)
         with self.mutex:
-            value = self[key] = self.data.pop(key)
-        return value
+            return self._get(key)
 
-    def keys(self):
-        # userdict.keys in py3k calls __getitem__
-        return self.data.keys()
+    def get(self, key, default=None):
+        if self.mutex is None:
+            return self._get(key, default)
+        with self.mutex:
+            return self._get(key, default)
+
+    def peek(self, key, default=None):
+        """Get the value of `key` without marking it as recently
+        used or counting a hit or miss."""
+        try:
+            return self._map[key].value
+        except KeyError:
+            return default
+
+    def _get(self, key, *default):
+        link = self._map.get(key)
+        if link is None:
+            self.misses += 1
+            if default:
+                return default[0]
+            raise KeyError(key)
+        self.hits += 1
+        self._move_to_end(link)
+        return link.value
+
+    def _move_to_end(self, link):
+        root = self._root
+        if link.next is not root:
+            link.prev.next, link.next.prev = link.next, link.prev
+            last = root.prev
+            link.prev, link.next = last, root
+            last.next = root.prev = link
 
-    def values(self):
-        return list(self._iterate_values())
+    def __setitem__(self, key, value):
+        if self.mutex is None:
+            evicted = self._set(key, value)
+        else:
+            with self.mutex:
+                evicted = self._set(key, value)
+        self._evicted(evicted)
+
+    def _evicted(self, evicted):
+        # called after the mutex is released, so that the callback
+        # can use the cache.
+        if evicted and self.on_evict is not None:
+            for item in evicted:
+                self.on_evict(*item)
+
+    def _set(self, key, value):
+        weight = self.weigher(key, value) if self.weigher else 0
+        link = self._map.get(key)
+        if link is None:
+            root = self._root
+            link = self._map[key] = _Link()
+            last = root.prev
+            link.prev, link.next, link.key = last, root, key
+            last.next = root.prev = link
+        else:
+            self.weight -= link.weight
+            self._move_to_end(link)
+        link.value, link.weight = value, weight
+        self.weight += weight
+        return self._evict()
+
+    def _evict(self):
+        limit, max_weight = self.limit, self.max_weight
+        if not (limit and len(self._map) > limit or
+                max_weight and self.weight > max_weight):
+            return
+        evicted = []
+        while self._map and (limit and len(self._map) > limit or
+                             max_weight and self.weight > max_weight):
+            link = self._root.next
+            self._unlink(link)
+            evicted.append((link.key, link.value))
+        self.evictions += len(evicted)
+        return evicted
+
+    def _unlink(self, link):
+        del(self._map[link.key])
+        link.prev.next, link.next.prev = link.next, link.prev
+        self.weight -= link.weight
+
+    def __delitem__(self, key):
+        if self.mutex is None:
+            return self._unlink(self._map[key])
+        with self.mutex:
+            self._unlink(self._map[key])
 
-    def items(self):
-        return list(self._iterate_items())
+    def pop(self, key, *default):
+        if self.mutex is None:
+            return self._pop(key, *default)
+        with self.mutex:
+            return self._pop(key, *default)
+
+    def _pop(self, key, *default):
+        try:
+            link = self._map[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        self._unlink(link)
+        return link.value
+
+    def popitem(self, last=True):
+        """Remove and return the most recently used item,
+        or the least recently used item if `last` is false."""
+        if self.mutex is None:
+            return self._popitem(last)
+        with self.mutex:
+            return self._popitem(last)
+
+    def _popitem(self, last=True):
+        if not self._map:
+            raise KeyError("popitem(): cache is empty")
+        link = self._root.prev if last else self._root.next
+        self._unlink(link)
+        return link.key, link.value
+
+    def setdefault(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).iteritems():
+            self[key] = value
+
+    def clear(self):
+        if self.mutex is None:
+            return self._clear()
+        with self.mutex:
+            self._clear()
 
-    def __setitem__(self, key, value):
-        # remove least recently used key.
+    def _clear(self):
+        root = self._root
+        root.prev = root.next = root
+        self._map.clear()
+        self.weight = 0
+
+    def __contains__(self, key):
+        return key in self._map
+
+    def __len__(self):
+        return len(self._map)
+
+    def _keys(self, reverse=False):
+        # a copy of the keys, so that the cache can be
+        # modified while iterating.
+        if self.mutex is None:
+            return self._ordered_keys(reverse)
         with self.mutex:
-            if self.limit and len(self.data) >= self.limit:
-                self.data.pop(iter(self.data).next())
-            self.data[key] = value
+            return self._ordered_keys(reverse)
+
+    def _ordered_keys(self, reverse=False):
+        root, keys = self._root, []
+        attr = "prev" if reverse else "next"
+        link = getattr(root, attr)
+        while link is not root:
+            keys.append(link.key)
+            link = getattr(link, attr)
+        return keys
+
+    def keys(self):
+        """Keys ordered from the least to the most recently used."""
+        return self._keys()
 
     def __iter__(self):
-        return self.data.iterkeys()
+        return iter(self._keys())
+    iterkeys = __iter__
 
-    def _iterate_items(self):
-        for k in self:
+    def most_recent(self, n=None):
+        """Returns a list of the `n` most recently used ``(key, value)``
+        pairs, starting with the most recently used."""
+        return list(islice(self._iterate_items(self._keys(reverse=True)), n))
+
+    def _iterate_items(self, keys=None):
+        _map = self._map
+        for k in self._keys() if keys is None else keys:
             try:
-                yield (k, self.data[k])
+                yield (k, _map[k].value)
             except KeyError:
                 pass
     iteritems = _iterate_items
 
     def _iterate_values(self):
-        for k in self:
-            try:
-                yield self.data[k]
-            except KeyError:  # pragma: no cover
-                pass
+        for _, value in self._iterate_items():
+            yield value
     itervalues = _iterate_values
 
+    def values(self):
+        return list(self._iterate_values())
+
+    def items(self):
+        return list(self._iterate_items())
+
     def incr(self, key, delta=1):
-        with self.mutex:
-            # this acts as memcached does- store as a string, but return a
-            # integer as long as it exists and we can cast it
-            newval = int(self.data.pop(key)) + delta
-            self[key] = str(newval)
+        if self.mutex is None:
+            newval, evicted = self._incr(key, delta)
+        else:
+            with self.mutex:
+                newval, evicted = self._incr(key, delta)
+        self._evicted(evicted)
         return newval
 
+    def _incr(self, key, delta=1):
+        # this acts as memcached does- store as a string, but return a
+        # integer as long as it exists and we can cast it
+        newval = int(self._map[key].value) + delta
+        return newval, self._set(key, str(newval))
+
+    def __repr__(self):
+        return "<LRUCache: %s/%s items>" % (len(self), self.limit)
+
 
 def maybe_list(l):
     if l is None:
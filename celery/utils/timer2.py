@@ -17,6 +17,7 @@ import heapq
 import os
 import sys
 
+from bisect import bisect_right
 from itertools import count
 from threading import Condition, Event, Lock, Thread
 from time import time, sleep, mktime
@@ -148,16 +149,158 @@ class Schedule(object):
         self._queue[:] = []  # used because we can't replace the object
                              # and the operation is atomic.
 
-    def info(self):
+    def info(self, start=0, limit=None):
+        """Returns the scheduled entries sorted by eta.
+
+        :keyword start: Skip this many of the first entries.
+        :keyword limit: Return at most this many entries.
+
+        """
         return ({"eta": eta, "priority": priority, "item": item}
-                    for eta, priority, item in self.queue)
+                    for eta, priority, item in self._page(start, limit))
+
+    def _page(self, start=0, limit=None):
+        if limit is None:
+            return self.queue[start:]
+        return heapq.nsmallest(start + limit, self._events())[start:]
+
+    def _events(self):
+        return list(self._queue)
 
     @property
     def queue(self):
-        events = list(self._queue)
+        events = self._events()
+        heapq.heapify(events)
         return map(heapq.heappop, [events] * len(events))
 
 
+class TimingWheelSchedule(Schedule):
+    """ETA scheduler using a hierarchical timing wheel.
+
+    Entries are appended to the slot of the wheel covering their eta,
+    so entering an entry takes constant time no matter how many entries
+    are scheduled.  The first wheel has :attr:`wheel_size` slots of
+    :attr:`resolution` seconds, and every following wheel has slots as
+    wide as the whole previous wheel.  When a slot expires its entries
+    cascade into the slots of the finer wheels, and entries due
+    in less than :attr:`resolution` seconds are moved to a small heap
+    so that they are still applied in order at their exact eta.
+
+    Cancelled entries are not removed from the wheel, they are
+    dropped when their slot expires.
+
+    """
+    #: Width of the slots in the first wheel in seconds.
+    resolution = 0.1
+
+    #: Number of slots in every wheel.
+    wheel_size = 64
+
+    def __init__(self, max_interval=DEFAULT_MAX_INTERVAL, on_error=None,
+            resolution=None, wheel_size=None):
+        super(TimingWheelSchedule, self).__init__(max_interval, on_error)
+        self.resolution = float(resolution or self.resolution)
+        self.wheel_size = wheel_size or self.wheel_size
+        self._slots = {}
+        self._expires = []
+        # entries delayed less than ``_ticks[n]`` seconds goes into the
+        # wheel with slots of ``_ticks[n - 1]`` seconds, where
+        # the first "wheel" is the heap of entries that are due.
+        self._ticks = [self.resolution]
+
+    def _enter(self, eta, priority, entry):
+        self._add((eta, priority, entry), time())
+        return entry
+
+    def _add(self, event, now):
+        ticks = self._ticks
+        delay = event[0] - now
+        level = bisect_right(ticks, delay)
+        if not level:
+            return heapq.heappush(self._queue, event)
+        while level == len(ticks):
+            ticks.append(ticks[-1] * self.wheel_size)
+            level = bisect_right(ticks, delay)
+        tick = ticks[level - 1]
+        key = (level, int(event[0] // tick))
+        try:
+            self._slots[key].append(event)
+        except KeyError:
+            self._slots[key] = [event]
+            heapq.heappush(self._expires, (key[1] * tick, key))
+
+    def _cascade(self, now):
+        expires, slots = self._expires, self._slots
+        while expires and expires[0][0] <= now:
+            _, key = heapq.heappop(expires)
+            for event in slots.pop(key, ()):
+                if not event[2].cancelled:
+                    self._add(event, now)
+
+    def __iter__(self):
+        """The iterator yields the time to sleep for between runs."""
+
+        # localize variable access
+        nowfun = time
+        pop = heapq.heappop
+        max_interval = self.max_interval
+        queue = self._queue
+        expires = self._expires
+
+        while 1:
+            now = nowfun()
+            if expires and expires[0][0] <= now:
+                self._cascade(now)
+            if queue:
+                eta, priority, entry = verify = queue[0]
+
+                if now < eta:
+                    yield min(eta - now, max_interval), None
+                else:
+                    event = pop(queue)
+
+                    if event is verify:
+                        if not entry.cancelled:
+                            yield None, entry
+                        continue
+                    else:
+                        heapq.heappush(queue, event)
+            elif expires:
+                yield min(expires[0][0] - now, max_interval), None
+            else:
+                yield None, None
+
+    def empty(self):
+        """Is the schedule empty?"""
+        return not self._queue and not self._slots
+
+    def clear(self):
+        self._queue[:] = []
+        self._slots.clear()
+        self._expires[:] = []
+
+    def _page(self, start=0, limit=None):
+        if limit is None:
+            return self.queue[start:]
+        # slots are visited in the order they expire, and no entry
+        # in a slot is due before the slot expires, so we can stop
+        # as soon as the page is filled by entries due before that.
+        want, slots = start + limit, self._slots
+        events = list(self._queue)
+        for expires, key in sorted(self._expires):
+            if len(events) >= want and \
+                    heapq.nsmallest(want, events)[-1][0] <= expires:
+                break
+            events.extend(slots[key])
+        return heapq.nsmallest(want, events)[start:]
+
+    def _events(self):
+        events = list(self._queue)
+        for slot in self._slots.values():
+            events.extend(slot)
+        return events
+
+
 class Timer(Thread):
     Entry = Entry
     Schedule = Schedule
@@ -279,6 +422,22 @@ class Timer(Thread):
     def queue(self):
         return self.schedule.queue
 
+
+class TimingWheelTimer(Timer):
+    """Timer using the :class:`TimingWheelSchedule`, where the worker's
+    :setting:`CELERYD_ETA_SCHEDULER_PRECISION` is the longest time
+    the timer sleeps between checking the schedule."""
+    Schedule = TimingWheelSchedule
+
+    def __init__(self, schedule=None, on_error=None, on_tick=None,
+            precision=None, **kwargs):
+        if schedule is None:
+            schedule = self.Schedule(max_interval=precision or
+                                        DEFAULT_MAX_INTERVAL,
+                                     on_error=on_error)
+        super(TimingWheelTimer, self).__init__(schedule, on_error, on_tick,
+                                               **kwargs)
+
 default_timer = _default_timer = Timer()
 apply_after = _default_timer.apply_after
 apply_at = _default_timer.apply_at
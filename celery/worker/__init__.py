@@ -35,6 +35,7 @@ from celery.utils.log import get_logger
 from . import abstract
 from . import state
 from .buckets import TaskBucket, FastQueue
+from .job import RequestBatch, install_context
 
 RUN = 0x1
 CLOSE = 0x2
@@ -88,12 +89,21 @@ class Pool(abstract.StartStopComponent):
 
     def create(self, w):
         forking_enable(not w.force_execv)
+        context = {"hostname": w.hostname, "loglevel": w.loglevel,
+                   "logfile": w.logfile, "titles": w.pool_process_titles}
+        install_context(**context)
+        batch_size = w.pool_batch_size
+        if w.task_time_limit or w.task_soft_time_limit:
+            # time limits would apply to the batch as a whole.
+            batch_size = 1
         pool = w.pool = self.instantiate(w.pool_cls, w.min_concurrency,
-                                initargs=(w.app, w.hostname),
+                                initargs=(w.app, w.hostname, context),
                                 maxtasksperchild=w.max_tasks_per_child,
                                 timeout=w.task_time_limit,
                                 soft_timeout=w.task_soft_time_limit,
                                 putlocks=w.pool_putlocks,
+                                batch_size=batch_size,
+                                shm_threshold=w.pool_shm_threshold,
                                 lost_worker_timeout=w.worker_lost_wait)
         return pool
 
@@ -162,7 +172,7 @@ class StateDB(abstract.Component):
         w._persistence = None
 
     def create(self, w):
-        w._persistence = state.Persistent(w.state_db)
+        w._persistence = self.instantiate(w.persistence_cls, w.state_db)
         atexit.register(w._persistence.save)
 
 
@@ -180,9 +190,13 @@ class WorkController(configurated):
     pool_cls = from_config("pool")
     consumer_cls = from_config("consumer")
     mediator_cls = from_config("mediator")
+    persistence_cls = from_config("persistence")
     eta_scheduler_cls = from_config("eta_scheduler")
     eta_scheduler_precision = from_config()
+    eta_horizon = from_config()
+    eta_parking_db = from_config()
     autoscaler_cls = from_config("autoscaler")
+    autoscaler_policy = from_config()
     autoreloader_cls = from_config("autoreloader")
     schedule_filename = from_config()
     scheduler_cls = from_config("celerybeat_scheduler")
@@ -190,9 +204,15 @@ class WorkController(configurated):
     task_soft_time_limit = from_config()
     max_tasks_per_child = from_config()
     pool_putlocks = from_config()
+    pool_batch_size = from_config()
+    pool_process_titles = from_config()
+    pool_shm_threshold = from_config()
     force_execv = from_config()
     prefetch_multiplier = from_config()
+    prefetch_window = from_config()
     state_db = from_config()
+    revokes_max = from_config()
+    revoke_expires = from_config()
     disable_rate_limits = from_config()
     worker_lost_wait = from_config()
 
@@ -221,6 +241,8 @@ class WorkController(configurated):
         self.ready_callback = ready_callback
         self._finalize = Finalize(self, self.stop, exitpriority=1)
         self._finalize_db = None
+        state.revoked.maxlen = self.revokes_max
+        state.revoked.expires = self.revoke_expires
 
         # Initialize boot steps
         self.pool_cls = _concurrency.get_implementation(self.pool_cls)
@@ -252,9 +274,27 @@ class WorkController(configurated):
 
     def process_task(self, request):
         """Process task by sending it to the pool of workers."""
+        self._process(request.task.execute, request, self.pool,
+                      self.loglevel, self.logfile)
+
+    def process_tasks(self, requests):
+        """Process a list of tasks, sending the tasks that can be
+        batched to the pool of workers as a single job."""
+        batch = []
+        for request in requests:
+            if RequestBatch.batchable(request):
+                batch.append(request)
+            else:
+                self.process_task(request)
+        if len(batch) > 1:
+            self._process(RequestBatch(batch).execute_using_pool,
+                          self.pool, self.loglevel, self.logfile)
+        elif batch:
+            self.process_task(batch[0])
+
+    def _process(self, fun, *args):
         try:
-            request.task.execute(request, self.pool,
-                                 self.loglevel, self.logfile)
+            fun(*args)
         except Exception, exc:
             logger.critical("Internal error %s: %s\n%s",
                             exc.__class__, exc, traceback.format_exc(),
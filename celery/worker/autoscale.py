@@ -10,6 +10,9 @@
     The autoscale thread is only enabled if autoscale
     has been enabled on the command line.
 
+    How many processes the pool should have is decided by
+    a :class:`Policy` (see :setting:`CELERYD_AUTOSCALER_POLICY`).
+
     :copyright: (c) 2009 - 2012 by Ask Solem.
     :license: BSD, see LICENSE for more details.
 
@@ -17,10 +20,15 @@
 from __future__ import absolute_import
 from __future__ import with_statement
 
+import math
+import os
 import threading
 
 from time import sleep, time
 
+from billiard import cpu_count
+
+from celery.utils.imports import symbol_by_name
 from celery.utils.log import get_logger
 from celery.utils.threads import bgThread
 
@@ -42,13 +50,205 @@ class WorkerComponent(StartStopComponent):
     def create(self, w):
         scaler = w.autoscaler = self.instantiate(w.autoscaler_cls, w.pool,
                                     max_concurrency=w.max_concurrency,
-                                    min_concurrency=w.min_concurrency)
+                                    min_concurrency=w.min_concurrency,
+                                    policy=w.autoscaler_policy)
         return scaler
 
 
+class Policy(object):
+    """Base class for autoscale policies.
+
+    The autoscaler calls :meth:`target` every second, and grows or
+    shrinks the pool to the number of processes returned
+    (within the min and max concurrency settings).
+
+    :param autoscaler: The :class:`Autoscaler` using this policy.
+
+    """
+
+    def __init__(self, autoscaler):
+        self.autoscaler = autoscaler
+
+    def target(self, now):
+        """Returns the number of processes the pool should have."""
+        raise NotImplementedError("subclass responsibility")
+
+    def info(self):
+        """Returns information about the policy and its
+        last decision as a dict."""
+        return {}
+
+
+class ReservedPolicy(Policy):
+    """Starts a process for every reserved task.
+
+    This was the behavior of the autoscaler in earlier versions.
+
+    """
+
+    def target(self, now):
+        return self.autoscaler.qty
+
+
+class PredictivePolicy(Policy):
+    """Estimates the number of processes needed from the rate
+    at which tasks arrive and how long they take to process.
+
+    By Little's law the number of tasks in progress equals the
+    arrival rate times the service time, so to keep the processes
+    busy :attr:`utilization` of the time the pool needs::
+
+        arrival_rate * service_time / utilization
+
+    processes.  Both rates are moving averages measured from
+    the number of tasks started by the pool, and the number of
+    tasks waiting for a free process.
+
+    The pool is not grown if the host is already CPU bound
+    (the load average per CPU is above :attr:`max_load`),
+    and it's only shrunk if the estimate is below the current
+    number of processes by more than :attr:`hysteresis`.
+    The number of processes is never changed by more
+    than :attr:`max_step` at a time.
+
+    Until the service time is known, or if the pool has no processes,
+    a process is started for every reserved task (like the
+    :class:`ReservedPolicy`) when tasks are waiting.
+
+    """
+
+    #: Weight of a new sample in the moving averages.
+    alpha = 0.3
+
+    #: Fraction of time the processes should be busy.
+    utilization = 0.8
+
+    #: Only shrink if the estimate is below the current number
+    #: of processes by more than this fraction.
+    hysteresis = 0.25
+
+    #: Max number of processes to add or remove at a time.
+    max_step = 2
+
+    #: Don't grow the pool if the load average per CPU
+    #: is above this value.
+    max_load = 1.0
+
+    #: Moving average of tasks arriving per second.
+    arrival_rate = 0.0
+
+    #: Moving average of the service time of tasks in seconds,
+    #: or :const:`None` if no task has been started yet.
+    service_time = None
+
+    def __init__(self, autoscaler, alpha=None, utilization=None,
+            hysteresis=None, max_step=None, max_load=None):
+        super(PredictivePolicy, self).__init__(autoscaler)
+        self.alpha = alpha or self.alpha
+        self.utilization = utilization or self.utilization
+        self.hysteresis = hysteresis or self.hysteresis
+        self.max_step = max_step or self.max_step
+        self.max_load = max_load or self.max_load
+        self.busy_ratio = self.load = self.needed = None
+        self.waiting = 0
+        self.decision = None
+        self._last = None
+
+    def loadavg(self):
+        """Returns the 1 minute load average per CPU,
+        or :const:`None` if not available."""
+        try:
+            return os.getloadavg()[0] / cpu_count()
+        except (AttributeError, OSError, NotImplementedError):
+            return None
+
+    def sample(self, now):
+        """Update the moving averages with the current
+        state of the worker."""
+        accepted = sum(state.total_count.itervalues())
+        active = len(state.active_requests)
+        waiting = max(len(state.reserved_requests) - active, 0)
+        processes = self.autoscaler.processes
+        last, self._last = self._last, (now, accepted, waiting)
+        if last is None:
+            # tasks already waiting at the first sample are
+            # counted as arrivals by the next sample.
+            self._last = (now, accepted, 0)
+        self.waiting = waiting
+        self.busy_ratio = (float(active) / processes if processes
+                                else float(bool(active)))
+        self.load = self.loadavg()
+        if last is None or now <= last[0]:
+            return
+        interval = now - last[0]
+        started = accepted - last[1]
+        arrived = max(started + waiting - last[2], 0)
+        self.arrival_rate += self.alpha * (arrived / interval -
+                                           self.arrival_rate)
+        if started:
+            # Little's law: tasks in progress / start rate.
+            service_time = active / (started / interval)
+            if self.service_time is None:
+                self.service_time = service_time
+            else:
+                self.service_time += self.alpha * (service_time -
+                                                   self.service_time)
+
+    def estimate(self, processes):
+        """Returns the number of processes needed."""
+        needed = processes
+        if self.service_time is not None:
+            needed = int(math.ceil(self.arrival_rate * self.service_time /
+                                   self.utilization))
+        if self.waiting:
+            if not processes or self.service_time is None:
+                # nothing to estimate from yet, so start a process
+                # for every reserved task like the ReservedPolicy.
+                needed = max(needed, self.autoscaler.qty)
+            elif self.busy_ratio >= self.utilization:
+                # tasks are waiting and the processes are busy.
+                needed = max(needed, processes + 1)
+        return needed
+
+    def target(self, now):
+        self.sample(now)
+        processes = self.autoscaler.processes
+        needed = self.needed = self.estimate(processes)
+        target, reason = processes, "steady"
+        if needed > processes:
+            if processes and self.load is not None and \
+                    self.load >= self.max_load:
+                reason = "cpu bound"
+            else:
+                target = processes + min(needed - processes, self.max_step)
+                reason = "grow"
+        elif needed < processes * (1.0 - self.hysteresis):
+            target = processes - min(processes - needed, self.max_step)
+            reason = "shrink"
+        self.decision = {"time": now, "from": processes,
+                         "to": target, "reason": reason}
+        return target
+
+    def info(self):
+        return {"arrival_rate": self.arrival_rate,
+                "service_time": self.service_time,
+                "busy_ratio": self.busy_ratio,
+                "load": self.load,
+                "needed": self.needed,
+                "decision": self.decision}
+
+
 class Autoscaler(bgThread):
+    """Grows and shrinks the pool as decided by the scaling policy.
+
+    :keyword policy: The :class:`Policy` class to use, or
+        the name of one.  Default is :class:`PredictivePolicy`.
 
-    def __init__(self, pool, max_concurrency, min_concurrency=0, keepalive=30):
+    """
+    Policy = PredictivePolicy
+
+    def __init__(self, pool, max_concurrency, min_concurrency=0, keepalive=30,
+            policy=None):
         super(Autoscaler, self).__init__()
         self.pool = pool
         self.mutex = threading.Lock()
@@ -56,20 +256,26 @@ class Autoscaler(bgThread):
         self.min_concurrency = min_concurrency
         self.keepalive = keepalive
         self._last_action = None
+        self.policy = symbol_by_name(policy or self.Policy)(self)
 
         assert self.keepalive, "can't scale down too fast."
 
     def body(self):
         with self.mutex:
-            current = min(self.qty, self.max_concurrency)
-            if current > self.processes:
-                self.scale_up(current - self.processes)
-            elif current < self.processes:
-                self.scale_down(
-                    (self.processes - current) - self.min_concurrency)
+            self.maybe_scale()
         sleep(1.0)
     scale = body  # XXX compat
 
+    def maybe_scale(self, now=None):
+        target = self.policy.target(now or time())
+        target = max(min(target, self.max_concurrency),
+                     self.min_concurrency)
+        processes = self.processes
+        if target > processes:
+            self.scale_up(target - processes)
+        elif target < processes:
+            self.scale_down(processes - target)
+
     def update(self, max=None, min=None):
         with self.mutex:
             if max is not None:
@@ -125,7 +331,8 @@ class Autoscaler(bgThread):
         return {"max": self.max_concurrency,
                 "min": self.min_concurrency,
                 "current": self.processes,
-                "qty": self.qty}
+                "qty": self.qty,
+                "policy": self.policy.info()}
 
     @property
     def qty(self):
@@ -21,6 +21,7 @@ from __future__ import with_statement
 import threading
 
 from collections import deque
+from heapq import heappush, heappop
 from time import time, sleep
 from Queue import Queue, Empty
 
@@ -52,9 +53,11 @@ class TaskBucket(object):
          "feed.refresh": Queue(),
          "video.compress": TokenBucketQueue(fill_rate=2)}
 
-    The get operation will iterate over these until one of the buckets
-    is able to return an item.  The underlying datastructure is a `dict`,
-    so the order is ignored here.
+    Buckets that have items waiting are kept in a round-robin queue
+    of ready buckets, so the get operation never has to look at buckets
+    that are empty.  If a bucket is throttled it is moved to a heap
+    ordered by the time its next token will be available, and is not
+    considered again until that time has passed.
 
     :param task_registry: The task registry used to get the task
                           type class for a given task name.
@@ -68,14 +71,27 @@ class TaskBucket(object):
         self.immediate = deque()
         self.mutex = threading.Lock()
         self.not_empty = threading.Condition(self.mutex)
+        self._reset_schedule()
+
+    def _reset_schedule(self):
+        #: Names of buckets with items that can be consumed right away.
+        self._ready = deque()
+        #: Heap of ``(time, name)`` for throttled buckets with items.
+        self._waiting = []
+        #: Names present in either ``_ready`` or ``_waiting``.
+        self._scheduled = set()
 
     def put(self, request):
         """Put a :class:`~celery.worker.job.Request` into
         the appropiate bucket."""
-        if request.name not in self.buckets:
-            self.add_bucket_for_type(request.name)
-        self.buckets[request.name].put_nowait(request)
+        name = request.name
+        if name not in self.buckets:
+            self.add_bucket_for_type(name)
+        self.buckets[name].put_nowait(request)
         with self.mutex:
+            if name not in self._scheduled:
+                self._scheduled.add(name)
+                self._ready.append(name)
             self.not_empty.notify()
     put_nowait = put
 
@@ -86,40 +102,49 @@ class TaskBucket(object):
             raise Empty()
 
     def _get(self):
-        # If the first bucket is always returning items, we would never
-        # get to fetch items from the other buckets. So we always iterate over
-        # all the buckets and put any ready items into a queue called
-        # "immediate". This queue is always checked for cached items first.
+        # Items already moved to the "immediate" queue are always
+        # returned first.
         try:
             return 0, self._get_immediate()
         except Empty:
             pass
 
-        remaining_times = []
-        for bucket in self.buckets.values():
-            remaining = bucket.expected_time()
-            if not remaining:
-                try:
-                    # Just put any ready items into the immediate queue.
-                    self.immediate.append(bucket.get_nowait())
-                except Empty:
-                    pass
-                except RateLimitExceeded:
-                    remaining_times.append(bucket.expected_time())
+        ready, waiting, scheduled = self._ready, self._waiting, self._scheduled
+        now = time()
+
+        # Throttled buckets whose next token is due are ready again.
+        while waiting and waiting[0][0] <= now:
+            ready.append(heappop(waiting)[1])
+
+        # Buckets are served round-robin, so that a very busy
+        # bucket cannot starve the others.
+        while ready:
+            name = ready.popleft()
+            bucket = self.buckets.get(name)
+            if bucket is None:
+                scheduled.discard(name)
+                continue
+            try:
+                item = bucket.get_nowait()
+            except Empty:
+                scheduled.discard(name)
+                continue
+            except RateLimitExceeded:
+                heappush(waiting, (now + bucket.expected_time(), name))
+                continue
+            if bucket.qsize():
+                ready.append(name)
             else:
-                remaining_times.append(remaining)
+                scheduled.discard(name)
+            return 0, item
 
-        # Try the immediate queue again.
-        try:
-            return 0, self._get_immediate()
-        except Empty:
-            if not remaining_times:
-                # No items in any of the buckets.
-                raise
+        if not waiting:
+            # No items in any of the buckets.
+            raise Empty()
 
-            # There's items, but have to wait before we can retrieve them,
-            # return the shortest remaining time.
-            return min(remaining_times), None
+        # There's items, but have to wait before we can retrieve them,
+        # return the time until the first token is available.
+        return max(waiting[0][0] - now, 0.001), None
 
     def get(self, block=True, timeout=None):
         """Retrive the task from the first available bucket.
@@ -144,7 +169,9 @@ class TaskBucket(object):
                 if remaining_time:
                     if not block or (timeout and time() - tstart > timeout):
                         raise Empty()
-                    sleep(min(remaining_time, timeout or 1))
+                    # releases the mutex, so a new item put into a bucket
+                    # that is not throttled will wake us up immediately.
+                    not_empty.wait(min(remaining_time, timeout or 1))
                 else:
                     return item
 
@@ -212,6 +239,9 @@ class TaskBucket(object):
         """Delete the data in all of the buckets."""
         for bucket in self.buckets.values():
             bucket.clear()
+        with self.mutex:
+            self.immediate.clear()
+            self._reset_schedule()
 
     @property
     def items(self):
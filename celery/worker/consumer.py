@@ -84,7 +84,7 @@ from kombu.utils.encoding import safe_repr
 
 from celery.app import app_or_default
 from celery.datastructures import AttributeDict
-from celery.exceptions import InvalidTaskError
+from celery.exceptions import ImproperlyConfigured, InvalidTaskError
 from celery.utils import timer2
 from celery.utils.functional import noop
 from celery.utils.log import get_logger
@@ -93,13 +93,12 @@ from . import state
 from .abstract import StartStopComponent
 from .control import Panel
 from .heartbeat import Heart
+from .parking import Parking
+from .prefetch import AdaptivePrefetch, PREFETCH_COUNT_MAX
 
 RUN = 0x1
 CLOSE = 0x2
 
-#: Prefetch count can't exceed short.
-PREFETCH_COUNT_MAX = 0xFFFF
-
 UNKNOWN_FORMAT = """\
 Received and deleted unknown message. Wrong destination?!?
 
@@ -130,6 +129,13 @@ The full contents of the message body was:
 %s
 """
 
+#: Error message for when ETA parking is enabled without a db.
+ETA_PARKING_DB_MISSING = """\
+The CELERYD_ETA_HORIZON setting requires the CELERYD_ETA_PARKING_DB
+setting, as parked tasks are acknowledged and would be lost if
+the worker is shut down.
+"""
+
 MESSAGE_REPORT_FMT = """\
 body: %s {content_type:%s content_encoding:%s delivery_info:%s}\
 """
@@ -164,7 +170,10 @@ class Component(StartStopComponent):
                 pool=w.pool,
                 priority_timer=w.priority_timer,
                 app=w.app,
-                controller=w)
+                controller=w,
+                eta_horizon=w.eta_horizon,
+                eta_parking_db=w.eta_parking_db,
+                prefetch_window=w.prefetch_window)
         return c
 
 
@@ -215,6 +224,22 @@ class QoS(object):
             if self.value:
                 self._sub(n)
 
+    def adjust_eventually(self, n):
+        """Add n to the value, where n may be negative,
+        but do not update the qos.
+
+        The value will never be less than 1.  The MainThread will
+        be responsible for calling :meth:`update` when necessary.
+
+        Returns the new value, which is 0 if the value was not
+        adjusted (the prefetch count is unlimited).
+
+        """
+        with self._mutex:
+            if self.value:
+                self.value = max(self.value + n, 1)
+            return self.value
+
     def set(self, pcount):
         """Set channel prefetch_count setting."""
         if pcount != self.prev:
@@ -292,13 +317,25 @@ class Consumer(object):
     #: as sending heartbeats.
     priority_timer = None
 
+    #: A :class:`~celery.worker.parking.Parking` instance keeping tasks
+    #: with an eta beyond the :setting:`CELERYD_ETA_HORIZON` out of
+    #: memory, or :const:`None` if disabled.
+    parking = None
+
+    #: A :class:`~celery.worker.prefetch.AdaptivePrefetch` instance
+    #: adjusting the prefetch count to the service time of tasks
+    #: (see :setting:`CELERYD_PREFETCH_WINDOW`), or :const:`None`
+    #: if disabled.
+    prefetch = None
+
     # Consumer state, can be RUN or CLOSE.
     _state = None
 
     def __init__(self, ready_queue, eta_schedule,
             init_callback=noop, send_events=False, hostname=None,
             initial_prefetch_count=2, pool=None, app=None,
-            priority_timer=None, controller=None, **kwargs):
+            priority_timer=None, controller=None, eta_horizon=None,
+            eta_parking_db=None, prefetch_window=None, **kwargs):
         self.app = app_or_default(app)
         self.connection = None
         self.task_consumer = None
@@ -314,6 +351,14 @@ class Consumer(object):
         self.heart = None
         self.pool = pool
         self.priority_timer = priority_timer or timer2.default_timer
+        if eta_horizon:
+            if not eta_parking_db:
+                raise ImproperlyConfigured(ETA_PARKING_DB_MISSING)
+            self.parking = Parking(self.app, self.priority_timer,
+                                   eta_horizon, eta_parking_db)
+        if prefetch_window and initial_prefetch_count:
+            self.prefetch = AdaptivePrefetch(self.priority_timer,
+                                             prefetch_window, self.pool)
         pidbox_state = AttributeDict(app=self.app,
                                      hostname=self.hostname,
                                      listener=self,     # pre 2.2
@@ -398,6 +443,9 @@ class Consumer(object):
                       task.eta, exc, task.info(safe=True), exc_info=True)
                 task.acknowledge()
             else:
+                if self.parking is not None and \
+                        self.parking.should_park(eta):
+                    return self.parking.park(task, eta)
                 self.qos.increment()
                 self.eta_schedule.apply_at(eta,
                                            self.apply_eta_task, (task, ))
@@ -595,6 +643,8 @@ class Consumer(object):
                                     on_decode_error=self.on_decode_error)
         # QoS: Reset prefetch window.
         self.qos = QoS(self.task_consumer, self.initial_prefetch_count)
+        if self.prefetch is not None:
+            self.prefetch.start(self.qos)
         self.qos.update()
 
         # receive_message handles incoming messages.
@@ -607,7 +657,8 @@ class Consumer(object):
         prev_event_dispatcher = self.event_dispatcher
         self.event_dispatcher = self.app.events.Dispatcher(self.connection,
                                                 hostname=self.hostname,
-                                                enabled=self.send_events)
+                                                enabled=self.send_events,
+                                                timer=self.priority_timer)
         if prev_event_dispatcher:
             self.event_dispatcher.copy_buffer(prev_event_dispatcher)
             self.event_dispatcher.flush()
@@ -615,6 +666,10 @@ class Consumer(object):
         # Restart heartbeat thread.
         self.restart_heartbeat()
 
+        # Start readmitting parked ETA tasks.
+        if self.parking is not None:
+            self.parking.start()
+
         # reload all task's execution strategies.
         self.update_strategies()
 
@@ -668,6 +723,10 @@ class Consumer(object):
         self._state = CLOSE
         debug("Stopping consumers...")
         self.stop_consumers(close_connection=False)
+        if self.parking is not None:
+            self.parking.stop()
+        if self.prefetch is not None:
+            self.prefetch.stop()
 
     @property
     def info(self):
@@ -682,4 +741,7 @@ class Consumer(object):
         if self.connection:
             conninfo = self.connection.info()
             conninfo.pop("password", None)  # don't send password.
-        return {"broker": conninfo, "prefetch_count": self.qos.value}
+        info = {"broker": conninfo, "prefetch_count": self.qos.value}
+        if self.prefetch is not None:
+            info["adaptive_prefetch"] = self.prefetch.info()
+        return info
@@ -12,6 +12,7 @@
 from __future__ import absolute_import
 
 from datetime import datetime
+from itertools import count
 
 from kombu.utils.encoding import safe_repr
 
@@ -143,9 +144,9 @@ def time_limit(panel, task_name=None, hard=None, soft=None, **kwargs):
 
 
 @Panel.register
-def dump_schedule(panel, safe=False, **kwargs):
+def dump_schedule(panel, safe=False, start=0, limit=None, **kwargs):
     schedule = panel.consumer.eta_schedule.schedule
-    if not schedule.queue:
+    if schedule.empty():
         logger.info("--Empty schedule--")
         return []
 
@@ -153,10 +154,11 @@ def dump_schedule(panel, safe=False, **kwargs):
             datetime.utcfromtimestamp(item["eta"]),
             item["priority"],
             item["item"])
-    info = map(formatitem, enumerate(schedule.info()))
+    items = list(schedule.info(start, limit))
+    info = map(formatitem, zip(count(start), items))
     logger.debug("* Dump of current schedule:\n%s", "\n".join(info))
     scheduled_tasks = []
-    for item in schedule.info():
+    for item in items:
         scheduled_tasks.append({"eta": item["eta"],
                                 "priority": item["priority"],
                                 "request":
@@ -24,7 +24,9 @@ from kombu.utils.encoding import safe_repr, safe_str
 
 from celery import current_app
 from celery import exceptions
+from celery import states
 from celery.app import app_or_default
+from celery.app.task import BaseTask
 from celery.datastructures import ExceptionInfo
 from celery.task.trace import build_tracer, trace_task, report_internal_error
 from celery.platforms import set_mp_process_title as setps
@@ -41,6 +43,7 @@ debug, info, warn, error = (logger.debug, logger.info,
                             logger.warn, logger.error)
 
 # Localize
+_task_execute = BaseTask.execute.im_func
 tz_to_local = timezone.to_local
 tz_or_local = timezone.tz_or_local
 tz_utc = timezone.utc
@@ -48,6 +51,35 @@ tz_utc = timezone.utc
 NEEDS_KWDICT = sys.version_info <= (2, 6)
 
 
+#: Request fields that are the same for every task executed by the
+#: worker (see :func:`install_context`).
+context = None
+_context_key = None
+
+#: Set to false to not update the process title for every task.
+process_titles = True
+
+CONTEXT_NOT_INSTALLED = """\
+Job record without request fields, but the worker context is not installed \
+in this process: install_context() must be called in the pool processes too.\
+"""
+
+
+def install_context(hostname, loglevel=None, logfile=None, titles=True):
+    """Install the request fields that are the same for every task
+    executed by this worker, so that they don't have to be sent
+    to the pool with every task.
+
+    Must be called both in the worker and in the pool processes.
+
+    """
+    global context, _context_key, process_titles
+    context = {"hostname": hostname, "loglevel": loglevel,
+               "logfile": logfile, "is_eager": False}
+    _context_key = (hostname, loglevel, logfile)
+    process_titles = titles
+
+
 def execute_and_trace(name, uuid, args, kwargs, request=None, **opts):
     """This is a pickleable method used as a target when applying to pools.
 
@@ -59,17 +91,58 @@ def execute_and_trace(name, uuid, args, kwargs, request=None, **opts):
     task = current_app.tasks[name]
     try:
         hostname = opts.get("hostname")
-        setps("celeryd", name, hostname, rate_limit=True)
+        if process_titles:
+            setps("celeryd", name, hostname, rate_limit=True)
         try:
             if task.__tracer__ is None:
                 task.__tracer__ = build_tracer(name, task, **opts)
             return task.__tracer__(uuid, args, kwargs, request)[0]
         finally:
-            setps("celeryd", "-idle-", hostname, rate_limit=True)
+            if process_titles:
+                setps("celeryd", "-idle-", hostname, rate_limit=True)
     except Exception, exc:
         return report_internal_error(task, exc)
 
 
+def execute_job(body, kwargs, delivery_info, fields=None):
+    """Executes a job record created by :meth:`Request.job`
+    in a pool process.
+
+    :param body: The task message body.
+    :param kwargs: Keyword arguments, if different from the
+        keyword arguments in the message body.
+    :param delivery_info: Delivery info of the task message.
+    :keyword fields: Request fields to use instead of the
+        installed :data:`context`.
+
+    """
+    if fields is None:
+        if context is None:
+            raise RuntimeError(CONTEXT_NOT_INSTALLED)
+        fields = context
+    body.update(fields)
+    body["delivery_info"] = delivery_info
+    return execute_and_trace(body["task"], body["id"],
+                             body.get("args", []),
+                             body.get("kwargs", {}) if kwargs is None
+                                else kwargs,
+                             body, hostname=body["hostname"])
+
+
+def execute_many(jobs):
+    """Like :func:`execute_job`, but executes a list of job records in
+    sequence.
+
+    Returns a list of ``(time_start, retval)`` tuples, one for each job.
+
+    """
+    results = []
+    for job in jobs:
+        time_start = time.time()
+        results.append((time_start, execute_job(*job)))
+    return results
+
+
 class Request(object):
     """A request for task execution."""
     __slots__ = ("app", "name", "id", "args", "kwargs",
@@ -80,7 +153,8 @@ class Request(object):
                  "_does_debug", "_does_info", "request_dict",
                  "acknowledged", "success_msg", "error_msg",
                  "retry_msg", "time_start", "worker_pid",
-                 "_already_revoked", "_terminate_on_ack", "_tzlocal")
+                 "_already_revoked", "_terminate_on_ack", "_tzlocal",
+                 "message")
 
     #: Format string used to log task success.
     success_msg = """\
@@ -103,7 +177,7 @@ class Request(object):
     def __init__(self, body, on_ack=noop,
             hostname=None, eventer=None, app=None,
             connection_errors=None, request_dict=None,
-            delivery_info=None, task=None, **opts):
+            delivery_info=None, task=None, message=None, **opts):
         self.app = app or app_or_default(app)
         name = self.name = body["task"]
         self.id = body["id"]
@@ -153,13 +227,14 @@ class Request(object):
         self._does_info = logger.isEnabledFor(logging.INFO)
 
         self.request_dict = body
+        self.message = message
 
     @classmethod
     def from_message(cls, message, body, **kwargs):
         # should be deprecated
         return Request(body,
                    delivery_info=getattr(message, "delivery_info", None),
-                   **kwargs)
+                   message=message, **kwargs)
 
     def extend_with_default_kwargs(self, loglevel, logfile):
         """Extend the tasks keyword arguments with standard task arguments.
@@ -202,18 +277,8 @@ class Request(object):
             return
 
         task = self.task
-        hostname = self.hostname
-        kwargs = self.kwargs
-        if self.task.accept_magic_kwargs:
-            kwargs = self.extend_with_default_kwargs(loglevel, logfile)
-        request = self.request_dict
-        request.update({"loglevel": loglevel, "logfile": logfile,
-                        "hostname": hostname, "is_eager": False,
-                        "delivery_info": self.delivery_info})
-        result = pool.apply_async(execute_and_trace,
-                                  args=(self.name, self.id, self.args, kwargs),
-                                  kwargs={"hostname": hostname,
-                                          "request": request},
+        result = pool.apply_async(execute_job,
+                                  args=self.job(loglevel, logfile),
                                   accept_callback=self.on_accepted,
                                   timeout_callback=self.on_timeout,
                                   callback=self.on_success,
@@ -222,6 +287,23 @@ class Request(object):
                                   timeout=task.time_limit)
         return result
 
+    def job(self, loglevel=None, logfile=None):
+        """Returns the job record used to execute this task in a
+        pool process (the arguments to :func:`execute_job`).
+
+        Only the fields that vary between tasks are included, unless
+        the fields differ from the installed :data:`context`.
+
+        """
+        kwargs = None
+        if self.task.accept_magic_kwargs:
+            kwargs = self.extend_with_default_kwargs(loglevel, logfile)
+        if (self.hostname, loglevel, logfile) == _context_key:
+            return self.request_dict, kwargs, self.delivery_info
+        return (self.request_dict, kwargs, self.delivery_info,
+                {"hostname": self.hostname, "loglevel": loglevel,
+                 "logfile": logfile, "is_eager": False})
+
     def execute(self, loglevel=None, logfile=None):
         """Execute the task in a :func:`~celery.task.trace.trace_task`.
 
@@ -255,7 +337,7 @@ class Request(object):
         if self.expires and datetime.now(self.tzlocal) > self.expires:
             state.revoked.add(self.id)
             if self.store_errors:
-                self.task.backend.mark_as_revoked(self.id)
+                self.task.backend.mark_as_revoked(self.id, request=self)
 
     def terminate(self, pool, signal=None):
         if self.time_start:
@@ -308,7 +390,7 @@ class Request(object):
             exc = exceptions.TimeLimitExceeded(timeout)
 
         if self.store_errors:
-            self.task.backend.mark_as_failure(self.id, exc)
+            self.task.backend.mark_as_failure(self.id, exc, request=self)
 
     def on_success(self, ret_value, now=None):
         """Handler called if the task was successfully processed."""
@@ -360,7 +442,8 @@ class Request(object):
             # time to write the result.
             if isinstance(exc_info.exception, exceptions.WorkerLostError) and \
                     self.store_errors:
-                self.task.backend.mark_as_failure(self.id, exc_info.exception)
+                self.task.backend.mark_as_failure(self.id, exc_info.exception,
+                                                  request=self)
             # (acks_late) acknowledge after result stored.
             if self.task.acks_late:
                 self.acknowledge()
@@ -443,6 +526,12 @@ class Request(object):
         return (not self.task.ignore_result
                 or self.task.store_errors_even_if_ignored)
 
+    @property
+    def reply_to(self):
+        """Name of the queue the result should be sent to, if the
+        client requested results to be sent to a reply queue."""
+        return self.request_dict.get("reply_to")
+
     def _compat_get_task_id(self):
         return self.id
 
@@ -459,6 +548,110 @@ class Request(object):
     task_name = property(_compat_get_task_name, _compat_set_task_name)
 
 
+class RequestBatch(object):
+    """A list of requests executed in sequence by the same pool job.
+
+    Sending several short tasks to the pool as a single job saves
+    the overhead of the pool pipe for every task, while the
+    accept, success and failure callbacks are still called for
+    every request in the batch.
+
+    Only requests accepted by :meth:`batchable` should be added to
+    a batch.
+
+    """
+
+    def __init__(self, requests):
+        self.requests = list(requests)
+
+    @staticmethod
+    def batchable(request):
+        """Returns true if the request can be executed as part
+        of a batch.
+
+        Tasks with a time limit can't be part of a batch,
+        as the limit would apply to the batch as a whole, and neither
+        can tasks that customize how they are executed by the worker.
+
+        """
+        task = request.task
+        return (not task.time_limit and not task.soft_time_limit and
+                    getattr(task.execute, "im_func", None) is _task_execute)
+
+    def execute_using_pool(self, pool, loglevel=None, logfile=None):
+        """Like :meth:`Request.execute_using_pool`, but sends
+        all the requests in the batch as a single job."""
+        requests = self.requests = [request for request in self.requests
+                                        if not request.revoked()]
+        if not requests:
+            return
+        return pool.apply_async(execute_many,
+                                args=([request.job(loglevel, logfile)
+                                            for request in requests], ),
+                                accept_callback=self.on_accepted,
+                                callback=self.on_success,
+                                error_callback=self.on_failure)
+
+    def on_accepted(self, pid, time_accepted):
+        """Handler called when the batch is accepted by a pool worker."""
+        for request in self.requests:
+            request.on_accepted(pid, time_accepted)
+
+    def on_success(self, ret_value):
+        """Handler called with the results of the batch, passes
+        the result of every task to its request."""
+        if isinstance(ret_value, ExceptionInfo):
+            return self.on_failure(ret_value)
+        for request, (time_start, retval) in zip(self.requests, ret_value):
+            request.time_start = time_start
+            request.on_success(retval)
+
+    def on_failure(self, exc_info):
+        """Handler called if the batch job failed, e.g. if the
+        pool worker was lost.
+
+        Requests already executed by the lost pool worker are
+        completed using the state they stored in the result backend,
+        so that it's not overwritten.
+
+        """
+        for request in self.requests:
+            meta = self._stored_meta(request)
+            if meta is None:
+                request.on_failure(exc_info)
+            elif meta["status"] == states.SUCCESS:
+                request.on_success(meta["result"])
+            else:
+                request.on_failure(self._stored_exc_info(request, meta))
+
+    def _stored_meta(self, request):
+        # Returns the state stored for the request if it's ready,
+        # or :const:`None` if it's not, or can't be known.
+        backend = request.task.backend
+        if not backend.supports_peek or not request.store_errors:
+            return
+        try:
+            meta = backend.get_task_meta(request.id, cache=False)
+        except Exception, exc:
+            error("Couldn't get state of task %s: %r", request.id, exc,
+                  exc_info=True)
+            return
+        if meta.get("status") in states.READY_STATES:
+            return meta
+
+    def _stored_exc_info(self, request, meta):
+        exc = request.task.backend.exception_to_python(meta["result"])
+        if not isinstance(exc, BaseException):
+            exc = Exception(exc)
+        try:
+            raise exc
+        except BaseException:
+            return ExceptionInfo(sys.exc_info())
+
+    def __len__(self):
+        return len(self.requests)
+
+
 class TaskRequest(Request):
 
     def __init__(self, name, id, args=(), kwargs={},
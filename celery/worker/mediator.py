@@ -42,8 +42,11 @@ class WorkerComponent(StartStopComponent):
         return not w.disable_rate_limits or w.pool_cls.requires_mediator
 
     def create(self, w):
+        batch_size = w.pool.batch_size
+        callback = w.process_tasks if batch_size > 1 else w.process_task
         m = w.mediator = self.instantiate(w.mediator_cls, w.ready_queue,
-                                          app=w.app, callback=w.process_task)
+                                          app=w.app, callback=callback,
+                                          batch_size=batch_size)
         return m
 
 
@@ -55,10 +58,15 @@ class Mediator(bgThread):
     #: Callback called when a task is obtained.
     callback = None
 
-    def __init__(self, ready_queue, callback, app=None, **kw):
+    #: If more than one, the callback is called with a list of up to
+    #: this many tasks that are ready at the same time.
+    batch_size = 1
+
+    def __init__(self, ready_queue, callback, app=None, batch_size=1, **kw):
         self.app = app_or_default(app)
         self.ready_queue = ready_queue
         self.callback = callback
+        self.batch_size = batch_size
         self._does_debug = logger.isEnabledFor(logging.DEBUG)
         super(Mediator, self).__init__()
 
@@ -68,6 +76,9 @@ class Mediator(bgThread):
         except Empty:
             return
 
+        if self.batch_size > 1:
+            return self.body_batch(task)
+
         if task.revoked():
             return
 
@@ -84,3 +95,26 @@ class Mediator(bgThread):
                                          "name": task.name,
                                          "hostname": task.hostname}})
     move = body   # XXX compat
+
+    def body_batch(self, task):
+        tasks = [task]
+        try:
+            while len(tasks) < self.batch_size:
+                tasks.append(self.ready_queue.get_nowait())
+        except Empty:
+            pass
+        tasks = [task for task in tasks if not task.revoked()]
+        if not tasks:
+            return
+
+        if self._does_debug:
+            logger.debug("Mediator: Running callback for %s tasks",
+                         len(tasks))
+
+        try:
+            self.callback(tasks)
+        except Exception, exc:
+            logger.error("Mediator callback raised exception %r",
+                         exc, exc_info=True,
+                         extra={"data": {"ids": [task.id for task in tasks],
+                                         "hostname": tasks[0].hostname}})
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+    celery.worker.parking
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Keeps tasks with an ETA far into the future out of the
+    worker's memory.
+
+    Tasks with an eta further away than the horizon are written to
+    a local :mod:`shelve` db and acknowledged, so they don't
+    count against the prefetch limit.  The original message body is
+    published to the broker again, with the same content type, headers
+    and properties, when the task is about to be due.
+
+    :copyright: (c) 2009 - 2012 by Ask Solem.
+    :license: BSD, see LICENSE for more details.
+
+"""
+from __future__ import absolute_import
+from __future__ import with_statement
+
+import heapq
+import shelve
+import threading
+
+from time import time
+
+from kombu import Producer
+from kombu.serialization import encode
+
+from celery.utils.log import get_logger
+
+from . import state
+
+logger = get_logger(__name__)
+debug, error = logger.debug, logger.error
+
+#: Message properties kept when a parked task is published again
+#: (properties used by the transport itself are not kept).
+PROPERTIES = ("priority", "delivery_mode", "correlation_id",
+              "reply_to", "message_id", "app_id")
+
+
+class Parking(object):
+    """Parks ETA tasks in a local db until they are about to be due.
+
+    :param app: The app instance.
+    :param timer: Timer used to check for tasks to readmit.
+    :param horizon: Tasks with an eta more than this many seconds
+        into the future are parked.
+    :keyword filename: Path to the db tasks are parked in.  If not set,
+        the message bodies of parked tasks are kept in memory, and
+        are lost when the worker exits (the consumer requires a db).
+    :keyword interval: Time in seconds between checking for tasks to
+        readmit.  Default is a fourth of the horizon, but at most
+        one minute.
+
+    """
+    storage = shelve
+
+    def __init__(self, app, timer, horizon, filename=None, interval=None):
+        self.app = app
+        self.timer = timer
+        self.horizon = float(horizon)
+        self.interval = float(interval or min(self.horizon / 4.0, 60.0))
+        self.filename = filename
+        self.db = self.open()
+        self.mutex = threading.Lock()
+        self.tref = None
+        self._due = [(record[0], task_id)
+                        for task_id, record in self.db.iteritems()]
+        heapq.heapify(self._due)
+
+    def open(self):
+        if self.filename:
+            return self.storage.open(self.filename)
+        return {}
+
+    def start(self):
+        if self.tref is None:
+            self.tref = self.timer.apply_interval(self.interval * 1000.0,
+                                                  self.readmit)
+
+    def stop(self):
+        if self.tref is not None:
+            self.timer.cancel(self.tref)
+            self.tref = None
+        with self.mutex:
+            if self.filename:
+                self.db.close()
+
+    def should_park(self, eta, now=None):
+        """Returns true if a task with this eta (as a timestamp)
+        should be parked."""
+        return eta > (now or time()) + self.horizon
+
+    def park(self, task, eta):
+        """Park task until it is about to be due.
+
+        The task message is acknowledged once the task is stored.
+
+        """
+        task_id = task.id
+        if isinstance(task_id, unicode):
+            task_id = task_id.encode("utf-8")   # shelve keys must be str
+        with self.mutex:
+            self.db[task_id] = (eta, task.delivery_info) + self._raw(task)
+            self._sync()
+            heapq.heappush(self._due, (eta, task_id))
+        debug("Parked task %s until %s", task.id, eta)
+        task.acknowledge()
+
+    def readmit(self, now=None):
+        """Publish the parked tasks that will be due within
+        half the horizon, and remove them from the db."""
+        until = (now or time()) + self.horizon / 2.0
+        due = self._due
+        if not due or due[0][0] > until:
+            return 0
+        readmitted = 0
+        with self.app.pool.acquire(block=True) as conn:
+            producer = Producer(conn.default_channel)
+            with self.mutex:
+                try:
+                    while due and due[0][0] <= until:
+                        task_id = due[0][1]
+                        record = self.db.get(task_id)
+                        if record and task_id not in state.revoked:
+                            try:
+                                self._publish(producer, *record)
+                            except conn.connection_errors + \
+                                    conn.channel_errors, exc:
+                                # kept in the db, and tried again
+                                # the next time.
+                                error("Couldn't readmit parked task %s: %r",
+                                      task_id, exc, exc_info=True)
+                                break
+                            except Exception, exc:
+                                # don't let a bad record block the tasks
+                                # parked after it.
+                                error("Dropped parked task %s, as it "
+                                      "couldn't be published: %r",
+                                      task_id, exc, exc_info=True)
+                            else:
+                                readmitted += 1
+                        self.db.pop(task_id, None)
+                        heapq.heappop(due)
+                finally:
+                    self._sync()
+        debug("Readmitted %s parked task(s)", readmitted)
+        return readmitted
+
+    def _raw(self, task):
+        # The raw message, so that it's published again unchanged.
+        # Tasks not received in a message are encoded using
+        # the task's serializer.
+        message = task.message
+        if message is None:
+            content_type, content_encoding, body = encode(
+                    task.request_dict, serializer=task.task.serializer)
+            return body, content_type, content_encoding, {}, {}
+        # some transports have the priority in the delivery info.
+        properties = dict(message.delivery_info)
+        properties.update(message.properties)
+        return (message.body, message.content_type,
+                message.content_encoding, dict(message.headers or {}),
+                dict((key, properties[key]) for key in PROPERTIES
+                        if properties.get(key) is not None))
+
+    def _publish(self, producer, eta, delivery_info, body, content_type,
+            content_encoding, headers, properties):
+        producer.publish(body, exchange=delivery_info["exchange"],
+                         routing_key=delivery_info["routing_key"],
+                         content_type=content_type,
+                         content_encoding=content_encoding,
+                         headers=headers, **properties)
+
+    def _sync(self):
+        if self.filename:
+            self.db.sync()
+
+    def __len__(self):
+        return len(self._due)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+    celery.worker.prefetch
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Adapts the prefetch count of the worker to the time
+    it takes to process its tasks.
+
+    The service time of tasks (from the task being accepted by a pool
+    worker until it is ready) is sampled into a moving average.
+    By Little's law the pool can process about
+    ``concurrency / service_time`` tasks per second,
+    so to have :setting:`CELERYD_PREFETCH_WINDOW` seconds
+    worth of tasks buffered the worker needs to prefetch::
+
+        concurrency + concurrency * window / service_time
+
+    messages, which is at least one message for every pool process.
+
+    The depth of the queues is not taken into account: the number of
+    tasks waiting in the worker is limited by the prefetch count itself,
+    and prefetching more messages than are available in the broker's
+    queues does no harm.
+
+    :copyright: (c) 2009 - 2012 by Ask Solem.
+    :license: BSD, see LICENSE for more details.
+
+"""
+from __future__ import absolute_import
+
+import math
+
+from time import time
+
+from celery.utils.log import get_logger
+
+from . import state
+
+#: Prefetch count can't exceed short.
+PREFETCH_COUNT_MAX = 0xFFFF
+
+logger = get_logger(__name__)
+debug = logger.debug
+
+
+class AdaptivePrefetch(object):
+    """Adjusts the prefetch count of a consumer's
+    :class:`~celery.worker.consumer.QoS` to the observed
+    service time of tasks.
+
+    :param timer: Timer used to recalculate the prefetch count.
+    :param window: Number of seconds of work to prefetch.
+    :param pool: The worker pool, used to find the current
+        number of processes.
+    :keyword interval: Time in seconds between recalculating
+        the prefetch count.  Default is 1 second.
+    :keyword alpha: Smoothing factor of the moving average
+        of service times, the weight given to a new sample.
+
+    """
+
+    #: Moving average of the service time of tasks in seconds,
+    #: or :const:`None` if no task has been processed yet.
+    service_time = None
+
+    #: Number of service times sampled.
+    samples = 0
+
+    #: The current target prefetch count, excluding tasks
+    #: with an ETA, or :const:`None` if not calculated yet.
+    target = None
+
+    def __init__(self, timer, window, pool, interval=1.0, alpha=0.2):
+        self.timer = timer
+        self.window = float(window)
+        self.pool = pool
+        self.interval = interval
+        self.alpha = alpha
+        self.qos = None
+        self.base = None
+        self.tref = None
+
+    def start(self, qos):
+        """Start adjusting the prefetch count of `qos`, which must
+        be at its initial value (i.e. just created by the consumer)."""
+        self.qos = qos
+        self.base = qos.value
+        if self.tref is None:
+            state.ready_callbacks.append(self.task_ready)
+            self.tref = self.timer.apply_interval(self.interval * 1000.0,
+                                                  self.update)
+        self.update()
+
+    def stop(self):
+        if self.tref is not None:
+            self.timer.cancel(self.tref)
+            self.tref = None
+            state.ready_callbacks.remove(self.task_ready)
+
+    def task_ready(self, request, now=None):
+        """Samples the service time of a request that is ready."""
+        if request.time_start:
+            self.observe((now or time()) - request.time_start)
+
+    def observe(self, service_time):
+        """Add a service time sample to the moving average."""
+        if self.service_time is None:
+            self.service_time = service_time
+        else:
+            self.service_time += self.alpha * (service_time -
+                                               self.service_time)
+        self.samples += 1
+
+    @property
+    def concurrency(self):
+        return max(self.pool.num_processes or 1, 1)
+
+    def calculate(self):
+        """Returns the target prefetch count for the current
+        service time estimate."""
+        concurrency = self.concurrency
+        if self.service_time is None:
+            return self.base
+        # a zero service time would mean infinite throughput.
+        service_time = max(self.service_time, 1e-6)
+        target = concurrency + concurrency * self.window / service_time
+        return int(min(math.ceil(target), PREFETCH_COUNT_MAX))
+
+    def update(self):
+        """Recalculate the target and apply it to the QoS.
+
+        Only the value is changed, the consumer is responsible
+        for calling :meth:`QoS.update
+        <celery.worker.consumer.QoS.update>`, which
+        sets the prefetch count of the channel.
+
+        """
+        qos = self.qos
+        if qos is None:
+            return
+        target = self.calculate()
+        # the base is only moved if the value was adjusted, so that
+        # the difference isn't lost while the prefetch count is 0.
+        if target != self.base and qos.adjust_eventually(target - self.base):
+            debug("Adaptive prefetch: %s -> %s (service time: %r)",
+                  self.base, target, self.service_time)
+            self.base = target
+        self.target = target
+        return target
+
+    def info(self):
+        return {"target": self.target,
+                "window": self.window,
+                "service_time": self.service_time,
+                "samples": self.samples}
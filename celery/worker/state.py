@@ -13,27 +13,38 @@
 
 """
 from __future__ import absolute_import
+from __future__ import with_statement
 
 import os
 import platform
 import shelve
+import struct
+import whichdb
 
+from binascii import hexlify
 from collections import defaultdict
+from time import time
+from uuid import UUID
 
 from celery import __version__
 from celery.datastructures import LimitedSet
 from celery.utils import cached_property
+from celery.utils.log import get_logger
+
+logger = get_logger(__name__)
 
 #: Worker software/platform information.
 SOFTWARE_INFO = {"sw_ident": "celeryd",
                  "sw_ver": __version__,
                  "sw_sys": platform.system()}
 
-#: maximum number of revokes to keep in memory.
+#: maximum number of revokes to keep in memory
+#: (see :setting:`CELERYD_REVOKES_MAX`).
 REVOKES_MAX = 10000
 
 #: how many seconds a revoke will be active before
-#: being expired when the max limit has been exceeded.
+#: being expired when the max limit has been exceeded
+#: (see :setting:`CELERYD_REVOKE_EXPIRES`).
 REVOKE_EXPIRES = 3600
 
 #: set of all reserved :class:`~celery.worker.job.Request`'s.
@@ -48,6 +59,10 @@ total_count = defaultdict(lambda: 0)
 #: the list of currently revoked tasks.  Persistent if statedb set.
 revoked = LimitedSet(maxlen=REVOKES_MAX, expires=REVOKE_EXPIRES)
 
+#: Callbacks called with every request that is ready,
+#: e.g. to sample the service time of tasks.
+ready_callbacks = []
+
 #: Updates global state when a task has been reserved.
 task_reserved = reserved_requests.add
 
@@ -62,11 +77,11 @@ def task_ready(request):
     """Updates global state when a task is ready."""
     active_requests.discard(request)
     reserved_requests.discard(request)
+    for callback in ready_callbacks:
+        callback(request)
 
 
 if os.environ.get("CELERY_BENCH"):  # pragma: no cover
-    from time import time
-
     all_count = 0
     bench_start = None
     bench_every = int(os.environ.get("CELERY_BENCH_EVERY", 1000))
@@ -92,14 +107,25 @@ if os.environ.get("CELERY_BENCH"):  # pragma: no cover
 
 
 class Persistent(object):
+    """Stores the revoked tasks in a :mod:`shelve` database,
+    rewritten every time the state is saved."""
     storage = shelve
     _is_open = False
 
     def __init__(self, filename):
         self.filename = filename
+        time_start = time()
         self._load()
+        logger.info("Loaded %s revoked tasks from state db in %.4fs",
+                    len(revoked), time() - time_start)
 
     def save(self):
+        time_start = time()
+        self._save()
+        logger.info("Saved %s revoked tasks to state db in %.4fs",
+                    len(revoked), time() - time_start)
+
+    def _save(self):
         self.sync(self.db)
         self.db.sync()
         self.close()
@@ -109,9 +135,11 @@ class Persistent(object):
         return d
 
     def sync(self, d):
-        prev = d.get("revoked") or {}
-        prev.update(revoked.as_dict())
-        d["revoked"] = prev
+        # revokes already in the db are merged with their original
+        # timestamps, so the stored mapping is bounded by the
+        # limits of :data:`revoked`.
+        revoked.update(d.get("revoked") or {})
+        d["revoked"] = revoked.as_dict()
         return d
 
     def open(self):
@@ -129,3 +157,177 @@ class Persistent(object):
     def db(self):
         self._is_open = True
         return self.open()
+
+
+class AppendOnlyPersistent(Persistent):
+    """Stores the revoked tasks in an append-only log.
+
+    Every record is the type of the record, the time the task
+    was revoked and the task id.  Saving the state only appends
+    the tasks revoked since the state was last saved, and the log is
+    compacted to contain only the current revokes when it has grown
+    to more than :attr:`compact_factor` times the number of revokes.
+    Revokes that expired are dropped when the log is replayed at startup
+    and on compaction.
+
+    A state db written by :class:`Persistent` is migrated to the new
+    format the first time it is loaded, and the files of the old
+    database are renamed to have a ``.bak`` suffix.
+
+    """
+    #: Magic string at the start of the file.
+    magic = "CELERYSTATE\x01"
+
+    #: Record with the 16 byte binary form of an UUID task id.
+    REVOKE_UUID = "U"
+
+    #: Record with a task id prefixed by its length.
+    REVOKE = "R"
+
+    compact_factor = 2
+
+    #: Suffixes of the files a :mod:`shelve` db may be stored in,
+    #: depending on the :mod:`anydbm` module used.
+    shelve_suffixes = (".bak", "", ".db", ".dat", ".dir", ".pag")
+
+    _header = struct.Struct("!cd")
+    _length = struct.Struct("!H")
+
+    #: Number of records in the log.
+    records = 0
+
+    #: Time of the newest revoke written to the log.
+    synced_at = 0
+
+    #: Size of the complete records read by :meth:`decode`
+    #: (including the magic string).
+    decoded_size = 0
+
+    def _load(self):
+        if self._is_log():
+            self.merge(self._replay())
+        elif whichdb.whichdb(self.filename):
+            # migrate from the shelve format.
+            super(AppendOnlyPersistent, self)._load()
+            self.close()
+            self._backup_shelve()
+            self.compact()
+
+    def _backup_shelve(self):
+        for suffix in self.shelve_suffixes:
+            path = self.filename + suffix
+            if os.path.exists(path):
+                os.rename(path, path + ".bak")
+                logger.info("Migrated state db: renamed %s to %s.bak",
+                            path, path)
+
+    def _save(self):
+        if self.records > self.compact_factor * len(revoked) + 100:
+            return self.compact()
+        new = [(value, when) for value, when in revoked.as_dict().iteritems()
+                    if when > self.synced_at]
+        if new:
+            with open(self.filename, "ab") as fh:
+                if not fh.tell():
+                    fh.write(self.magic)
+                self._write(fh, new)
+
+    def compact(self):
+        """Rewrite the log so that it only contains the current revokes."""
+        self.records = 0
+        tmp = "%s.tmp" % (self.filename, )
+        with open(tmp, "wb") as fh:
+            fh.write(self.magic)
+            self._write(fh, revoked.as_dict().iteritems())
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.rename(tmp, self.filename)
+
+    def encode(self, value, when):
+        try:
+            uuid = UUID(value)
+        except (ValueError, TypeError):
+            pass
+        else:
+            if str(uuid) == value:
+                return self._header.pack(self.REVOKE_UUID, when) + uuid.bytes
+        if isinstance(value, unicode):
+            value = value.encode("utf-8")
+        return "".join([self._header.pack(self.REVOKE, when),
+                        self._length.pack(len(value)), value])
+
+    def decode(self, data):
+        """Decode log records, returning a mapping of task ids to
+        the time they were revoked."""
+        header, length = self._header, self._length
+        hsize, lsize = header.size, length.size
+        REVOKE_UUID = self.REVOKE_UUID
+        revokes, records = {}, 0
+        offset, end = len(self.magic), len(data)
+        complete = offset
+        while offset + hsize <= end:
+            type, when = header.unpack_from(data, offset)
+            offset += hsize
+            if type == REVOKE_UUID:
+                size = 16
+                if offset + size > end:
+                    break
+                h = hexlify(data[offset:offset + size])
+                value = "%s-%s-%s-%s-%s" % (
+                            h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+            else:
+                if offset + lsize > end:
+                    break
+                size, = length.unpack_from(data, offset)
+                offset += lsize
+                if offset + size > end:
+                    break
+                value = data[offset:offset + size]
+                try:
+                    value.decode("ascii")
+                except UnicodeDecodeError:
+                    value = value.decode("utf-8")
+            offset += size
+            complete = offset
+            records += 1
+            if when > revokes.get(value, 0):
+                revokes[value] = when
+        self.records = records
+        self.decoded_size = complete
+        return revokes
+
+    def merge(self, d):
+        revoked.update(d.get("revoked") or {})
+        if revoked:
+            self.synced_at = max(revoked.as_dict().itervalues())
+        return d
+
+    def _is_log(self):
+        try:
+            with open(self.filename, "rb") as fh:
+                return fh.read(len(self.magic)) == self.magic
+        except IOError:
+            return False
+
+    def _replay(self):
+        with open(self.filename, "r+b") as fh:
+            data = fh.read()
+            revokes = self.decode(data)
+            if self.decoded_size < len(data):
+                # a record was only partially written (e.g. the worker
+                # crashed while saving), so new records must not be
+                # appended after it.
+                logger.warning("Truncated incomplete record at the end "
+                               "of state db %r", self.filename)
+                fh.truncate(self.decoded_size)
+        return {"revoked": revokes}
+
+    def _write(self, fh, revokes):
+        encode, newest, chunk = self.encode, self.synced_at, []
+        for value, when in revokes:
+            chunk.append(encode(value, when))
+            if when > newest:
+                newest = when
+        fh.write("".join(chunk))
+        self.records += len(chunk)
+        self.synced_at = newest
@@ -14,6 +14,7 @@ def default(task, app, consumer):
         handle(Req(body, on_ack=ack, app=app, hostname=hostname,
                          eventer=eventer, task=task,
                          connection_errors=connection_errors,
-                         delivery_info=message.delivery_info))
+                         delivery_info=message.delivery_info,
+                         message=message))
 
     return task_message_handler
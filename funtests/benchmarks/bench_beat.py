@@ -0,0 +1,71 @@
+"""Compares the heap driven :meth:`celery.beat.Scheduler.tick` with the
+previous implementation that checked every entry at every tick.
+
+Usage: bench_beat.py [entries=100k] [ticks=10]
+
+"""
+import random
+import sys
+import time
+
+from datetime import timedelta
+
+from celery import current_app
+from celery.beat import Scheduler
+from celery.schedules import schedule
+
+DEFAULT_ENTRIES = 100000
+DEFAULT_TICKS = 10
+
+
+class LegacyScheduler(Scheduler):
+    """The previous implementation, kept here for comparison."""
+
+    def tick(self):
+        remaining_times = []
+        try:
+            for entry in self.schedule.itervalues():
+                next_time_to_run = self.maybe_due(entry, self.publisher)
+                if next_time_to_run:
+                    remaining_times.append(next_time_to_run)
+        except RuntimeError:
+            pass
+
+        return min(remaining_times + [self.max_interval])
+
+
+def create_scheduler(cls, n):
+    now = current_app.now()
+    scheduler = cls(app=current_app, lazy=True)
+    scheduler.__dict__["publisher"] = None
+    scheduler.update_from_dict(dict(
+        ("bench.%s" % (i, ), {
+            "task": "bench.task", "last_run_at": now,
+            "schedule": schedule(timedelta(
+                            seconds=random.randint(60, 3600)))})
+            for i in xrange(n)))
+    return scheduler
+
+
+def main(argv=sys.argv):
+    n, ticks = DEFAULT_ENTRIES, DEFAULT_TICKS
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        ticks = int(argv[2])
+    for cls in (LegacyScheduler, Scheduler):
+        scheduler = create_scheduler(cls, n)
+        time_start = time.time()
+        scheduler.tick()
+        first = time.time() - time_start
+        time_start = time.time()
+        for i in xrange(ticks):
+            scheduler.tick()
+        total = time.time() - time_start
+        print("-- %s: %s entries: first tick %.4fs, "
+              "%s ticks: %.4fs total, %.6fs/tick" % (
+                cls.__name__, n, first, ticks, total, total / ticks))
+
+
+if __name__ == "__main__":
+    main()
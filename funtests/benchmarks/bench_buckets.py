@@ -0,0 +1,103 @@
+"""Compares the ready-queue/heap based :class:`TaskBucket` with the
+previous implementation that scanned every bucket on each get.
+
+Usage: bench_buckets.py [n=20k]
+
+"""
+import os
+import sys
+import time
+
+from Queue import Empty
+
+from celery.worker.buckets import TaskBucket, RateLimitExceeded
+
+DEFAULT_ITS = 20000
+TYPES = (10, 100, 1000)
+
+#: Number of task types that are rate limited in every run.
+THROTTLED = 3
+
+
+class ScanningTaskBucket(TaskBucket):
+    """The previous implementation, kept here for comparison."""
+
+    def put(self, request):
+        if request.name not in self.buckets:
+            self.add_bucket_for_type(request.name)
+        self.buckets[request.name].put_nowait(request)
+        with self.mutex:
+            self.not_empty.notify()
+
+    def _get(self):
+        try:
+            return 0, self._get_immediate()
+        except Empty:
+            pass
+
+        remaining_times = []
+        for bucket in self.buckets.values():
+            remaining = bucket.expected_time()
+            if not remaining:
+                try:
+                    self.immediate.append(bucket.get_nowait())
+                except Empty:
+                    pass
+                except RateLimitExceeded:
+                    remaining_times.append(bucket.expected_time())
+            else:
+                remaining_times.append(remaining)
+
+        try:
+            return 0, self._get_immediate()
+        except Empty:
+            if not remaining_times:
+                raise
+            return min(remaining_times), None
+
+
+class Task(object):
+
+    def __init__(self, rate_limit=None):
+        self.rate_limit = rate_limit
+
+
+class Request(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+def bench(cls, ntypes, n):
+    names = ["bench.task%d" % (i, ) for i in xrange(ntypes)]
+    reg = dict((name, Task()) for name in names)
+    for name in names[:THROTTLED]:
+        reg[name] = Task(rate_limit="1/s")
+    bucket = cls(task_registry=reg)
+    for name in names[:THROTTLED]:
+        # keep the rate limited buckets busy.
+        bucket.put(Request(name))
+        bucket.put(Request(name))
+    unthrottled = [Request(name) for name in names[THROTTLED:]]
+    get, put = bucket.get, bucket.put
+
+    time_start = time.time()
+    for i in xrange(n):
+        put(unthrottled[i % len(unthrottled)])
+        get(timeout=1)
+    return time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for ntypes in TYPES:
+        for cls in (ScanningTaskBucket, TaskBucket):
+            total = bench(cls, ntypes, n)
+            print("-- %s: %s types, %s gets: %.4fs total, %d gets/s" % (
+                    cls.__name__, ntypes, n, total, n / total))
+
+
+if __name__ == "__main__":
+    main()
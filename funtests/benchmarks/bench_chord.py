@@ -0,0 +1,83 @@
+"""Measures the time it takes a key/value store result backend to
+process the return of every part of a chord, compared to the previous
+implementation that restored the taskset for every part and joined
+the results one by one when the chord was complete.
+
+Uses the ``memory://`` cache backend, so the numbers show the number
+of round-trips (and the decoding) rather than the latency of a server.
+
+Usage: bench_chord.py [n=1000] [chords=10]
+
+"""
+import sys
+import time
+
+from mock import Mock
+
+from celery import current_app
+from celery.backends.cache import CacheBackend
+from celery.result import AsyncResult, TaskSetResult
+from celery.task import subtask
+from celery.utils import uuid
+
+DEFAULT_ITS = 1000
+DEFAULT_CHORDS = 10
+
+# the results restored from the taskset use the default backend.
+current_app.conf.CELERY_RESULT_BACKEND = "cache"
+current_app.conf.CELERY_CACHE_BACKEND = "memory://"
+
+
+def legacy_on_chord_part_return(self, task, propagate=False):
+    """The previous implementation, kept here for comparison."""
+    setid = task.request.taskset
+    key = self.get_key_for_chord(setid)
+    deps = TaskSetResult.restore(setid, backend=self)
+    if self.incr(key) >= deps.total:
+        subtask(task.request.chord).delay(deps.join(propagate=propagate))
+        deps.delete(backend=self)
+        self.client.delete(key)
+    else:
+        self.expire(key, 86400)
+
+
+def bench(on_chord_part_return, n, chords):
+    backend = current_app.backend
+    callback = Mock()
+    callback.name = "bench_chord.callback"
+    current_app.tasks[callback.name] = callback
+    total = 0.0
+    for i in xrange(chords):
+        setid, tids = uuid(), [uuid() for i in xrange(n)]
+        backend.on_chord_apply(setid, None,
+                               result=[AsyncResult(tid) for tid in tids])
+        part = Mock()
+        part.request.taskset = setid
+        part.request.chord = subtask(callback)
+        for tid in tids:
+            backend.mark_as_done(tid, tid)
+        backend._cache.clear()
+        time_start = time.time()
+        for tid in tids:
+            on_chord_part_return(backend, part)
+        total += time.time() - time_start
+    assert callback.apply_async.call_count == chords
+    current_app.tasks.pop(callback.name)
+    return total
+
+
+def main(argv=sys.argv):
+    n, chords = DEFAULT_ITS, DEFAULT_CHORDS
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        chords = int(argv[2])
+    for name, fun in (("legacy", legacy_on_chord_part_return),
+                      ("counter", CacheBackend.on_chord_part_return)):
+        total = bench(fun, n, chords)
+        print("-- %s: %s chords of %s: %.4fs total, %.2fus/part" % (
+                name, chords, n, total, total / (n * chords) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compares :meth:`celery.beat.Scheduler.tick` with a schedule
+of crontab entries using the compiled :class:`~celery.schedules.crontab`,
+with the previous implementation that searched the minute, hour and
+day of week sets at every tick.
+
+Usage: bench_crontab.py [entries=10k] [ticks=10]
+
+"""
+import sys
+import time
+
+from dateutil.relativedelta import relativedelta
+
+from celery import current_app
+from celery.beat import Scheduler
+from celery.schedules import crontab
+from celery.utils.timeutils import remaining
+
+DEFAULT_ENTRIES = 10000
+DEFAULT_TICKS = 10
+
+
+class legacy_crontab(crontab):
+    """The previous implementation, kept here for comparison."""
+
+    def remaining_estimate(self, last_run_at):
+        weekday = last_run_at.isoweekday()
+        weekday = 0 if weekday == 7 else weekday
+
+        execute_this_hour = (weekday in self.day_of_week and
+                                last_run_at.hour in self.hour and
+                                    last_run_at.minute < max(self.minute))
+
+        if execute_this_hour:
+            next_minute = min(minute for minute in self.minute
+                                        if minute > last_run_at.minute)
+            delta = relativedelta(minute=next_minute,
+                                  second=0,
+                                  microsecond=0)
+        else:
+            next_minute = min(self.minute)
+            execute_today = (weekday in self.day_of_week and
+                                 last_run_at.hour < max(self.hour))
+
+            if execute_today:
+                next_hour = min(hour for hour in self.hour
+                                        if hour > last_run_at.hour)
+                delta = relativedelta(hour=next_hour,
+                                      minute=next_minute,
+                                      second=0,
+                                      microsecond=0)
+            else:
+                next_hour = min(self.hour)
+                next_day = min([day for day in self.day_of_week
+                                    if day > weekday] or
+                               self.day_of_week)
+                add_week = next_day == weekday
+
+                delta = relativedelta(weeks=add_week and 1 or 0,
+                                      weekday=(next_day - 1) % 7,
+                                      hour=next_hour,
+                                      minute=next_minute,
+                                      second=0,
+                                      microsecond=0)
+
+        return remaining(last_run_at, delta, now=self.nowfun())
+
+
+def create_scheduler(cls, n):
+    now = current_app.now()
+    scheduler = Scheduler(app=current_app, lazy=True)
+    scheduler.__dict__["publisher"] = None
+    for i in xrange(n):
+        scheduler.add(name="bench.%s" % (i, ), task="bench.task",
+                      last_run_at=now,
+                      schedule=cls(minute=[i % 60, (i + 30) % 60],
+                                   hour="%s-23" % (i % 24, ),
+                                   day_of_week="mon-fri"))
+    return scheduler
+
+
+def main(argv=sys.argv):
+    n, ticks = DEFAULT_ENTRIES, DEFAULT_TICKS
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        ticks = int(argv[2])
+    for cls in (legacy_crontab, crontab):
+        scheduler = create_scheduler(cls, n)
+        time_start = time.time()
+        for i in xrange(ticks):
+            scheduler.tick()
+        total = time.time() - time_start
+        print("-- %s: %s entries, %s ticks: %.4fs total, %.4fs/tick" % (
+                cls.__name__, n, ticks, total, total / ticks))
+
+
+if __name__ == "__main__":
+    main()
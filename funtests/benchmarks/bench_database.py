@@ -0,0 +1,88 @@
+"""Compares the SELECT/INSERT/UPDATE result writes and per result polling
+of the previous :class:`DatabaseBackend` with the upsert writes and
+batched :meth:`~DatabaseBackend.get_many` lookups, using SQLite.
+
+Usage: bench_database.py [n=2000]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+from celery import states
+from celery.backends.database import DatabaseBackend
+from celery.backends.database.models import Task
+from celery.utils import uuid
+
+DEFAULT_ITS = 2000
+
+
+class LegacyDatabaseBackend(DatabaseBackend):
+    """The previous implementation, kept here for comparison."""
+    supports_native_join = False
+
+    def _store_result(self, task_id, result, status, traceback=None):
+        session = self.ResultSession()
+        try:
+            task = session.query(Task).filter(Task.task_id == task_id).first()
+            if not task:
+                task = Task(task_id)
+                session.add(task)
+                session.flush()
+            task.result = result
+            task.status = status
+            task.traceback = traceback
+            session.commit()
+        finally:
+            session.close()
+        return result
+
+
+def bench_store(backend, ids):
+    time_start = time.time()
+    for task_id in ids:
+        backend.mark_as_started(task_id)
+        backend.mark_as_done(task_id, 42)
+    return time.time() - time_start
+
+
+def bench_collect(backend, ids):
+    time_start = time.time()
+    if backend.supports_native_join:
+        results = list(backend.get_many(ids, interval=0.01))
+    else:
+        results = [(task_id, backend.get_task_meta(task_id))
+                        for task_id in ids]
+    assert all(meta["status"] == states.SUCCESS for _, meta in results)
+    return time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    # the result tables are only set up once per process,
+    # so all runs share the same database.
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        for cls, pooled in ((LegacyDatabaseBackend, False),
+                            (DatabaseBackend, False),
+                            (DatabaseBackend, True)):
+            backend = cls(dburi="sqlite:///%s" % (path, ),
+                          pooled_sessions=pooled)
+            ids = [uuid() for i in xrange(n)]
+            name = "%s%s" % (cls.__name__, " (pooled)" if pooled else "")
+            total = bench_store(backend, ids)
+            print("-- %s: store %s results: %.4fs total, %d results/s" % (
+                    name, n, total, n / total))
+            total = bench_collect(backend, ids)
+            print("-- %s: collect %s results: %.4fs total, %d results/s" % (
+                    name, n, total, n / total))
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measures the per-task overhead of sending a no-op task to a pool
+process: creating and pickling the job sent over the pool pipe,
+and unpickling and executing it in the pool process.
+
+Compares the compact job records of :func:`celery.worker.job.execute_job`
+with the previous implementation that sent every request field,
+and shows the effect of disabling per-task process title updates.
+
+Usage: bench_dispatch.py [n=50k]
+
+"""
+import cPickle as pickle
+import socket
+import sys
+import time
+
+from celery import current_app
+from celery.utils import uuid
+from celery.worker import job
+from celery.worker.job import TaskRequest, execute_and_trace, execute_job
+
+DEFAULT_ITS = 50000
+
+
+@current_app.task(ignore_result=True)
+def noop():
+    pass
+
+
+class LegacyTaskRequest(TaskRequest):
+    """The previous implementation, kept here for comparison."""
+
+    def job(self, loglevel=None, logfile=None):
+        kwargs = self.kwargs
+        if self.task.accept_magic_kwargs:
+            kwargs = self.extend_with_default_kwargs(loglevel, logfile)
+        request = self.request_dict
+        request.update({"loglevel": loglevel, "logfile": logfile,
+                        "hostname": self.hostname, "is_eager": False,
+                        "delivery_info": self.delivery_info})
+        return ((self.name, self.id, self.args, kwargs),
+                {"hostname": self.hostname, "request": request})
+
+
+def legacy_execute(record):
+    args, kwargs = record
+    return execute_and_trace(*args, **kwargs)
+
+
+def slim_execute(record):
+    return execute_job(*record)
+
+
+def bench(cls, execute, n, titles=True):
+    job.process_titles = titles
+    requests = [cls(noop.name, uuid(), [], {},
+                    delivery_info={"exchange": "celery",
+                                   "routing_key": "celery"})
+                    for i in xrange(n)]
+    noop.accept_magic_kwargs = False
+
+    time_start = time.time()
+    payloads = [pickle.dumps((execute, request.job(20, None)),
+                             protocol=pickle.HIGHEST_PROTOCOL)
+                    for request in requests]
+    dispatch = time.time() - time_start
+    size = sum(len(payload) for payload in payloads) / n
+
+    time_start = time.time()
+    for payload in payloads:
+        fun, args = pickle.loads(payload)
+        fun(args)
+    return dispatch, size, time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    job.install_context(socket.gethostname(), 20, None)
+    for name, cls, execute, titles in (
+            ("legacy", LegacyTaskRequest, legacy_execute, True),
+            ("slim", TaskRequest, slim_execute, True),
+            ("slim, no titles", TaskRequest, slim_execute, False)):
+        dispatch, size, run = bench(cls, execute, n, titles)
+        print("-- %s: %s tasks: dispatch %.2fus/task (%s bytes), "
+              "execute %.2fus/task" % (name, n, dispatch / n * 1e6,
+                                       size, run / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
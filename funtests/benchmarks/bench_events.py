@@ -0,0 +1,55 @@
+"""Compares sending one message for every event with sending
+events in batches, using the in-memory transport.
+
+Usage: bench_events.py [n=20k]
+
+"""
+import sys
+import time
+
+from celery import current_app as app
+
+DEFAULT_ITS = 20000
+BATCH_SIZES = (0, 10, 100)
+
+
+class CountingProducer(object):
+
+    def __init__(self, producer):
+        self.producer = producer
+        self.messages = 0
+
+    def publish(self, *args, **kwargs):
+        self.messages += 1
+        return self.producer.publish(*args, **kwargs)
+
+    def __getattr__(self, key):
+        return getattr(self.producer, key)
+
+
+def bench(batch_size, n):
+    connection = app.broker_connection("memory://")
+    dispatcher = app.events.Dispatcher(connection,
+                                       batch_size=batch_size,
+                                       batch_interval=3600)
+    producer = dispatcher.publisher = CountingProducer(dispatcher.publisher)
+    send = dispatcher.send
+    time_start = time.time()
+    for i in xrange(n):
+        send("task-succeeded", uuid="id", result="42", runtime=0.1)
+    dispatcher.close()
+    return producer.messages, time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for batch_size in BATCH_SIZES:
+        messages, total = bench(batch_size, n)
+        print("-- batch_size=%s: %s events, %s messages: %.4fs total, "
+              "%d events/s" % (batch_size, n, messages, total, n / total))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measures the time it takes for the ``celery.group`` task to publish
+the members of a group, compared to the previous implementation that
+applied every member separately using :meth:`Task.apply_async`.
+
+Uses the in-memory transport, so the numbers show the overhead of
+preparing the messages, not the broker.
+
+Usage: bench_group.py [n=20k]
+
+"""
+import sys
+import time
+
+from celery import current_app
+from celery.canvas import subtask
+
+DEFAULT_ITS = 20000
+
+current_app.conf.BROKER_URL = "memory://"
+
+
+@current_app.task()
+def add(x, y):
+    return x + y
+
+
+def legacy_run(self, tasks, result):
+    """The previous implementation, kept here for comparison."""
+    with current_app.pool.acquire(block=True) as conn:
+        with current_app.amqp.TaskPublisher(conn) as publisher:
+            [subtask(task).apply_async(taskset_id=self.request.taskset,
+                                       publisher=publisher)
+                for task in tasks]
+    return result
+
+
+def bench(run, n):
+    Group = current_app.tasks["celery.group"]
+    tasks, result = Group.prepare({}, tasks=[add.s(i, i) for i in xrange(n)])
+    # members are received as dicts by the worker.
+    tasks = [dict(task) for task in tasks]
+    serialized = result.serializable()
+    time_start = time.time()
+    run(Group, tasks, serialized)
+    total = time.time() - time_start
+    with current_app.broker_connection() as conn:
+        conn.default_channel.queue_purge("celery")
+    return total
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for name, run in (("legacy", legacy_run),
+                      ("apply_many", lambda self, *args: self.run(*args))):
+        total = bench(run, n)
+        print("-- %s: %s tasks: %.4fs total, %.2fus/task" % (
+                name, n, total, total / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compares the heap based :class:`~celery.datastructures.LimitedSet`
+with the previous implementation that sorted all members to find the
+oldest member once the set was full.
+
+Usage: bench_limitedset.py [n=20k]
+
+"""
+import sys
+import time
+
+from cPickle import dumps, HIGHEST_PROTOCOL
+
+from celery.datastructures import LimitedSet
+from celery.utils import uuid
+
+DEFAULT_ITS = 20000
+SIZES = (1000, 10000, 100000)
+
+
+class SortingLimitedSet(LimitedSet):
+    """The previous implementation, kept here for comparison."""
+    __slots__ = ()
+
+    def add(self, value, now=None):
+        self._expire_item()
+        self._data[value] = now or time.time()
+
+    def _expire_item(self):
+        if self.maxlen and len(self) >= self.maxlen:
+            value, when = self.chronologically[0]
+            if not self.expires or time.time() > when + self.expires:
+                self.pop_value(value)
+
+
+def bench(cls, maxlen, n):
+    s = cls(maxlen=maxlen)
+    for i in xrange(maxlen):
+        s.add(uuid())
+    ids = [uuid() for i in xrange(n)]
+    time_start = time.time()
+    for task_id in ids:
+        s.add(task_id)
+        task_id in s
+    return s, time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for maxlen in SIZES:
+        for cls in (SortingLimitedSet, LimitedSet):
+            # the sorting version is way too slow with large sets.
+            its = n if cls is LimitedSet else max(n * 1000 / maxlen / 10, 10)
+            s, total = bench(cls, maxlen, its)
+            print("-- %s: maxlen=%s, %s adds: %.4fs total, %d adds/s" % (
+                    cls.__name__, maxlen, its, total, its / total))
+        time_start = time.time()
+        size = len(dumps(s, HIGHEST_PROTOCOL))
+        print("-- pickle maxlen=%s: %.4fs, %d bytes" % (
+                maxlen, time.time() - time_start, size))
+
+
+if __name__ == "__main__":
+    main()
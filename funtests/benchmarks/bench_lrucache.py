@@ -0,0 +1,109 @@
+"""Microbenchmarks comparing the linked list based
+:class:`~celery.utils.functional.LRUCache` with the previous
+:class:`~collections.OrderedDict` based implementation.
+
+Usage: bench_lrucache.py [n=200k]
+
+"""
+from __future__ import with_statement
+
+import sys
+import time
+
+from threading import RLock
+from UserDict import UserDict
+
+from celery.utils.compat import OrderedDict
+from celery.utils.functional import LRUCache
+
+DEFAULT_ITS = 200000
+LIMIT = 10000
+
+
+class OrderedDictLRUCache(UserDict):
+    """The previous implementation, kept here for comparison."""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.mutex = RLock()
+        self.data = OrderedDict()
+
+    def __getitem__(self, key):
+        with self.mutex:
+            value = self[key] = self.data.pop(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self.mutex:
+            if self.limit and len(self.data) >= self.limit:
+                self.data.pop(iter(self.data).next())
+            self.data[key] = value
+
+    def __iter__(self):
+        return self.data.iterkeys()
+
+    def itervalues(self):
+        for k in self:
+            try:
+                yield self.data[k]
+            except KeyError:
+                pass
+
+
+def bench_get_hit(cache, n):
+    for i in xrange(LIMIT):
+        cache[i] = i
+    time_start = time.time()
+    for i in xrange(n):
+        cache[i % LIMIT]
+    return time.time() - time_start
+
+
+def bench_get_miss(cache, n):
+    get = cache.get
+    time_start = time.time()
+    for i in xrange(n):
+        get(i)
+    return time.time() - time_start
+
+
+def bench_set_evict(cache, n):
+    time_start = time.time()
+    for i in xrange(n):
+        cache[i] = i
+    return time.time() - time_start
+
+
+def bench_iterate(cache, n):
+    for i in xrange(LIMIT):
+        cache[i] = i
+    time_start = time.time()
+    for i in xrange(max(n // LIMIT, 1)):
+        for value in cache.itervalues():
+            pass
+    return time.time() - time_start
+
+
+CACHES = (("OrderedDictLRUCache", lambda: OrderedDictLRUCache(LIMIT)),
+          ("LRUCache", lambda: LRUCache(LIMIT)),
+          ("LRUCache(thread_safe=False)",
+                lambda: LRUCache(LIMIT, thread_safe=False)))
+BENCHMARKS = (("get (hit)", bench_get_hit),
+              ("get (miss)", bench_get_miss),
+              ("set (evicting)", bench_set_evict),
+              ("iterate", bench_iterate))
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for bench_name, bench in BENCHMARKS:
+        for name, Cache in CACHES:
+            total = bench(Cache(), n)
+            print("-- %s: %s: %.4fs total, %.3fus/op" % (
+                    bench_name, name, total, total / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measures the number of no-op tasks per second the processes pool
+can execute when sending one task per job, compared to sending batches
+of tasks as a single job using :class:`~celery.worker.job.RequestBatch`.
+
+Usage: bench_pool_batch.py [n=20k] [processes=4]
+
+"""
+from __future__ import with_statement
+
+import socket
+import sys
+import threading
+import time
+
+from celery import current_app
+from celery.concurrency.processes import TaskPool
+from celery.utils import uuid
+from celery.worker import state
+from celery.worker.job import RequestBatch, TaskRequest
+
+DEFAULT_ITS = 20000
+DEFAULT_PROCESSES = 4
+BATCH_SIZES = (1, 8, 64)
+
+
+@current_app.task(ignore_result=True)
+def noop():
+    pass
+
+
+class Counter(object):
+
+    def __init__(self, n):
+        self.n = n
+        self.done = 0
+        self.mutex = threading.Lock()
+        self.finished = threading.Event()
+
+    def __call__(self, *args):
+        with self.mutex:
+            self.done += 1
+            if self.done >= self.n:
+                self.finished.set()
+
+
+def create_requests(n):
+    requests = []
+    for i in xrange(n):
+        request = TaskRequest(noop.name, uuid(), [], {})
+        request._does_info = False
+        requests.append(request)
+    return requests
+
+
+def bench(pool, n, batch_size):
+    requests = create_requests(n)
+    counter = Counter(n)
+    state.ready_callbacks.append(counter)
+    time_start = time.time()
+    if batch_size == 1:
+        for request in requests:
+            request.execute_using_pool(pool)
+    else:
+        for i in xrange(0, n, batch_size):
+            RequestBatch(requests[i:i + batch_size]).execute_using_pool(pool)
+    counter.finished.wait()
+    total = time.time() - time_start
+    state.ready_callbacks.remove(counter)
+    return total
+
+
+def main(argv=sys.argv):
+    n, processes = DEFAULT_ITS, DEFAULT_PROCESSES
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        processes = int(argv[2])
+    pool = TaskPool(processes, initargs=(current_app, socket.gethostname()))
+    pool.start()
+    try:
+        for batch_size in BATCH_SIZES:
+            total = bench(pool, n, batch_size)
+            print("-- batch size %s: %s tasks: %.4fs total, %d tasks/s" % (
+                    batch_size, n, total, n / total))
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
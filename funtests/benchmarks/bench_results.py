@@ -0,0 +1,87 @@
+"""Measures the time it takes to send and collect the results of many
+tasks using the ``amqp`` result backend, that creates a queue for every
+task, and the ``rpc`` result backend, that sends all the results for a
+client to a single reply queue.
+
+Uses the in-memory transport, so the numbers show the overhead of
+the backends (and the number of queues declared), not the broker.
+
+Usage: bench_results.py [n=2000]
+
+"""
+import sys
+import time
+
+from kombu.transport import memory, virtual
+
+from celery import current_app
+from celery.app.task import Context
+from celery.backends.amqp import AMQPBackend
+from celery.backends.rpc import RPCBackend
+from celery.utils import uuid
+
+DEFAULT_ITS = 2000
+
+current_app.conf.BROKER_URL = "memory://"
+
+
+class DeclareCounter(object):
+
+    def __init__(self):
+        self.declared = 0
+        self._declare = virtual.Channel.queue_declare
+
+    def queue_declare(self, channel, *args, **kwargs):
+        self.declared += 1
+        return self._declare(channel, *args, **kwargs)
+
+    def __enter__(self):
+        counter = self
+
+        def queue_declare(self, *args, **kwargs):
+            return counter.queue_declare(self, *args, **kwargs)
+        virtual.Channel.queue_declare = queue_declare
+        return self
+
+    def __exit__(self, *exc_info):
+        virtual.Channel.queue_declare = self._declare
+
+
+def bench(cls, n):
+    client = cls(serializer="pickle", persistent=False)
+    worker = cls(serializer="pickle", persistent=False)
+    requests = []
+    for i in xrange(n):
+        request = Context()
+        request.update({"id": uuid(), "reply_to": client.reply_to})
+        requests.append(request)
+    queues = len(memory.Channel.queues)
+
+    with DeclareCounter() as counter:
+        time_start = time.time()
+        for request in requests:
+            worker.mark_as_done(request.id, 42, request=request)
+        publish = time.time() - time_start
+
+        time_start = time.time()
+        results = list(client.get_many([r.id for r in requests], timeout=10))
+        collect = time.time() - time_start
+    assert len(results) == n
+    return (publish, collect, counter.declared,
+            len(memory.Channel.queues) - queues)
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for cls in (AMQPBackend, RPCBackend):
+        publish, collect, declared, queues = bench(cls, n)
+        print("-- %s: %s results: publish %.2fus/result, "
+              "collect %.2fus/result, %s declarations, %s new queues" % (
+                cls.__name__, n, publish / n * 1e6, collect / n * 1e6,
+                declared, queues))
+
+
+if __name__ == "__main__":
+    main()
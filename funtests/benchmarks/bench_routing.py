@@ -0,0 +1,63 @@
+"""Measures the time it takes to route a task with
+:meth:`celery.app.amqp.AMQP.Router`, with many routes configured.
+
+Compares the routing table of expanded routes shared by the
+routers of the app, with routing every message from scratch.
+
+Usage: bench_routing.py [n=50k] [routes=40]
+
+"""
+import sys
+import time
+
+from celery import current_app
+from celery.app import routes
+
+DEFAULT_ITS = 50000
+DEFAULT_ROUTES = 40
+
+
+def configure(nroutes):
+    conf = current_app.conf
+    conf.CELERY_QUEUES = dict(("queue%s" % (i, ), {
+                                    "exchange": "exchange%s" % (i, ),
+                                    "exchange_type": "direct",
+                                    "binding_key": "key%s" % (i, )})
+                                for i in xrange(nroutes))
+    current_app.amqp.queues = current_app.amqp.Queues(conf.CELERY_QUEUES)
+    # one route per map, so the last task goes through all of them.
+    conf.CELERY_ROUTES = [{"task%s" % (i, ): {"queue": "queue%s" % (i, )}}
+                            for i in xrange(nroutes)]
+
+
+def legacy_router():
+    amqp = current_app.amqp
+    return routes.Router(amqp.routes, amqp.queues,
+                         current_app.conf.CELERY_CREATE_MISSING_QUEUES,
+                         app=current_app)
+
+
+def bench(Router, task, n):
+    time_start = time.time()
+    for i in xrange(n):
+        Router().route({}, task, (), {})
+    return time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n, nroutes = DEFAULT_ITS, DEFAULT_ROUTES
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        nroutes = int(argv[2])
+    configure(nroutes)
+    for task in ("task0", "task%s" % (nroutes - 1, ), "unrouted"):
+        for name, Router in (("legacy", legacy_router),
+                             ("table", current_app.amqp.Router)):
+            total = bench(Router, task, n)
+            print("-- %s: %r: %s messages: %.2fus/message" % (
+                    name, task, n, total / n * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measures the number of messages per second the ``auth`` serializer
+can sign and verify, for the previous base64 framing, the binary framing
+and the HMAC session key mode.
+
+Requires pyOpenSSL, and uses the test keys and certificates
+of the Celery test suite.
+
+Usage: bench_security.py [n=1000]
+
+"""
+import sys
+import time
+
+from celery.security.certificate import Certificate, CertStore
+from celery.security.key import PrivateKey
+from celery.security.serialization import (SecureSerializer,
+                                           b64encode, b64decode)
+from celery.tests.security import CERT1, KEY1
+
+DEFAULT_ITS = 1000
+SIZES = (("1KB", 1024), ("1MB", 1024 * 1024))
+
+
+class LegacySerializer(SecureSerializer):
+    """The previous framing, kept here for comparison."""
+
+    def _pack(self, body, content_type, content_encoding, signer, signature,
+            sep='\x00\x01', **kwargs):
+        return b64encode(sep.join([signer, signature,
+                                   content_type, content_encoding, body]))
+
+    def _unpack(self, payload, sep='\x00\x01',
+            fields=("signer", "signature", "content_type",
+                    "content_encoding", "body")):
+        return dict(zip(fields, b64decode(payload).split(sep)))
+
+    def _verify(self, mode, signer, body, signature):
+        self._cert_store[signer].verify(body, signature, self._digest)
+
+
+def serializer(cls=SecureSerializer, **kwargs):
+    store = CertStore()
+    store.add_cert(Certificate(CERT1))
+    return cls(PrivateKey(KEY1), Certificate(CERT1), store, **kwargs)
+
+
+def bench(s, size, n):
+    data = "x" * size
+    time_start = time.time()
+    for i in xrange(n):
+        s.deserialize(s.serialize(data))
+    return time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for size_name, size in SIZES:
+        # large messages takes longer to encode, so send fewer of them.
+        its = n if size < 65536 else max(n / 20, 10)
+        for name, s in (("legacy", serializer(LegacySerializer)),
+                        ("binary", serializer()),
+                        ("hmac", serializer(session_key="secret"))):
+            total = bench(s, size, its)
+            print("-- %s %s: %s messages: %.4fs total, %.1f msg/s" % (
+                    name, size_name, its, total, its / total))
+
+
+if __name__ == "__main__":
+    main()
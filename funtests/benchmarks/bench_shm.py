@@ -0,0 +1,67 @@
+"""Compares sending jobs with large arguments to the processes pool
+over the pool pipe, with passing them in shared memory using
+:class:`~celery.concurrency.processes.arena.Arena`.
+
+Usage: bench_shm.py [n=200] [size=8M] [processes=4]
+
+"""
+from __future__ import with_statement
+
+import socket
+import sys
+import threading
+import time
+
+from celery import current_app
+from celery.concurrency.processes import TaskPool
+
+DEFAULT_ITS = 200
+DEFAULT_SIZE = 8 * 1024 * 1024
+DEFAULT_PROCESSES = 4
+
+
+def payload_size(payload):
+    return len(payload)
+
+
+def bench(pool, n, size):
+    payload = "x" * size
+    done = [0]
+    mutex = threading.Lock()
+    finished = threading.Event()
+
+    def on_ready(ret_value):
+        with mutex:
+            done[0] += 1
+            if done[0] >= n:
+                finished.set()
+
+    time_start = time.time()
+    for i in xrange(n):
+        pool.apply_async(payload_size, (payload, ), callback=on_ready)
+    finished.wait()
+    return time.time() - time_start
+
+
+def main(argv=sys.argv):
+    n, size, processes = DEFAULT_ITS, DEFAULT_SIZE, DEFAULT_PROCESSES
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        size = int(argv[2])
+    if len(argv) > 3:
+        processes = int(argv[3])
+    for name, threshold in (("pipe", None), ("shared memory", 1024 * 1024)):
+        pool = TaskPool(processes, shm_threshold=threshold,
+                        initargs=(current_app, socket.gethostname()))
+        pool.start()
+        try:
+            total = bench(pool, n, size)
+        finally:
+            pool.stop()
+        print("-- %s: %s jobs of %s bytes: %.4fs total, %.1f jobs/s" % (
+                name, n, size, total, n / total))
+
+
+if __name__ == "__main__":
+    main()
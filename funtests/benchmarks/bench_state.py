@@ -0,0 +1,100 @@
+"""Replays synthetic events into :class:`celery.events.state.State`,
+measuring the ingest rate and the latency of the queries used by
+monitors, compared with the previous implementation that scanned all
+tasks for every query.
+
+Usage: bench_state.py [n=1M]
+
+"""
+import sys
+import time
+
+from itertools import cycle
+
+from celery.events import Event
+from celery.events.state import State
+from celery.utils import uuid
+
+DEFAULT_ITS = 1000000
+WORKERS = ["worker%d.example.com" % (i, ) for i in xrange(10)]
+TASK_TYPES = ["tasks.task%d" % (i, ) for i in xrange(50)]
+QUERY_ITS = 100
+
+
+class ScanningState(State):
+    """The previous queries, kept here for comparison."""
+
+    def _index_task(self, task):
+        pass
+
+    def _on_task_evicted(self, uuid, task):
+        pass
+
+    def tasks_by_type(self, name, limit=None):
+        return self._sort_tasks_by_time([(uuid, task)
+                for uuid, task in self.itertasks(limit)
+                    if task.name == name])
+
+    def tasks_by_worker(self, hostname, limit=None):
+        return self._sort_tasks_by_time([(uuid, task)
+                for uuid, task in self.itertasks(limit)
+                    if task.worker.hostname == hostname])
+
+    def tasks_by_timestamp(self, limit=None):
+        return self._sort_tasks_by_time(self.itertasks(limit))
+
+    def task_types(self):
+        return list(sorted(set(task.name
+                                for task in self.tasks.itervalues())))
+
+
+def events(n):
+    workers, types = cycle(WORKERS), cycle(TASK_TYPES)
+    now = time.time()
+    # every task has three events: received, started, succeeded.
+    for i in xrange(n // 3):
+        tid, hostname = uuid(), workers.next()
+        yield Event("task-received", uuid=tid, name=types.next(),
+                    args="()", kwargs="{}", hostname=hostname,
+                    timestamp=now + i)
+        yield Event("task-started", uuid=tid, hostname=hostname,
+                    timestamp=now + i + 0.1)
+        yield Event("task-succeeded", uuid=tid, hostname=hostname,
+                    result="42", runtime=0.1, timestamp=now + i + 0.2)
+
+
+def query(fun, *args):
+    time_start = time.time()
+    for i in xrange(QUERY_ITS):
+        fun(*args)
+    return (time.time() - time_start) / QUERY_ITS * 1000.0
+
+
+def bench(cls, n):
+    state = cls()
+    evs = list(events(n))
+    time_start = time.time()
+    for event in evs:
+        state.event(event)
+    ingest = time.time() - time_start
+    print("-- %s: ingest %s events: %.4fs total, %d events/s" % (
+            cls.__name__, len(evs), ingest, len(evs) / ingest))
+    for name, fun, args in (
+            ("tasks_by_type", state.tasks_by_type, (TASK_TYPES[0], )),
+            ("tasks_by_worker", state.tasks_by_worker, (WORKERS[0], )),
+            ("tasks_by_timestamp(limit=100)", state.tasks_by_timestamp,
+                (100, )),
+            ("task_types", state.task_types, ())):
+        print("   %s: %.3fms" % (name, query(fun, *args)))
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for cls in (ScanningState, State):
+        bench(cls, n)
+
+
+if __name__ == "__main__":
+    main()
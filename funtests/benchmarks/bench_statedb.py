@@ -0,0 +1,60 @@
+"""Compares loading and saving the worker state db using the
+:mod:`shelve` based :class:`~celery.worker.state.Persistent` and
+the :class:`~celery.worker.state.AppendOnlyPersistent` log.
+
+Usage: bench_statedb.py [n=100k]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from celery.utils import uuid
+from celery.worker import state
+
+DEFAULT_ITS = 100000
+
+#: Number of tasks revoked between every save.
+NEW_REVOKES = 100
+
+
+def bench(cls, n, dir):
+    filename = os.path.join(dir, cls.__name__)
+    state.revoked.clear()
+    state.revoked.maxlen = n + NEW_REVOKES
+    for i in xrange(n):
+        state.revoked.add(uuid())
+    cls(filename).save()
+
+    state.revoked.clear()
+    time_start = time.time()
+    p = cls(filename)
+    load = time.time() - time_start
+    assert len(state.revoked) == n
+
+    for i in xrange(NEW_REVOKES):
+        state.revoked.add(uuid())
+    time_start = time.time()
+    p.save()
+    save = time.time() - time_start
+    return load, save
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    dir = tempfile.mkdtemp()
+    try:
+        for cls in (state.Persistent, state.AppendOnlyPersistent):
+            load, save = bench(cls, n, dir)
+            print("-- %s: %s revokes: load %.4fs, save %s new %.4fs" % (
+                    cls.__name__, n, load, NEW_REVOKES, save))
+    finally:
+        shutil.rmtree(dir)
+
+
+if __name__ == "__main__":
+    main()
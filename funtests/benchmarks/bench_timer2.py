@@ -0,0 +1,69 @@
+"""Compares the heap based :class:`~celery.utils.timer2.Schedule`
+with the :class:`~celery.utils.timer2.TimingWheelSchedule`, entering,
+cancelling, inspecting and applying entries with etas spread out
+over the next day.
+
+Usage: bench_timer2.py [n=1M]
+
+"""
+import random
+import sys
+import time
+
+from celery.utils import timer2
+
+DEFAULT_ITS = 1000000
+SPREAD = 24 * 3600.0
+PAGE = 100
+
+
+def bench(cls, n):
+    schedule = cls()
+    now = time.time()
+    etas = [now + random.random() * SPREAD for i in xrange(n)]
+
+    time_start = time.time()
+    entries = [schedule.enter(timer2.Entry(int, (), {}), eta)
+                    for eta in etas]
+    yield "enter", n, time.time() - time_start
+
+    time_start = time.time()
+    for entry in entries[::2]:
+        entry.cancel()
+    yield "cancel", n / 2, time.time() - time_start
+
+    time_start = time.time()
+    for i in xrange(10):
+        list(schedule.info(i * PAGE, PAGE))
+    yield "info page", 10, time.time() - time_start
+
+    # drain the schedule in steps of one minute, using a fake clock.
+    clock = [now]
+    timer2.time = lambda: clock[0]
+    try:
+        time_start = time.time()
+        applied, it = 0, iter(schedule)
+        while clock[0] < now + SPREAD + 60:
+            delay, entry = it.next()
+            if entry is None:
+                clock[0] += 60
+            else:
+                applied += 1
+        assert applied == n - len(entries[::2])
+        yield "apply", applied, time.time() - time_start
+    finally:
+        timer2.time = time.time
+
+
+def main(argv=sys.argv):
+    n = DEFAULT_ITS
+    if len(argv) > 1:
+        n = int(argv[1])
+    for cls in (timer2.Schedule, timer2.TimingWheelSchedule):
+        for op, its, total in bench(cls, n):
+            print("-- %s: %s %s: %.4fs total, %d/s" % (
+                    cls.__name__, op, its, total, its / total))
+
+
+if __name__ == "__main__":
+    main()